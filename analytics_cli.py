@@ -0,0 +1,455 @@
+"""
+Batch command-line entry point for nightly scoring jobs (no Streamlit runtime).
+
+Examples:
+    python analytics_cli.py score students.csv --task dropout --out dropout_scores.csv
+    python analytics_cli.py score students.parquet --task exam --out exam.csv \\
+        --reports exam_reports.zip
+    python analytics_cli.py score students.csv --task placement --out placement.csv \\
+        --granite --batch-size 10 --concurrency 8 --rate 4
+    python analytics_cli.py score students.csv --task dropout --out dropout.csv \\
+        --granite --state nightly_state.sqlite3
+    python analytics_cli.py eligibility attendance.csv --out eligibility.csv
+    python analytics_cli.py score students.csv --task dropout --out dropout.csv --history .analytics_history
+    python analytics_cli.py history --roll 21CSE1234
+    python analytics_cli.py history --task dropout --semester 5 6 --out slice.csv
+    python analytics_cli.py history --compact
+    python analytics_cli.py trends --roll 21CSE1234
+    python analytics_cli.py trends --task dropout --metric cgpa --window 3
+    python analytics_cli.py router train --target-accuracy 0.95
+    python analytics_cli.py router report
+
+Local rule-based scores are always written; --granite adds Granite columns
+(granite_risk_level, granite_predicted_score, granite_summary, granite_error)
+using the WATSONX_* / GRANITE_MODEL_ID settings from the environment or .env.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from attendance_rules import (
+    CODE_NAMES,
+    aggregate_attendance_counts,
+    classify_attendance,
+    eligibility_counts,
+    eligibility_table,
+)
+from bulk_reports import ReportJob, generate_bulk_reports, report_jobs_from_cohort
+from cohort_ingest import DEFAULT_CHUNK_ROWS, ID_COLUMNS, iter_profile_chunks
+from cohort_scoring import TASK_COLUMNS, score_cohort
+from granite_client import GraniteSettings, call_granite_for_batch, call_granite_for_cohort, settings_from_env
+from history_store import DEFAULT_HISTORY_DIR, HistoryStore, history_record
+from incremental_scoring import ScoreStateStore, rescore_incremental
+from local_router import DEFAULT_ROUTER_DIR, DEFAULT_TARGET_ACCURACY, escalation_report, train_router, training_data
+from trends import DEFAULT_AGGREGATES_PATH, TREND_FIELDS, CohortAggregates, student_trend_report
+from metrics import METRICS
+
+GRANITE_COLUMNS = ["granite_risk_level", "granite_predicted_score", "granite_summary", "granite_error"]
+
+
+def _roll_numbers(frame: pd.DataFrame) -> List[str]:
+    if "roll_no" in frame.columns:
+        return [str(r) for r in frame["roll_no"].tolist()]
+    return [str(i) for i in frame.index]
+
+
+def granite_columns(
+    settings: GraniteSettings,
+    task: str,
+    frame: pd.DataFrame,
+    batch_size: int,
+    concurrency: int,
+    rate: Optional[float],
+) -> pd.DataFrame:
+    """
+    Score one chunk with Granite and return the granite_* columns aligned with it.
+    """
+    keys = [f"{i}:{roll}" for i, roll in enumerate(_roll_numbers(frame))]
+    records = frame[TASK_COLUMNS[task]].to_dict("records")
+    profiles = dict(zip(keys, records))
+    if batch_size > 1:
+        results = call_granite_for_batch(settings, task, profiles, batch_size=batch_size)
+    else:
+        results = call_granite_for_cohort(settings, task, profiles, max_concurrency=concurrency, rate_per_sec=rate)
+
+    rows = []
+    for key in keys:
+        parsed, err = results.get(key, (None, "No Granite result."))
+        parsed = parsed or {}
+        rows.append(
+            {
+                "granite_risk_level": parsed.get("risk_level"),
+                "granite_predicted_score": parsed.get("predicted_score"),
+                "granite_summary": parsed.get("summary"),
+                "granite_error": err or None,
+            }
+        )
+    return pd.DataFrame(rows, index=frame.index, columns=GRANITE_COLUMNS)
+
+
+def incremental_columns(
+    store: ScoreStateStore,
+    settings: Optional[GraniteSettings],
+    task: str,
+    frame: pd.DataFrame,
+    batch_size: int,
+    concurrency: int,
+    rate: Optional[float],
+    seen: Optional[Set[str]] = None,
+) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Score one chunk through the change-detection store; only new / changed
+    roll numbers are re-scored locally or re-sent to Granite.
+
+    Stored results are keyed by roll number, so a roll number repeated in the
+    chunk (or in `seen`, the roll numbers of earlier chunks) raises ValueError.
+    """
+    rolls = _roll_numbers(frame)
+    repeated = sorted({r for r, n in Counter(rolls).items() if n > 1} | (set(rolls) & seen if seen else set()))
+    if repeated:
+        raise ValueError(f"Roll numbers must be unique to track changes; repeated: {', '.join(repeated[:5])}")
+    if seen is not None:
+        seen.update(rolls)
+    profiles = dict(zip(rolls, frame[TASK_COLUMNS[task]].to_dict("records")))
+    results, stats = rescore_incremental(
+        store, task, profiles, settings, batch_size=batch_size, max_concurrency=concurrency, rate_per_sec=rate
+    )
+    rows = []
+    for roll in rolls:
+        local = results[roll]["local"]
+        row = {
+            "risk_level": local["risk_level"],
+            "predicted_score": local["predicted_score"],
+            "summary": local["summary"],
+        }
+        if settings is not None:
+            granite = results[roll]["granite"] or {}
+            row.update(
+                {
+                    "granite_risk_level": granite.get("risk_level"),
+                    "granite_predicted_score": granite.get("predicted_score"),
+                    "granite_summary": granite.get("summary"),
+                    "granite_error": results[roll]["granite_error"] or None,
+                }
+            )
+        rows.append(row)
+    return pd.DataFrame(rows, index=frame.index), stats
+
+
+def history_rows(
+    task: str,
+    frame: pd.DataFrame,
+    scored: pd.DataFrame,
+    settings: Optional[GraniteSettings],
+) -> List[Dict[str, Any]]:
+    """
+    History records for one scored chunk: the local result, plus the Granite one when present.
+    The Granite row comes last, so it is the one CohortAggregates.ingest keeps per student.
+    """
+    rolls = _roll_numbers(frame)
+    names = frame["student_name"].tolist() if "student_name" in frame.columns else [""] * len(frame)
+    profiles = frame[TASK_COLUMNS[task]].to_dict("records")
+    rows = []
+    for roll, name, profile, out in zip(rolls, names, profiles, scored.to_dict("records")):
+        local = {"risk_level": out["risk_level"], "predicted_score": out["predicted_score"], "summary": out["summary"]}
+        rows.append(history_record(roll, task, profile, local, "local-rules", student_name=str(name)))
+        if settings is not None and out.get("granite_risk_level") is not None:
+            granite = {
+                "risk_level": out["granite_risk_level"],
+                "predicted_score": out["granite_predicted_score"],
+                "summary": out["granite_summary"],
+            }
+            rows.append(history_record(roll, task, profile, granite, settings.model_id, student_name=str(name)))
+    return rows
+
+
+def report_scores(out: pd.DataFrame) -> pd.DataFrame:
+    """
+    Scores to print in a chunk's reports: the Granite answer where there is one, else the local one.
+    """
+    scores = out[["risk_level", "predicted_score", "summary"]].astype(object)
+    if "granite_risk_level" in out.columns:
+        ok = out["granite_risk_level"].notna()
+        for name in scores.columns:
+            scores.loc[ok, name] = out.loc[ok, f"granite_{name}"]
+    return scores
+
+
+def _report_jobs(task: str, scored_chunks: Iterator[Tuple[pd.DataFrame, pd.DataFrame]]) -> Iterator[ReportJob]:
+    for frame, out in scored_chunks:
+        yield from report_jobs_from_cohort(task, frame, report_scores(out))
+
+
+def cmd_score(args: argparse.Namespace) -> int:
+    settings = settings_from_env(greedy=args.greedy, use_cache=not args.no_cache) if args.granite else None
+    stats: Dict[str, Any] = {"task": args.task, "scored": 0, "rejected": 0, "clipped": 0}
+    store = ScoreStateStore(args.state) if args.state else None
+    history = HistoryStore(args.history) if args.history else None
+    aggregates = CohortAggregates(args.aggregates) if history is not None else None
+    if store is not None:
+        stats["incremental"] = {"skipped": 0, "rescored_local": 0, "sent_to_granite": 0, "new": 0, "changed": 0}
+
+    seen_rolls: Set[str] = set()
+
+    def scored_chunks() -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        tmp_path = args.out + ".part"
+        header = True
+        with open(tmp_path, "w", newline="", encoding="utf-8") as fh:
+            for chunk in iter_profile_chunks(args.input, args.task, args.chunk_rows):
+                frame = chunk.frame
+                ids = [c for c in ID_COLUMNS if c in frame.columns]
+                if store is not None:
+                    if "roll_no" not in frame.columns:
+                        raise SystemExit("--state needs a roll_no column to detect changed students.")
+                    try:
+                        scored, inc = incremental_columns(
+                            store,
+                            settings,
+                            args.task,
+                            frame,
+                            args.batch_size,
+                            args.concurrency,
+                            args.rate or None,
+                            seen=seen_rolls,
+                        )
+                    except ValueError as e:
+                        raise SystemExit(str(e))
+                    parts = [frame[ids], scored]
+                    for name in stats["incremental"]:
+                        stats["incremental"][name] += inc[name]
+                else:
+                    parts = [frame[ids], score_cohort(args.task, frame)]
+                    if settings is not None and len(frame):
+                        parts.append(
+                            granite_columns(
+                                settings, args.task, frame, args.batch_size, args.concurrency, args.rate or None
+                            )
+                        )
+                out = pd.concat(parts, axis=1)
+                out.to_csv(fh, index=False, header=header)
+                if history is not None and len(frame):
+                    rows = history_rows(args.task, frame, out, settings)
+                    history.append(rows)
+                    aggregates.ingest(rows)
+                header = False
+                stats["scored"] += len(frame)
+                stats["rejected"] += chunk.rejected
+                stats["clipped"] += chunk.clipped
+                yield frame, out
+        os.replace(tmp_path, args.out)
+
+    if args.reports:
+        # Reports are rendered from the scored chunks as they are produced (Granite
+        # answers where present), so the input is read and scored only once.
+        mode = "merged" if args.reports.lower().endswith(".pdf") else "zip"
+        stats["reports"] = generate_bulk_reports(
+            _report_jobs(args.task, scored_chunks()),
+            args.reports,
+            mode=mode,
+            processes=args.processes,
+        )
+    else:
+        for _ in scored_chunks():
+            pass
+
+    if args.metrics:
+        METRICS.write_snapshot(args.metrics)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+def cmd_eligibility(args: argparse.Namespace) -> int:
+    """
+    Attendance eligibility for a whole college. The input has either an
+    attendance_percent column, or attended_<subject> / conducted_<subject>
+    column pairs that are aggregated per student.
+    """
+    counts = {name: 0 for name in CODE_NAMES.values()}
+    tmp_path = args.out + ".part"
+    header = True
+    with open(tmp_path, "w", newline="", encoding="utf-8") as fh:
+        for chunk in pd.read_csv(args.input, chunksize=args.chunk_rows):
+            attended = sorted(c for c in chunk.columns if c.startswith("attended_"))
+            if attended:
+                conducted = ["conducted_" + c[len("attended_") :] for c in attended]
+                missing = [c for c in conducted if c not in chunk.columns]
+                if missing:
+                    raise SystemExit(f"Missing columns: {', '.join(missing)}")
+                pct = aggregate_attendance_counts(
+                    chunk[attended].apply(pd.to_numeric, errors="coerce").to_numpy(),
+                    chunk[conducted].apply(pd.to_numeric, errors="coerce").to_numpy(),
+                )
+            elif "attendance_percent" in chunk.columns:
+                pct = pd.to_numeric(chunk["attendance_percent"], errors="coerce").to_numpy(dtype=float)
+            else:
+                raise SystemExit("Input needs attendance_percent or attended_<subject>/conducted_<subject> columns.")
+
+            codes = classify_attendance(pct)
+            labels, _ = eligibility_table(codes)
+            ids = [c for c in ID_COLUMNS if c in chunk.columns]
+            out = chunk[ids].copy()
+            out["aggregate_attendance_percent"] = pct.round(2)
+            out["eligibility_code"] = codes
+            out["eligibility"] = labels
+            out.to_csv(fh, index=False, header=header)
+            header = False
+            for name, n in eligibility_counts(codes).items():
+                counts[name] += n
+    os.replace(tmp_path, args.out)
+    print(json.dumps(counts, indent=2))
+    return 0
+
+
+def cmd_history(args: argparse.Namespace) -> int:
+    history = HistoryStore(args.root)
+    if args.compact:
+        print(json.dumps(history.compact(), indent=2))
+        return 0
+    start = time.perf_counter()
+    if args.roll:
+        frame = history.student_history(args.roll, task=args.task)
+    else:
+        frame = history.query(task=args.task, semesters=args.semester)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if args.out:
+        frame.to_csv(args.out, index=False)
+    else:
+        cols = ["ts", "roll_no", "task", "semester", "model_id", "risk_level", "predicted_score"]
+        print(frame[cols].to_string(index=False) if len(frame) else "No records.")
+    print(json.dumps({"rows": len(frame), "query_ms": round(elapsed_ms, 1)}), file=sys.stderr)
+    return 0
+
+
+def cmd_trends(args: argparse.Namespace) -> int:
+    if args.roll:
+        task = args.task or "dropout"
+        report = student_trend_report(HistoryStore(args.root).student_history(args.roll, task=task), task)
+        if report is None:
+            print("Not enough semesters of history for a trend.")
+            return 0
+        print(report["series"].to_string(index=False))
+        print(json.dumps({"trajectory": report["trajectory"], "warnings": report["warnings"]}, indent=2))
+        return 0
+    aggregates = CohortAggregates(args.aggregates)
+    task = args.task or "dropout"
+    table = aggregates.semester_table(task)
+    print(table.to_string(index=False) if len(table) else "No cohort aggregates yet.")
+    for metric in args.metric or TREND_FIELDS[task][:1]:
+        rolling = aggregates.rolling(task, metric, window=args.window)
+        if len(rolling):
+            print(rolling.to_string(index=False))
+    return 0
+
+
+def cmd_router(args: argparse.Namespace) -> int:
+    """
+    Train the per-task local routers from Granite-scored history, or report
+    escalation rate / agreement with Granite for the trained ones.
+    """
+    history = HistoryStore(args.root)
+    if args.action == "report":
+        report = escalation_report(history, args.dir)
+        print(report.to_string(index=False) if len(report) else "No trained routers.")
+        return 0
+    reports = []
+    for task in args.task or sorted(TASK_COLUMNS):
+        profiles, labels = training_data(history, task)
+        try:
+            router, report = train_router(task, profiles, labels, target_accuracy=args.target_accuracy)
+        except ValueError as exc:
+            print(f"{task}: {exc}", file=sys.stderr)
+            continue
+        router.save(args.dir)
+        reports.append(report)
+    print(json.dumps(reports, indent=2))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="SCET Student Analytics – batch scoring")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    score = sub.add_parser("score", help="Score a CSV / Parquet cohort file and write results (and reports).")
+    score.add_argument("input", help="Cohort file (.csv, .csv.gz or .parquet).")
+    score.add_argument("--task", required=True, choices=sorted(TASK_COLUMNS))
+    score.add_argument("--out", required=True, help="Output CSV path for the scores.")
+    score.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    score.add_argument("--reports", help="Also write PDF reports: .zip (one per student) or .pdf (merged).")
+    score.add_argument("--processes", type=int, default=None, help="Worker processes for PDF rendering.")
+    score.add_argument("--granite", action="store_true", help="Also score every student with Granite.")
+    score.add_argument("--batch-size", type=int, default=10, help="Students per Granite prompt (1 = one call each).")
+    score.add_argument("--concurrency", type=int, default=8, help="Concurrent Granite calls when --batch-size 1.")
+    score.add_argument("--rate", type=float, default=0.0, help="Granite requests / second (0 = unlimited).")
+    score.add_argument("--greedy", action="store_true", help="Greedy decoding for reproducible Granite answers.")
+    score.add_argument("--no-cache", action="store_true", help="Bypass the Granite response cache.")
+    score.add_argument(
+        "--state",
+        help="Change-detection store (SQLite). Only new / changed roll numbers are re-scored; the rest carry forward.",
+    )
+    score.add_argument(
+        "--metrics",
+        help="Write stage timings / token counters at the end: .prom (Prometheus textfile) or .json.",
+    )
+    score.add_argument("--history", help="Also append every result to this Parquet history directory.")
+    score.add_argument(
+        "--aggregates",
+        default=DEFAULT_AGGREGATES_PATH,
+        help="Incremental cohort aggregates updated alongside --history.",
+    )
+    score.set_defaults(func=cmd_score)
+
+    elig = sub.add_parser("eligibility", help="Attendance eligibility (≥75 / 65–75 / <65) for a whole college.")
+    elig.add_argument("input", help="CSV with attendance_percent or attended_<subject>/conducted_<subject> columns.")
+    elig.add_argument("--out", required=True, help="Output CSV path.")
+    elig.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    elig.set_defaults(func=cmd_eligibility)
+
+    hist = sub.add_parser("history", help="Query or compact the Parquet analytics history.")
+    hist.add_argument("--root", default=DEFAULT_HISTORY_DIR, help="History directory.")
+    hist.add_argument("--roll", help="One student's history (all tasks unless --task).")
+    hist.add_argument("--task", choices=sorted(TASK_COLUMNS))
+    hist.add_argument("--semester", type=int, nargs="+", help="Cohort slice: only these semesters.")
+    hist.add_argument("--out", help="Write matching rows to this CSV instead of printing.")
+    hist.add_argument("--compact", action="store_true", help="Merge each partition's files into one sorted file.")
+    hist.set_defaults(func=cmd_history)
+
+    trend = sub.add_parser("trends", help="Per-student semester trends or cohort rolling aggregates.")
+    trend.add_argument("--root", default=DEFAULT_HISTORY_DIR, help="History directory (per-student trends).")
+    trend.add_argument("--aggregates", default=DEFAULT_AGGREGATES_PATH, help="Cohort aggregates store.")
+    trend.add_argument("--roll", help="Show this student's trend and early warnings.")
+    trend.add_argument("--task", choices=sorted(TASK_COLUMNS))
+    trend.add_argument("--metric", nargs="+", help="Cohort metrics for the rolling mean (default: first tracked field).")
+    trend.add_argument("--window", type=int, default=3, help="Rolling window in semesters.")
+    trend.set_defaults(func=cmd_trends)
+
+    router = sub.add_parser("router", help="Train / evaluate the local models that decide when to call Granite.")
+    router.add_argument("action", choices=["train", "report"])
+    router.add_argument("--root", default=DEFAULT_HISTORY_DIR, help="History directory with Granite-scored records.")
+    router.add_argument("--dir", default=DEFAULT_ROUTER_DIR, help="Where the trained routers are stored.")
+    router.add_argument("--task", choices=sorted(TASK_COLUMNS), nargs="+", help="Tasks to train (default: all).")
+    router.add_argument(
+        "--target-accuracy",
+        type=float,
+        default=DEFAULT_TARGET_ACCURACY,
+        help="Minimum held-out agreement with Granite for profiles answered locally.",
+    )
+    router.set_defaults(func=cmd_router)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,26 +13,39 @@ Version v4 (Attendance Rules Edition):
 
 import os
 import json
+import uuid
 from typing import Tuple, Optional, Dict, Any
-from io import BytesIO
 
+import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
 
-# IBM watsonx.ai Granite imports
-from ibm_watsonx_ai import Credentials
-from ibm_watsonx_ai.foundation_models import ModelInference
-from ibm_watsonx_ai.foundation_models.schema import (
-    TextGenParameters,
-    TextGenDecodingMethod,
+# IBM watsonx.ai Granite client
+import granite_client
+from granite_client import GRANITE_TASKS, GraniteSettings
+from granite_batch import DEFAULT_BATCH_SIZE
+from granite_executor import DEFAULT_MAX_CONCURRENCY
+from metrics import METRICS, span
+
+# Local scoring, attendance rules + PDF generation
+from cohort_scoring import EXAM_SUMMARY_SUFFIX, TASK_COLUMNS, score_cohort, score_profile
+from cohort_ingest import coerce_chunk
+from attendance_rules import attendance_status
+from report_pdf import build_report_pdf
+from report_store import ReportStore
+from history_store import HistoryStore, history_record
+from trends import CohortAggregates, student_trend_report
+from cohort_overview import CohortCube, build_cohort_cube, content_hash, read_cohort_bytes, slice_cube
+from student_similarity import SimilarityIndex
+from local_router import LOCAL_ROUTER_MODEL_ID, HybridRouter
+from background_refine import (
+    REFINE_FAST_PATH_SECONDS,
+    REFINE_POLL_SECONDS,
+    RefinementJob,
+    RefinementPool,
+    profile_fingerprint,
 )
 
-# PDF generation
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-from reportlab.lib import colors
-
 # Load .env if present
 load_dotenv()
 
@@ -66,12 +79,6 @@ st.markdown(
 )
 
 
-
-if "reports" not in st.session_state:
-    st.session_state["reports"] = {}
-if "last_pdf" not in st.session_state:
-    st.session_state["last_pdf"] = None
-
 # ------------------
 # Global Styling
 # ------------------
@@ -292,43 +299,6 @@ st.markdown(
 # --------------
 # Helper: Attendance rules (JNTUH style)
 # --------------
-def attendance_status(att_percent: Optional[float]) -> Optional[Tuple[str, str, str]]:
-    """
-    Returns (label, message, severity) for attendance rules.
-    severity: 'success' | 'warning' | 'error'
-    """
-    if att_percent is None:
-        return None
-    try:
-        a = float(att_percent)
-    except Exception:
-        return None
-
-    if a >= 75:
-        label = "Eligible for SEE (No condonation required)"
-        msg = (
-            "Attendance is **≥ 75%** in aggregate. Student is eligible to appear for the "
-            "Semester End Examinations (SEE) without condonation, as per attendance rules."
-        )
-        return label, msg, "success"
-    elif 65 <= a < 75:
-        label = "Shortage 65–75%: Condonation Possible"
-        msg = (
-            "Attendance is between **65% and 75%**. Student is **not automatically eligible** for SEE. "
-            "Shortage of attendance can be condoned by the College Academic Committee on genuine grounds "
-            "with supporting evidence, on payment of the prescribed condonation fee (e.g., Rs. 300/-)."
-        )
-        return label, msg, "warning"
-    else:
-        label = "Below 65%: Detention (Not Eligible for SEE)"
-        msg = (
-            "Attendance is **below 65%** in aggregate. Shortage **cannot be condoned**. "
-            "Student is not eligible to take the end examinations for this semester and is liable for detention "
-            "with re-registration required in a later semester."
-        )
-        return label, msg, "error"
-
-
 def show_attendance_rule_block(title: str, att_percent: Optional[float]):
     status = attendance_status(att_percent)
     if not status:
@@ -441,6 +411,60 @@ demo_mode = st.sidebar.checkbox(
     help="Turn this ON for offline demo (no API calls).",
 )
 os.environ["DEMO_MODE"] = "True" if demo_mode else "False"
+greedy_decoding = st.sidebar.checkbox(
+    "Greedy decoding (reproducible answers)",
+    value=False,
+    help="Use greedy decoding instead of sampling, so identical profiles always get the same (cacheable) answer.",
+)
+stream_granite = st.sidebar.checkbox(
+    "Stream Granite output (stop at first complete JSON)",
+    value=True,
+    help="Parse the answer while it streams and stop generation once the result object is complete.",
+)
+use_granite_cache = st.sidebar.checkbox(
+    "Cache Granite responses",
+    value=True,
+    help="Reuse stored answers for identical task + profile + model settings instead of calling watsonx.ai again.",
+)
+hybrid_routing = st.sidebar.checkbox(
+    "Hybrid routing (answer clear-cut profiles locally)",
+    value=os.getenv("HYBRID_ROUTING", "True") == "True",
+    help="A local model trained on past Granite results answers profiles it is confident about; the rest go to Granite. "
+    "Train it with `python analytics_cli.py router train`.",
+)
+progressive_refinement = st.sidebar.checkbox(
+    "Progressive results (instant estimate, Granite refines in background)",
+    value=os.getenv("PROGRESSIVE_REFINEMENT", "True") == "True",
+    help="Show the local rule-based result immediately and swap in Granite's answer when it arrives. "
+    "Submitting new inputs cancels a refinement still in flight.",
+)
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("🚦 Cohort Runs")
+granite_max_concurrency = st.sidebar.number_input(
+    "Max concurrent Granite calls",
+    1,
+    64,
+    DEFAULT_MAX_CONCURRENCY,
+    help="Upper bound on in-flight watsonx.ai requests during cohort scoring.",
+)
+granite_rate_limit = st.sidebar.number_input(
+    "Granite requests / second",
+    0.0,
+    50.0,
+    4.0,
+    0.5,
+    help="Token-bucket rate limit shared by all workers (0 = unlimited).",
+)
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("⏱️ Performance")
+perf_auto_refresh = st.sidebar.toggle(
+    "Auto-refresh timings",
+    value=False,
+    help="Re-render the timings every few seconds. Off by default so idle sessions do no work.",
+)
+perf_summary = st.sidebar.empty()  # filled at the end of the run; refreshed by its fragment
 
 st.sidebar.markdown("---")
 st.sidebar.caption(
@@ -449,112 +473,72 @@ st.sidebar.caption(
 )
 
 
+def granite_settings() -> GraniteSettings:
+    return GraniteSettings(
+        api_key=watsonx_api_key,
+        url=watsonx_url,
+        project_id=watsonx_project_id,
+        model_id=granite_model_id,
+        demo_mode=demo_mode,
+        greedy=greedy_decoding,
+        stream=stream_granite,
+        use_cache=use_granite_cache,
+        token=os.getenv("WATSONX_TOKEN", ""),
+    )
+
+
+if use_granite_cache:
+    _cache_stats = granite_client.get_granite_cache().stats()
+    st.sidebar.caption(
+        f"Granite cache: {_cache_stats['hits']} hits / {_cache_stats['misses']} misses · "
+        f"{_cache_stats['entries']} entries ({_cache_stats['bytes'] / 1024:.0f} KB)"
+    )
+
+
 @st.cache_resource(show_spinner=False)
-def get_granite_model(
-    api_key: str,
-    url: str,
-    project_id: str,
-    model_id: str,
-) -> Tuple[Optional[ModelInference], Optional[str]]:
-    if not api_key or not url or not project_id:
-        return None, "Missing WATSONX_APIKEY, WATSONX_URL, or WATSONX_PROJECT_ID."
-    try:
-        creds = Credentials(api_key=api_key, url=url)
-        params = TextGenParameters(
-            decoding_method=TextGenDecodingMethod.SAMPLE,
-            temperature=0.25,
-            top_p=0.9,
-            max_new_tokens=512,
-        )
-        model = ModelInference(
-            model_id=model_id,
-            params=params,
-            credentials=creds,
-            project_id=project_id,
-        )
-        return model, None
-    except Exception as e:
-        return None, f"Error creating Granite model client: {e}"
-
-
-def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
-    import json as _json
-    segments = []
-    stack = 0
-    start = None
-    for i, ch in enumerate(text):
-        if ch == "{":
-            if stack == 0:
-                start = i
-            stack += 1
-        elif ch == "}":
-            if stack > 0:
-                stack -= 1
-                if stack == 0 and start is not None:
-                    segments.append(text[start : i + 1])
-                    start = None
-    for seg in reversed(segments):
-        try:
-            return _json.loads(seg)
-        except Exception:
-            continue
-    try:
-        return _json.loads(text)
-    except Exception:
-        return None
+def get_hybrid_router() -> HybridRouter:
+    return HybridRouter()
 
 
 def call_granite_for_task(
     task_name: str,
     profile: Dict[str, Any],
     extra_instructions: str = "",
+    task_key: Optional[str] = None,
 ) -> Tuple[Optional[Dict[str, Any]], str]:
-    if demo_mode:
-        return None, "Demo mode active (local simulated logic used)."
-
-    model, err = get_granite_model(
-        watsonx_api_key,
-        watsonx_url,
-        watsonx_project_id,
-        granite_model_id,
-    )
-    if err:
-        return None, err
+    if hybrid_routing and task_key:
+        return get_hybrid_router().call(granite_settings(), task_key, profile)
+    return granite_client.call_granite_for_task(granite_settings(), task_name, profile, extra_instructions)
 
-    prompt = f"""
-You are an academic analytics assistant helping college faculty make data-driven decisions.
 
-TASK: {task_name}
-
-STUDENT PROFILE (JSON):
-{json.dumps(profile, indent=2)}
-
-{extra_instructions}
-
-Return your answer as a strict JSON object using this schema:
-{{
-  "risk_level": string,
-  "predicted_score": number|null,
-  "summary": string,
-  "recommendations": [
-    "string", "string", "string"
-  ]
-}}
-
-Important: Return ONLY the JSON. No markdown.
-"""
-    try:
-        generated = model.generate_text(prompt=prompt)
-    except Exception as e:
-        return None, f"Error calling Granite model: {e}"
+def call_granite_for_batch(
+    task_key: str,
+    profiles: Dict[str, Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, Tuple[Optional[Dict[str, Any]], str]]:
+    return granite_client.call_granite_for_batch(granite_settings(), task_key, profiles, batch_size)
 
-    if not isinstance(generated, str):
-        generated = str(generated)
 
-    parsed = extract_json_from_text(generated)
-    if parsed is None:
-        return None, f"Could not parse JSON from model response. Raw output:\n\n{generated}"
-    return parsed, ""
+def call_granite_for_cohort(
+    task_key: str,
+    profiles: Dict[str, Dict[str, Any]],
+) -> Dict[str, Tuple[Optional[Dict[str, Any]], str]]:
+    """
+    Concurrent per-student Granite calls for a cohort, with a progress bar.
+    """
+    bar = st.progress(0.0, text="Scoring cohort with Granite...")
+
+    def report(done: int, total: int):
+        bar.progress(done / total if total else 1.0, text=f"Scored {done} / {total} students with Granite")
+
+    return granite_client.call_granite_for_cohort(
+        granite_settings(),
+        task_key,
+        profiles,
+        max_concurrency=int(granite_max_concurrency),
+        rate_per_sec=granite_rate_limit or None,
+        on_progress=report,
+    )
 
 
 def interpretation_box(level: str, message: str):
@@ -572,184 +556,299 @@ def interpretation_box(level: str, message: str):
     )
 
 
+def show_routing_note(result: Dict[str, Any]):
+    if result.get("routed") == "local":
+        st.caption(
+            f"⚡ Answered by the local model (confidence {result.get('confidence', 0):.0%}); Granite was not called."
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def get_report_store() -> ReportStore:
+    # One store per process, bounded in memory and written through to disk;
+    # entries are scoped to the session (report_scope) that created them.
+    return ReportStore()
+
+
+def report_scope() -> str:
+    return st.session_state.setdefault("report_scope", uuid.uuid4().hex)
+
+
+@st.cache_resource(show_spinner=False)
+def get_history_store() -> HistoryStore:
+    return HistoryStore()
+
+
+@st.cache_resource(show_spinner=False)
+def get_cohort_aggregates() -> CohortAggregates:
+    return CohortAggregates()
+
+
 def store_report(section_key: str, profile: Dict[str, Any], result: Dict[str, Any]):
-    st.session_state["reports"][section_key] = {
-        "profile": profile,
-        "result": result,
-    }
-
-
-def split_text(text: str, max_chars: int):
-    words = text.split()
-    line = []
-    for w in words:
-        if sum(len(x) for x in line) + len(line) + len(w) > max_chars:
-            yield " ".join(line)
-            line = [w]
-        else:
-            line.append(w)
-    if line:
-        yield " ".join(line)
+    get_report_store().put_section(report_scope(), student_id, student_name, section_key, profile, result)
+    if demo_mode:
+        model_id = "local-rules"
+    elif result.get("routed") == "local":
+        model_id = LOCAL_ROUTER_MODEL_ID  # never used as a Granite training label
+    else:
+        model_id = granite_model_id
+    record = history_record(student_id, section_key, profile, result, model_id, student_name=student_name)
+    get_history_store().append([record])
+    get_cohort_aggregates().ingest([record])
 
 
-def attendance_status_lines(att_percent: Optional[float]):
-    status = attendance_status(att_percent)
-    if not status:
-        return []
-    label, msg, _ = status
-    lines = [f"Attendance Eligibility: {label}"]
-    for line in split_text(msg, 100):
-        lines.append(line)
-    return lines
+def show_student_trend(task: str):
+    """
+    Semester-over-semester deltas, risk trajectory and early warnings from this student's history.
+    """
+    report = student_trend_report(get_history_store().student_history(student_id, task=task), task)
+    if report is None:
+        return
+    series = report["series"]
+    st.markdown(f"#### 📈 Semester Trend ({report['trajectory']})")
+    chart_cols = [c for c in ("cgpa", "attendance_percent", "active_backlogs") if c in series.columns]
+    st.line_chart(series.set_index("semester")[chart_cols])
+    for w in report["warnings"]:
+        st.warning(f"Semester {w['semester']}: {w['detail']}")
+
+
+@st.cache_resource(show_spinner=False)
+def get_similarity_index(task: str) -> SimilarityIndex:
+    index = SimilarityIndex(task)
+    index.start_maintenance()  # saves and IVF rebuilds happen off the request path
+    return index
+
+
+def show_similar_students(task: str, profile: Dict[str, Any], result: Dict[str, Any], k: int = 5):
+    """
+    Show the k nearest past students for this task, then add this student to the index.
+    """
+    index = get_similarity_index(task)
+    neighbours = index.nearest(profile, k=k, exclude_roll=student_id)
+    if neighbours:
+        st.markdown("#### 👥 Similar Past Students")
+        st.dataframe(
+            [
+                {
+                    "Roll No": n["roll_no"],
+                    "Level / Tier": (n["outcome"] or {}).get("risk_level"),
+                    "Score": (n["outcome"] or {}).get("predicted_score"),
+                    "Distance": n["distance"],
+                }
+                for n in neighbours
+            ],
+            hide_index=True,
+            use_container_width=True,
+        )
+    index.upsert(
+        [student_id],
+        [profile],
+        [{"risk_level": result.get("risk_level"), "predicted_score": result.get("predicted_score")}],
+    )
+
+
+@st.cache_data(show_spinner="Scoring and aggregating cohort...", max_entries=4)
+def load_cohort_cube(digest: str, filename: str, _data: bytes) -> CohortCube:
+    # Keyed by content hash only: reruns and filter changes never re-read or re-score the file.
+    return build_cohort_cube(read_cohort_bytes(_data, filename))
+
+
+def uploaded_digest(upload) -> str:
+    """
+    Content hash of an upload, computed once per uploaded file (not on every rerun).
+    """
+    digests = st.session_state.setdefault("cohort_digests", {})
+    if upload.file_id not in digests:
+        digests[upload.file_id] = content_hash(upload.getvalue())
+    return digests[upload.file_id]
 
 
 def generate_pdf(student_name: str, student_id: str) -> Optional[bytes]:
-    reports = st.session_state.get("reports", {})
+    reports = get_report_store().sections(report_scope(), student_id)
     if not reports:
         return None
+    return build_report_pdf(student_name, student_id, reports)
+
+
+def show_granite_details(result: Dict[str, Any]):
+    # Routed answers come from the local model, not Granite; label them by their source.
+    source = "Local Model" if result.get("routed") == "local" else "Granite"
+    recs = result.get("recommendations", []) or []
+    if recs:
+        st.markdown(f"#### ✅ {source} Recommendations")
+        st.markdown('<ul class="reco-list">', unsafe_allow_html=True)
+        for r in recs:
+            st.markdown(f"<li>{r}</li>", unsafe_allow_html=True)
+        st.markdown("</ul>", unsafe_allow_html=True)
+    with st.expander(f"🔎 Raw {source} JSON (technical view)", expanded=False):
+        st.code(json.dumps(result, indent=2), language="json")
+
+
+def show_dropout_result(profile: Dict[str, Any], result: Dict[str, Any]):
+    interpretation_box(result.get("risk_level", "Info"), result.get("summary", ""))
+    show_routing_note(result)
+    show_attendance_rule_block("Attendance Eligibility (Dropout Risk)", profile["attendance_percent"])
+    store_report("dropout", profile, result)
+    show_similar_students("dropout", profile, result)
+    show_student_trend("dropout")
+    show_granite_details(result)
+
+
+def show_placement_result(profile: Dict[str, Any], result: Dict[str, Any]):
+    interpretation_box(result.get("risk_level", "Unknown"), result.get("summary", ""))
+    show_routing_note(result)
+    store_report("placement", profile, result)
+    show_similar_students("placement", profile, result)
+    show_granite_details(result)
+
+
+def show_exam_result(profile: Dict[str, Any], result: Dict[str, Any]):
+    predicted_score = result.get("predicted_score", None)
+    if isinstance(predicted_score, (int, float)):
+        st.success(f"Predicted Final Exam Score (with attendance credits): {float(predicted_score):.2f} / 100")
+    interpretation_box(result.get("risk_level", "Unknown"), result.get("summary", ""))
+    show_routing_note(result)
+    show_attendance_rule_block("Attendance Eligibility (Exam)", profile["attendance_percent"])
+    store_report("exam", profile, result)
+    show_similar_students("exam", profile, result)
+    show_granite_details(result)
+
+
+# Rendering (and storing) of a Granite / routed result per tab
+RESULT_VIEWS = {
+    "dropout": show_dropout_result,
+    "placement": show_placement_result,
+    "exam": show_exam_result,
+}
+
+
+@st.cache_resource(show_spinner=False)
+def get_refinement_pool() -> RefinementPool:
+    return RefinementPool()
 
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 60
-
-    # Header band
-    c.setFillColor(colors.HexColor("#0f172a"))
-    c.rect(0, y - 40, width, 50, fill=1, stroke=0)
-    c.setFillColor(colors.white)
-
-    try:
-        logo = ImageReader("scet_logo.jpg")
-        c.drawImage(logo, 40, y - 38, width=90, height=40, preserveAspectRatio=True, mask='auto')
-    except Exception:
-        pass
-
-    c.setFont("Helvetica-Bold", 15)
-    c.drawString(150, y - 15, "")
-    c.setFont("Helvetica", 10)
-    c.drawString(150, y - 30, "Student Performance & Retention Analytics Report")
-    y -= 80
-
-    # Student info box
-    c.setFillColor(colors.HexColor("#f3f4ff"))
-    c.roundRect(30, y - 40, width - 60, 55, 10, fill=1, stroke=0)
-    c.setFillColor(colors.HexColor("#111827"))
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(40, y - 15, f"Student Name: {student_name}")
-    if student_id:
-        c.drawString(300, y - 15, f"Roll No / ID: {student_id}")
-    y -= 70
-
-    sections = [
-        ("Dropout Risk Analysis", "dropout"),
-        ("Placement Readiness", "placement"),
-        ("Exam Performance Forecast", "exam"),
-    ]
-
-    for section_label, key in sections:
-        data = reports.get(key)
-        if not data:
-            continue
-        profile = data.get("profile", {})
-        result = data.get("result", {})
-
-        if y < 140:
-            c.showPage()
-            y = height - 60
-
-        c.setFillColor(colors.HexColor("#1d4ed8"))
-        c.roundRect(30, y - 24, width - 60, 22, 8, fill=1, stroke=0)
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(40, y - 10, section_label)
-        y -= 32
-
-        c.setFont("Helvetica", 10)
-        c.setFillColor(colors.HexColor("#111827"))
-        risk_level = str(result.get("risk_level", "N/A"))
-        pred_score = result.get("predicted_score", None)
-        c.drawString(40, y, f"Level / Tier: {risk_level}")
-        y -= 14
-        if pred_score is not None:
-            c.drawString(40, y, f"Score / Prediction: {pred_score}")
-            y -= 16
-
-        summary = str(result.get("summary", ""))
-        if summary:
-            c.setFont("Helvetica-Oblique", 9)
-            c.setFillColor(colors.HexColor("#374151"))
-            for line in split_text(summary, 95):
-                c.drawString(50, y, line)
-                y -= 12
-
-        # Attendance eligibility line (for sections that have attendance)
-        att_val = None
-        if key == "dropout":
-            att_val = profile.get("attendance_percent")
-        elif key == "exam":
-            att_val = profile.get("attendance_percent")
-        if att_val is not None:
-            lines = attendance_status_lines(att_val)
-            if lines:
-                y -= 4
-                c.setFont("Helvetica", 9)
-                c.setFillColor(colors.HexColor("#111827"))
-                for line in lines:
-                    c.drawString(50, y, line)
-                    y -= 11
-
-        recs = result.get("recommendations", []) or []
-        if recs:
-            y -= 6
-            c.setFont("Helvetica-Bold", 10)
-            c.setFillColor(colors.HexColor("#111827"))
-            c.drawString(40, y, "Recommendations:")
-            y -= 12
-            c.setFont("Helvetica", 9)
-            for rec in recs:
-                for line in split_text(rec, 90):
-                    c.drawString(50, y, f"- {line}")
-                    y -= 11
-                    if y < 80:
-                        c.showPage()
-                        y = height - 60
-                        c.setFont("Helvetica", 9)
-
-        y -= 18
-
-    c.setFont("Helvetica-Oblique", 8)
-    c.setFillColor(colors.HexColor("#6b7280"))
-    c.drawString(40, 40, "Generated using SCET Student Analytics Dashboard (IBM watsonx.ai – Granite).")
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+
+def start_refinement(task: str, profile: Dict[str, Any]):
+    """
+    Start this tab's background Granite job. A job still running for the same
+    inputs is kept; one for other inputs or another student is cancelled.
+    """
+    key = f"refine_{task}"
+    job = st.session_state.get(key)
+    if job is not None:
+        if job.fingerprint == profile_fingerprint(task, student_id, profile) and not job.cancelled and not job.done():
+            return
+        job.cancel()
+    settings = granite_settings()
+    router = get_hybrid_router() if hybrid_routing else None
+    spec = GRANITE_TASKS[task]
+
+    def refine(cancel) -> Tuple[Optional[Dict[str, Any]], str]:
+        # Runs on a worker thread: no st.* calls in here.
+        if router is not None:
+            return router.call(settings, task, profile, cancel=cancel)
+        return granite_client.call_granite_for_task(
+            settings, spec["task_name"], profile, spec["extra_instructions"], cancel=cancel
+        )
+
+    st.session_state[key] = get_refinement_pool().submit(task, student_id, profile, score_profile(task, profile), refine)
+
+
+@st.fragment(run_every=REFINE_POLL_SECONDS)
+def refinement_status(job: RefinementJob):
+    if job.done():
+        st.rerun()  # full run, so the tab renders (and stores) the refined result
+    st.info(f"⏳ Refining with Granite on watsonx.ai... {job.elapsed():.0f}s")
+    if st.button("Cancel refinement", key=f"cancel_refine_{job.task}"):
+        job.cancel()
+        st.rerun()
+
+
+def refinement_panel(task: str):
+    """
+    Progressive mode: the local estimate while Granite works in the background,
+    then the refined result, rendered and stored once.
+    """
+    key = f"refine_{task}"
+    job = st.session_state.get(key)
+    if job is None:
+        return
+    if demo_mode or not progressive_refinement or job.roll_no != student_id or job.consumed:
+        job.cancel()
+        del st.session_state[key]
+        return
+    if job.cancelled:
+        del st.session_state[key]
+        st.caption("Granite refinement cancelled; showing the local estimate.")
+        interpretation_box(job.local["risk_level"], job.local["summary"])
+        return
+    if not job.done(wait=REFINE_FAST_PATH_SECONDS):
+        st.caption("⚡ Instant estimate from the local rules. Granite is refining it in the background.")
+        interpretation_box(job.local["risk_level"], job.local["summary"])
+        refinement_status(job)
+        return
+    job.consumed = True
+    result, err = job.result()
+    with span("render", tab=task):
+        if err:
+            st.error(err)
+        else:
+            RESULT_VIEWS[task](job.profile, result)
+
+
+def analyze_with_granite(task: str, profile: Dict[str, Any], spinner_text: str):
+    """
+    Non-demo analysis: start a background refinement in progressive mode, else call Granite behind a spinner.
+    """
+    if progressive_refinement:
+        start_refinement(task, profile)
+        return
+    with st.spinner(spinner_text):
+        result, err = call_granite_for_task(
+            task_name=GRANITE_TASKS[task]["task_name"],
+            profile=profile,
+            extra_instructions=GRANITE_TASKS[task]["extra_instructions"],
+            task_key=task,
+        )
+    with span("render", tab=task):
+        if err:
+            st.error(err)
+        else:
+            RESULT_VIEWS[task](profile, result)
 
 
 # ---------------
 # MAIN TABS
 # ---------------
-tab1, tab2, tab3 = st.tabs(["🧍 Dropout Risk", "💼 Placement Readiness", "✍️ Exam Forecast"])
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["🧍 Dropout Risk", "💼 Placement Readiness", "✍️ Exam Forecast", "📊 Cohort Overview"]
+)
 
-with tab1:
+
+@st.fragment
+def dropout_tab():
+    """
+    Runs as a fragment: submitting this tab's form re-executes only this tab.
+    """
     st.markdown('<div class="section-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">🧍 Student Dropout Predictor</div>', unsafe_allow_html=True)
     st.markdown(
         '<div class="section-sub">Identify at-risk students 1–2 semesters in advance and schedule interventions.</div>',
         unsafe_allow_html=True,
     )
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        cgpa = st.number_input("Current CGPA", 0.0, 10.0, 7.0, 0.1, key="drop_cgpa")
-        attendance = st.slider("Attendance (%)", 0, 100, 80, key="drop_att")
-    with c2:
-        assignments = st.slider("Avg Assignment Score (%)", 0, 100, 75, key="drop_assign")
-        warnings = st.number_input("Number of Academic Warnings", 0, 10, 0, key="drop_warn")
-    with c3:
-        sem = st.selectbox("Current Semester", list(range(1, 9)), key="drop_sem")
-        backlog = st.number_input("Active Backlogs", 0, 15, 0, key="drop_backlog")
-
-    if st.button("🔍 Analyze Dropout Risk", key="btn_dropout"):
+    with st.form("dropout_form", border=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            cgpa = st.number_input("Current CGPA", 0.0, 10.0, 7.0, 0.1, key="drop_cgpa")
+            attendance = st.slider("Attendance (%)", 0, 100, 80, key="drop_att")
+        with c2:
+            assignments = st.slider("Avg Assignment Score (%)", 0, 100, 75, key="drop_assign")
+            warnings = st.number_input("Number of Academic Warnings", 0, 10, 0, key="drop_warn")
+        with c3:
+            sem = st.selectbox("Current Semester", list(range(1, 9)), key="drop_sem")
+            backlog = st.number_input("Active Backlogs", 0, 15, 0, key="drop_backlog")
+        submitted = st.form_submit_button("🔍 Analyze Dropout Risk")
+
+    if submitted:
         if ensure_student_info():
             profile = {
                 "cgpa": cgpa,
@@ -760,82 +859,48 @@ with tab1:
                 "active_backlogs": backlog,
             }
             if demo_mode:
-                risk_score = 0
-                if cgpa < 6: risk_score += 1
-                if attendance < 75: risk_score += 1
-                if assignments < 60: risk_score += 1
-                if warnings >= 2: risk_score += 1
-                if backlog >= 2: risk_score += 1
-                if risk_score >= 4:
-                    level = "High"
-                    msg = "Student appears at very high risk of dropout based on academics & engagement indicators."
-                elif risk_score >= 2:
-                    level = "Medium"
-                    msg = "Student is at moderate risk. Timely mentoring and follow-up can prevent escalation."
-                else:
-                    level = "Low"
-                    msg = "Student currently appears low risk, but should still be monitored periodically."
-                result = {
-                    "risk_level": level,
-                    "predicted_score": risk_score,
-                    "summary": msg,
-                    "recommendations": [
-                        "Schedule a 1:1 mentoring or counselling session.",
-                        "Share a personalized study roadmap and upcoming assessments.",
-                        "Monitor attendance and assignment submissions for the next few weeks.",
-                    ],
-                }
-                interpretation_box(level, msg)
-                show_attendance_rule_block("Attendance Eligibility (Dropout Risk)", attendance)
-                store_report("dropout", profile, result)
-            else:
-                with st.spinner("Calling Granite on watsonx.ai for dropout risk analysis..."):
-                    result, err = call_granite_for_task(
-                        task_name="Student Dropout Risk Prediction",
-                        profile=profile,
-                        extra_instructions=(
-                            "Assess how likely this student is to drop out in the next 1–2 semesters. "
-                            "Use 'High', 'Medium', or 'Low' in risk_level."
-                        ),
-                    )
-                if err:
-                    st.error(err)
-                else:
-                    level = result.get("risk_level", "Info")
-                    summary = result.get("summary", "")
-                    interpretation_box(level, summary)
+                result = score_profile("dropout", profile)
+                with span("render", tab="dropout"):
+                    level, msg = result["risk_level"], result["summary"]
+                    interpretation_box(level, msg)
                     show_attendance_rule_block("Attendance Eligibility (Dropout Risk)", attendance)
                     store_report("dropout", profile, result)
-                    recs = result.get("recommendations", []) or []
-                    if recs:
-                        st.markdown("#### ✅ Granite Recommendations")
-                        st.markdown('<ul class="reco-list">', unsafe_allow_html=True)
-                        for r in recs:
-                            st.markdown(f"<li>{r}</li>", unsafe_allow_html=True)
-                        st.markdown("</ul>", unsafe_allow_html=True)
-                    with st.expander("🔎 Raw Granite JSON (technical view)", expanded=False):
-                        st.code(json.dumps(result, indent=2), language="json")
+                    show_similar_students("dropout", profile, result)
+                    show_student_trend("dropout")
+            else:
+                analyze_with_granite("dropout", profile, "Calling Granite on watsonx.ai for dropout risk analysis...")
+    refinement_panel("dropout")
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab2:
+with tab1:
+    dropout_tab()
+
+
+@st.fragment
+def placement_tab():
+    """
+    Runs as a fragment: submitting this tab's form re-executes only this tab.
+    """
     st.markdown('<div class="section-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">💼 Placement Success Analyzer</div>', unsafe_allow_html=True)
     st.markdown(
         '<div class="section-sub">Estimate which company tier the student is currently ready for (Tier-1 / Tier-2 / Tier-3).</div>',
         unsafe_allow_html=True,
     )
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        cgpa_p = st.number_input("CGPA", 0.0, 10.0, 7.5, 0.1, key="place_cgpa")
-        num_intern = st.number_input("Number of Internships", 0, 10, 1, key="place_intern")
-    with c2:
-        projects = st.number_input("Number of Major Projects", 0, 10, 2, key="place_projects")
-        hackathons = st.number_input("Hackathons / Competitions", 0, 20, 1, key="place_hacks")
-    with c3:
-        comm_skill = st.slider("Communication Skill (1-10)", 1, 10, 7, key="place_comm")
-        tech_skill = st.slider("Technical Skill (1-10)", 1, 10, 8, key="place_tech")
-
-    if st.button("📌 Analyze Placement Readiness", key="btn_placement"):
+    with st.form("placement_form", border=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            cgpa_p = st.number_input("CGPA", 0.0, 10.0, 7.5, 0.1, key="place_cgpa")
+            num_intern = st.number_input("Number of Internships", 0, 10, 1, key="place_intern")
+        with c2:
+            projects = st.number_input("Number of Major Projects", 0, 10, 2, key="place_projects")
+            hackathons = st.number_input("Hackathons / Competitions", 0, 20, 1, key="place_hacks")
+        with c3:
+            comm_skill = st.slider("Communication Skill (1-10)", 1, 10, 7, key="place_comm")
+            tech_skill = st.slider("Technical Skill (1-10)", 1, 10, 8, key="place_tech")
+        submitted = st.form_submit_button("📌 Analyze Placement Readiness")
+
+    if submitted:
         if ensure_student_info():
             profile = {
                 "cgpa": cgpa_p,
@@ -846,82 +911,49 @@ with tab2:
                 "technical_skill_1_10": tech_skill,
             }
             if demo_mode:
-                score = (cgpa_p / 10) * 0.4 + (tech_skill / 10) * 0.3 + (comm_skill / 10) * 0.2
-                score += min(num_intern, 3) * 0.03 + min(projects, 3) * 0.02
-                if score >= 0.8:
-                    level = "Tier-1"
-                    msg = "Strong profile suitable for Tier-1 / Product companies."
-                elif score >= 0.6:
-                    level = "Tier-2"
-                    msg = "Good profile for Tier-2 companies; can push towards Tier-1 with focused prep."
-                elif score >= 0.4:
-                    level = "Tier-3"
-                    msg = "Currently aligned with Tier-3 / service companies; needs improvement for higher tiers."
-                else:
-                    level = "Not ready"
-                    msg = "Placement readiness appears low; intensive training and real-world projects recommended."
-                result = {
-                    "risk_level": level,
-                    "predicted_score": round(score, 2),
-                    "summary": msg,
-                    "recommendations": [
-                        "Encourage participation in contests, hackathons, and technical clubs.",
-                        "Recommend building standout portfolio projects (GitHub + live demos).",
-                        "Organize mock interviews focusing on problem solving and communication.",
-                    ],
-                }
-                interpretation_box(level, msg)
-                store_report("placement", profile, result)
-            else:
-                with st.spinner("Calling Granite on watsonx.ai for placement analysis..."):
-                    result, err = call_granite_for_task(
-                        task_name="Placement Success & Company Tier Analysis",
-                        profile=profile,
-                        extra_instructions=(
-                            "Based on this profile, estimate the most likely placement outcome. "
-                            "Use 'Tier-1', 'Tier-2', 'Tier-3', or 'Not ready' in risk_level."
-                        ),
-                    )
-                if err:
-                    st.error(err)
-                else:
-                    level = result.get("risk_level", "Unknown")
-                    summary = result.get("summary", "")
-                    interpretation_box(level, summary)
+                result = score_profile("placement", profile)
+                with span("render", tab="placement"):
+                    level, msg = result["risk_level"], result["summary"]
+                    interpretation_box(level, msg)
                     store_report("placement", profile, result)
-                    recs = result.get("recommendations", []) or []
-                    if recs:
-                        st.markdown("#### ✅ Granite Recommendations")
-                        st.markdown('<ul class="reco-list">', unsafe_allow_html=True)
-                        for r in recs:
-                            st.markdown(f"<li>{r}</li>", unsafe_allow_html=True)
-                        st.markmarkdown("</ul>", unsafe_allow_html=True)
-                    with st.expander("🔎 Raw Granite JSON (technical view)", expanded=False):
-                        st.code(json.dumps(result, indent=2), language="json")
+                    show_similar_students("placement", profile, result)
+            else:
+                analyze_with_granite("placement", profile, "Calling Granite on watsonx.ai for placement analysis...")
+    refinement_panel("placement")
     st.markdown('</div>', unsafe_allow_html=True)
 
-with tab3:
+with tab2:
+    placement_tab()
+
+
+@st.fragment
+def exam_tab():
+    """
+    Runs as a fragment: submitting this tab's form re-executes only this tab.
+    """
     st.markdown('<div class="section-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">✍️ Exam Performance Forecaster</div>', unsafe_allow_html=True)
     st.markdown(
         '<div class="section-sub">Forecast final exam score and identify students who are likely to fail, including attendance-based credits.</div>',
         unsafe_allow_html=True,
     )
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        ia1 = st.slider("Internal Test 1 (%)", 0, 100, 65, key="exam_ia1")
-        ia2 = st.slider("Internal Test 2 (%)", 0, 100, 70, key="exam_ia2")
-    with c2:
-        quiz = st.slider("Quiz / Online Test Avg (%)", 0, 100, 75, key="exam_quiz")
-        attendance_e = st.slider("Attendance (%)", 0, 100, 85, key="exam_att")
-    with c3:
-        lab_perf = st.slider("Lab Performance (%)", 0, 100, 80, key="exam_lab")
-        attendance_credit = st.number_input(
-            "Attendance Credits (marks)", 0.0, 10.0, 2.0, 0.5, key="exam_att_credit"
-        )
-        engagement = st.slider("Class Engagement (1-10)", 1, 10, 7, key="exam_eng")
-
-    if st.button("📈 Forecast Final Exam Score", key="btn_exam"):
+    with st.form("exam_form", border=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            ia1 = st.slider("Internal Test 1 (%)", 0, 100, 65, key="exam_ia1")
+            ia2 = st.slider("Internal Test 2 (%)", 0, 100, 70, key="exam_ia2")
+        with c2:
+            quiz = st.slider("Quiz / Online Test Avg (%)", 0, 100, 75, key="exam_quiz")
+            attendance_e = st.slider("Attendance (%)", 0, 100, 85, key="exam_att")
+        with c3:
+            lab_perf = st.slider("Lab Performance (%)", 0, 100, 80, key="exam_lab")
+            attendance_credit = st.number_input(
+                "Attendance Credits (marks)", 0.0, 10.0, 2.0, 0.5, key="exam_att_credit"
+            )
+            engagement = st.slider("Class Engagement (1-10)", 1, 10, 7, key="exam_eng")
+        submitted = st.form_submit_button("📈 Forecast Final Exam Score")
+
+    if submitted:
         if ensure_student_info():
             profile = {
                 "internal_test_1_percent": ia1,
@@ -933,95 +965,217 @@ with tab3:
                 "class_engagement_1_10": engagement,
             }
             if demo_mode:
-                core = (ia1 + ia2 + quiz + lab_perf) / 4
-                pred = 0.65 * core + 0.15 * attendance_e + 1.2 * (engagement * 1.5)
-                pred += attendance_credit * 1.5  # attendance credit-based boost
-                pred = max(0, min(100, pred))
-                if pred < 40:
-                    level = "High"
-                    msg = "Student at high risk of failing. Strong remedial support is needed."
-                elif pred < 60:
-                    level = "Medium"
-                    msg = "Borderline performance. Extra coaching and continuous assessment will help."
-                else:
-                    level = "Low"
-                    msg = "Likely to pass comfortably. Encourage attempting higher-order questions."
-                result = {
-                    "risk_level": level,
-                    "predicted_score": round(pred, 2),
-                    "summary": msg + " Attendance credits have been factored into this prediction.",
-                    "recommendations": [
-                        "Provide topic-wise revision schedules and quizzes.",
-                        "Conduct weekly mini-tests to track concept mastery.",
-                        "Ensure attendance credits are transparently communicated to the student.",
-                    ],
-                }
-                if isinstance(pred, (int, float)):
-                    st.success(f"Predicted Final Exam Score (with attendance credits): {float(pred):.2f} / 100")
-                interpretation_box(level, msg)
-                show_attendance_rule_block("Attendance Eligibility (Exam)", attendance_e)
-                store_report("exam", profile, result)
-            else:
-                with st.spinner("Calling Granite on watsonx.ai for exam performance forecast..."):
-                    result, err = call_granite_for_task(
-                        task_name="Final Exam Score Forecasting (with Attendance Credits)",
-                        profile=profile,
-                        extra_instructions=(
-                            "Predict an approximate final exam score out of 100 for this student. "
-                            "Consider internal tests, quizzes, lab performance, overall attendance_percent, "
-                            "and attendance_credits (marks awarded for high attendance). "
-                            "Put the numeric value (0–100) in predicted_score. "
-                            "In risk_level, use 'High', 'Medium', or 'Low' to indicate RISK OF FAILING."
-                        ),
-                    )
-                if err:
-                    st.error(err)
-                else:
-                    predicted_score = result.get("predicted_score", None)
-                    level = result.get("risk_level", "Unknown")
-                    summary = result.get("summary", "")
-                    if isinstance(predicted_score, (int, float)):
-                        st.success(f"Predicted Final Exam Score (with attendance credits): {float(predicted_score):.2f} / 100")
-                    interpretation_box(level, summary)
+                result = score_profile("exam", profile)
+                with span("render", tab="exam"):
+                    level, pred = result["risk_level"], result["predicted_score"]
+                    msg = result["summary"][: -len(EXAM_SUMMARY_SUFFIX)]
+                    if isinstance(pred, (int, float)):
+                        st.success(f"Predicted Final Exam Score (with attendance credits): {float(pred):.2f} / 100")
+                    interpretation_box(level, msg)
                     show_attendance_rule_block("Attendance Eligibility (Exam)", attendance_e)
                     store_report("exam", profile, result)
-                    recs = result.get("recommendations", []) or []
-                    if recs:
-                        st.markdown("#### ✅ Granite Recommendations")
-                        st.markdown('<ul class="reco-list">', unsafe_allow_html=True)
-                        for r in recs:
-                            st.markdown(f"<li>{r}</li>", unsafe_allow_html=True)
-                        st.markdown("</ul>", unsafe_allow_html=True)
-                    with st.expander("🔎 Raw Granite JSON (technical view)", expanded=False):
-                        st.code(json.dumps(result, indent=2), language="json")
+                    show_similar_students("exam", profile, result)
+            else:
+                analyze_with_granite("exam", profile, "Calling Granite on watsonx.ai for exam performance forecast...")
+    refinement_panel("exam")
+    st.markdown('</div>', unsafe_allow_html=True)
+
+with tab3:
+    exam_tab()
+
+
+def cohort_granite_run(upload, cube: CohortCube):
+    """
+    Score the uploaded cohort with Granite (concurrent single calls using the sidebar
+    concurrency / rate limit with live progress, or batched prompts) and compare
+    with the local rules. Task choices and row count come from the cached cube;
+    the file itself is only parsed when a run is started.
+    """
+    with st.expander("🚦 Granite cohort run", expanded=False):
+        scored_tasks = set(cube.levels["task"])
+        tasks = [t for t in TASK_COLUMNS if t in scored_tasks]
+        if not tasks:
+            st.info("The file has no complete column set for any task.")
+            return
+        r1, r2, r3 = st.columns(3)
+        with r1:
+            task = st.selectbox("Task", tasks, key="cohort_run_task")
+        with r2:
+            limit = st.number_input(
+                "Max students", 1, max(1, cube.students), min(cube.students, 200), key="cohort_run_limit"
+            )
+        with r3:
+            batch_size = st.number_input(
+                "Students per prompt",
+                1,
+                50,
+                1,
+                key="cohort_run_batch",
+                help="1 = one concurrent call per student (live progress); more = batched multi-student prompts.",
+            )
+        if demo_mode:
+            st.caption("Turn Demo Mode off to score the cohort with Granite.")
+        elif st.button("Score cohort with Granite", key="cohort_run_go"):
+            frame = read_cohort_bytes(upload.getvalue(), upload.name)
+            chunk = coerce_chunk(task, frame.head(int(limit)))
+            rolls = (
+                chunk.frame["roll_no"].astype(str).tolist() if "roll_no" in chunk.frame.columns
+                else [str(i) for i in chunk.frame.index]
+            )
+            profiles = dict(zip(rolls, chunk.frame[TASK_COLUMNS[task]].to_dict("records")))
+            if batch_size > 1:
+                with st.spinner(f"Scoring {len(profiles)} students with Granite in batches of {int(batch_size)}..."):
+                    results = call_granite_for_batch(task, profiles, batch_size=int(batch_size))
+            else:
+                results = call_granite_for_cohort(task, profiles)
+            local = score_cohort(task, chunk.frame)
+            st.session_state["cohort_run"] = uploaded_digest(upload), pd.DataFrame(
+                {
+                    "roll_no": rolls,
+                    "local_level": local["risk_level"].tolist(),
+                    "granite_level": [(results[r][0] or {}).get("risk_level") for r in rolls],
+                    "granite_score": [(results[r][0] or {}).get("predicted_score") for r in rolls],
+                    "granite_error": [results[r][1] or None for r in rolls],
+                }
+            )
+        digest, run = st.session_state.get("cohort_run", (None, None))
+        if run is not None and digest == uploaded_digest(upload):
+            ok = run["granite_error"].isna()
+            agree = (run.loc[ok, "granite_level"].astype(str).str.lower() == run.loc[ok, "local_level"].str.lower()).mean()
+            st.caption(
+                f"{int(ok.sum())} / {len(run)} scored by Granite · agreement with local rules: "
+                f"{agree if ok.any() else 0:.0%}"
+            )
+            st.dataframe(run, hide_index=True, use_container_width=True)
+            st.download_button(
+                "Download results (CSV)", run.to_csv(index=False).encode("utf-8"), "granite_cohort_run.csv", "text/csv"
+            )
+
+
+@st.fragment
+def cohort_overview_tab():
+    """
+    Runs as a fragment: uploads and filter changes re-execute only this tab.
+    """
+    st.markdown('<div class="section-card">', unsafe_allow_html=True)
+    st.markdown('<div class="section-title">📊 Cohort Overview</div>', unsafe_allow_html=True)
+    st.markdown(
+        '<div class="section-sub">Upload a cohort file (CSV / Parquet, dashboard column names plus optional '
+        'department and semester) to see risk tiers, attendance bands and score distributions.</div>',
+        unsafe_allow_html=True,
+    )
+    upload = st.file_uploader("Cohort file", type=["csv", "gz", "parquet"], key="cohort_file")
+    if upload is not None:
+        cube = load_cohort_cube(uploaded_digest(upload), upload.name, upload.getvalue())
+        f1, f2 = st.columns(2)
+        with f1:
+            depts = st.multiselect("Department", cube.departments, key="cohort_depts")
+        with f2:
+            sems = st.multiselect("Semester", cube.semesters, key="cohort_sems")
+        with span("render", tab="cohort"):
+            view = slice_cube(cube, depts, sems)
+            st.caption(f"{cube.students:,} students in file · {view['students']:,} in current filter")
+            risk_cols = st.columns(max(1, len(view["risk_distribution"])))
+            for col, (task, counts) in zip(risk_cols, view["risk_distribution"].items()):
+                with col:
+                    st.markdown(f"**{task.title()} levels**")
+                    st.bar_chart(counts)
+            if len(view["attendance_bands"]):
+                st.markdown("**Attendance eligibility bands**")
+                st.bar_chart(view["attendance_bands"])
+            if len(view["placement_by_department"]):
+                p1, p2 = st.columns(2)
+                with p1:
+                    st.markdown("**Placement tiers by department**")
+                    st.dataframe(view["placement_by_department"], use_container_width=True)
+                with p2:
+                    st.markdown("**Placement tiers by semester**")
+                    st.dataframe(view["placement_by_semester"], use_container_width=True)
+            for task, hist in view["histograms"].items():
+                st.markdown(f"**{task.title()} predicted score distribution**")
+                labels = [f"{lo:.1f}–{hi:.1f}" for lo, hi in zip(hist["bin_left"], hist["bin_right"])]
+                st.bar_chart(pd.Series(hist["count"].to_numpy(), index=labels))
+        cohort_granite_run(upload, cube)
     st.markdown('</div>', unsafe_allow_html=True)
 
+with tab4:
+    cohort_overview_tab()
+
 # ---------------
 # PDF SECTION
 # ---------------
-st.markdown("----")
-pc1, pc2 = st.columns([2, 3])
-with pc1:
-    st.markdown("### 📝 Generate Student PDF Report")
-    st.write("Run one or more analyses above, then create a single attractive PDF report for this student.")
-    if st.button("📄 Generate PDF Report"):
-        if not ensure_student_info():
-            st.session_state["last_pdf"] = None
+@st.fragment
+def pdf_section():
+    """
+    Runs as a fragment: generating or downloading a report re-executes only this section.
+    """
+    st.markdown("----")
+    pc1, pc2 = st.columns([2, 3])
+    with pc1:
+        st.markdown("### 📝 Generate Student PDF Report")
+        st.write("Run one or more analyses above, then create a single attractive PDF report for this student.")
+        if st.button("📄 Generate PDF Report"):
+            if ensure_student_info():
+                pdf_bytes = generate_pdf(student_name, student_id)
+                if pdf_bytes is None:
+                    st.error("No analysis data found. Please run at least one prediction first.")
+                else:
+                    get_report_store().set_pdf(report_scope(), student_id, pdf_bytes)
+                    st.success("Report generated successfully. Use the download button on the right.")
+
+    with pc2:
+        latest_pdf = get_report_store().get_pdf(report_scope(), student_id) if student_id else None
+        if latest_pdf:
+            st.download_button(
+                label="⬇️ Download Latest Report",
+                data=latest_pdf,
+                file_name=f"{student_name or 'student'}_analytics_report.pdf",
+                mime="application/pdf",
+            )
         else:
-            pdf_bytes = generate_pdf(student_name, student_id)
-            if pdf_bytes is None:
-                st.error("No analysis data found. Please run at least one prediction first.")
-            else:
-                st.session_state["last_pdf"] = pdf_bytes
-                st.success("Report generated successfully. Use the download button on the right.")
-
-with pc2:
-    if st.session_state.get("last_pdf"):
-        st.download_button(
-            label="⬇️ Download Latest Report",
-            data=st.session_state["last_pdf"],
-            file_name=f"{student_name or 'student'}_analytics_report.pdf",
-            mime="application/pdf",
+            st.info("Once a report is generated, a download button will appear here.")
+        _store_stats = get_report_store().stats(report_scope())
+        st.caption(
+            f"Report store: {_store_stats['on_disk']} students saved this session; "
+            f"{_store_stats['in_memory']} cached in memory ({_store_stats['memory_bytes'] / 1024:.0f} KB)"
+        )
+
+
+pdf_section()
+
+
+PERF_REFRESH_SECONDS = 5.0
+
+
+def performance_summary():
+    """
+    Runs as a fragment, so timings from tab and PDF fragment reruns can be
+    refreshed (on the button, or on a timer when auto-refresh is on) without
+    a full rerun.
+    """
+    st.button("Refresh timings", key="perf_refresh")
+    summary = METRICS.summary()
+    counters = summary["counters"]
+    if summary["stages"]:
+        st.dataframe(
+            [
+                {"Stage": stage, "Count": s["count"], "Mean ms": s["mean_ms"], "p95 ms": s["p95_ms"]}
+                for stage, s in summary["stages"].items()
+            ],
+            hide_index=True,
+            use_container_width=True,
         )
     else:
-        st.info("Once a report is generated, a download button will appear here.")
+        st.caption("No timings recorded yet.")
+    st.caption(
+        f"Granite calls: {counters.get('granite_calls_total', 0):.0f} · "
+        f"tokens in/out: {counters.get('granite_input_tokens_total', 0):.0f} / "
+        f"{counters.get('granite_generated_tokens_total', 0):.0f} · "
+        f"cache hits: {counters.get('granite_cache_hits_total', 0):.0f}"
+    )
+    for task, tokens in summary["tokens_per_call"].items():
+        st.caption(f"{task}: ~{tokens['prompt']:.0f} prompt / {tokens['completion']:.0f} completion tokens per call")
+
+
+with perf_summary.container():
+    st.fragment(performance_summary, run_every=PERF_REFRESH_SECONDS if perf_auto_refresh else None)()
@@ -0,0 +1,154 @@
+"""
+JNTUH-style attendance eligibility rules.
+
+≥ 75%: eligible for SEE, 65–75%: condonation possible, < 65%: detention.
+
+attendance_status() classifies one student for the dashboard; the bulk
+helpers classify whole arrays into compact int8 codes (message text lives
+once in ATTENDANCE_RULES) and aggregate per-subject attendance matrices.
+"""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+ELIGIBLE = 0
+CONDONATION = 1
+DETENTION = 2
+UNKNOWN = -1  # missing / non-numeric attendance (bulk helpers only)
+
+ELIGIBLE_MIN = 75
+CONDONATION_MIN = 65
+
+# code -> (label, message, severity); severity: 'success' | 'warning' | 'error'
+ATTENDANCE_RULES: Dict[int, Tuple[str, str, str]] = {
+    ELIGIBLE: (
+        "Eligible for SEE (No condonation required)",
+        (
+            "Attendance is **≥ 75%** in aggregate. Student is eligible to appear for the "
+            "Semester End Examinations (SEE) without condonation, as per attendance rules."
+        ),
+        "success",
+    ),
+    CONDONATION: (
+        "Shortage 65–75%: Condonation Possible",
+        (
+            "Attendance is between **65% and 75%**. Student is **not automatically eligible** for SEE. "
+            "Shortage of attendance can be condoned by the College Academic Committee on genuine grounds "
+            "with supporting evidence, on payment of the prescribed condonation fee (e.g., Rs. 300/-)."
+        ),
+        "warning",
+    ),
+    DETENTION: (
+        "Below 65%: Detention (Not Eligible for SEE)",
+        (
+            "Attendance is **below 65%** in aggregate. Shortage **cannot be condoned**. "
+            "Student is not eligible to take the end examinations for this semester and is liable for detention "
+            "with re-registration required in a later semester."
+        ),
+        "error",
+    ),
+}
+
+CODE_NAMES: Dict[int, str] = {
+    ELIGIBLE: "eligible",
+    CONDONATION: "condonation",
+    DETENTION: "detention",
+    UNKNOWN: "unknown",
+}
+
+
+def attendance_code(att_percent: Optional[float]) -> Optional[int]:
+    """
+    Band code for one student, or None if the value isn't a number.
+    """
+    if att_percent is None:
+        return None
+    try:
+        a = float(att_percent)
+    except Exception:
+        return None
+
+    if a >= ELIGIBLE_MIN:
+        return ELIGIBLE
+    elif CONDONATION_MIN <= a < ELIGIBLE_MIN:
+        return CONDONATION
+    else:
+        return DETENTION
+
+
+def attendance_status(att_percent: Optional[float]) -> Optional[Tuple[str, str, str]]:
+    """
+    Returns (label, message, severity) for attendance rules.
+    severity: 'success' | 'warning' | 'error'
+    """
+    code = attendance_code(att_percent)
+    if code is None:
+        return None
+    return ATTENDANCE_RULES[code]
+
+
+# --------------
+# Bulk helpers
+# --------------
+def classify_attendance(att_percent) -> np.ndarray:
+    """
+    Vectorized band codes (int8) for an array of aggregate percentages.
+    NaN becomes UNKNOWN rather than detention.
+    """
+    a = np.asarray(att_percent, dtype=np.float64)
+    codes = np.select([a >= ELIGIBLE_MIN, a >= CONDONATION_MIN], [ELIGIBLE, CONDONATION], default=DETENTION)
+    codes = codes.astype(np.int8)
+    codes[np.isnan(a)] = UNKNOWN
+    return codes
+
+
+def aggregate_attendance_counts(attended, conducted) -> np.ndarray:
+    """
+    Aggregate % per student from students × subjects matrices of classes
+    attended and classes conducted (the JNTUH aggregate: total attended /
+    total conducted). NaN cells are ignored; students with no classes get NaN.
+    """
+    att = np.asarray(attended, dtype=np.float64)
+    con = np.asarray(conducted, dtype=np.float64)
+    if att.shape != con.shape:
+        raise ValueError(f"attended {att.shape} and conducted {con.shape} must have the same shape")
+    total_con = np.nansum(con, axis=1)
+    total_att = np.nansum(np.where(np.isnan(con), np.nan, att), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = np.where(total_con > 0, total_att / total_con * 100.0, np.nan)
+    return pct
+
+
+def aggregate_attendance_percent(percent, classes_per_subject=None) -> np.ndarray:
+    """
+    Aggregate % per student from a students × subjects matrix of per-subject
+    percentages, weighted by classes conducted per subject when given
+    (a 1-D array per subject, or a matrix the same shape as percent).
+    """
+    pct = np.asarray(percent, dtype=np.float64)
+    if classes_per_subject is None:
+        weights = np.ones_like(pct)
+    else:
+        weights = np.broadcast_to(np.asarray(classes_per_subject, dtype=np.float64), pct.shape)
+    weights = np.where(np.isnan(pct), 0.0, weights)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.nansum(pct * weights, axis=1) / weights.sum(axis=1)
+
+
+def eligibility_counts(codes: np.ndarray) -> Dict[str, int]:
+    """
+    Students per band, e.g. {"eligible": 812, "condonation": 97, "detention": 41, "unknown": 0}.
+    """
+    codes = np.asarray(codes)
+    return {name: int(np.count_nonzero(codes == code)) for code, name in CODE_NAMES.items()}
+
+
+def eligibility_table(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (labels, severities) arrays for codes, looked up from ATTENDANCE_RULES.
+    """
+    labels = np.array(["Attendance not available"] + [ATTENDANCE_RULES[c][0] for c in (0, 1, 2)], dtype=object)
+    severities = np.array(["info"] + [ATTENDANCE_RULES[c][2] for c in (0, 1, 2)], dtype=object)
+    idx = np.asarray(codes, dtype=np.int64) + 1
+    return labels[idx], severities[idx]
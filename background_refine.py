@@ -0,0 +1,111 @@
+"""
+Background Granite refinement for the dashboard's progressive mode.
+
+A tab shows the local rule-based estimate at once and hands the Granite call
+to a shared worker pool; the page polls the job and swaps in the refined
+result when it lands. Every job carries a cancel event that is passed down to
+call_granite_for_task: when the inputs or the student change, a queued job
+never starts and a streaming one stops reading tokens and closes its stream.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from granite_client import CANCELLED_MESSAGE, GraniteResult
+from metrics import inc
+
+DEFAULT_REFINE_WORKERS = 4
+REFINE_POLL_SECONDS = 1.0  # how often a page checks a pending job
+REFINE_FAST_PATH_SECONDS = 0.05  # cache hits / local routes finish within this, so no poll round
+
+
+def profile_fingerprint(task: str, roll_no: str, profile: Dict[str, Any]) -> str:
+    payload = json.dumps([task, str(roll_no).strip().upper(), profile], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RefinementJob:
+    def __init__(
+        self,
+        task: str,
+        roll_no: str,
+        profile: Dict[str, Any],
+        local: Dict[str, Any],
+        future: Future,
+        cancel_event: threading.Event,
+    ):
+        self.task = task
+        self.roll_no = roll_no
+        self.profile = profile
+        self.local = local
+        self.fingerprint = profile_fingerprint(task, roll_no, profile)
+        self.future = future
+        self.cancel_event = cancel_event
+        self.started = time.monotonic()
+        self.consumed = False  # the refined result has been rendered and stored
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def done(self, wait: float = 0.0) -> bool:
+        """
+        True once the Granite result (or error) is in; optionally wait up to `wait` seconds.
+        """
+        if wait > 0 and not self.future.done():
+            try:
+                self.future.result(timeout=wait)
+            except Exception:
+                pass  # timeout, or an error that result() reports
+        return self.future.done()
+
+    def result(self) -> GraniteResult:
+        if self.cancelled:
+            return None, CANCELLED_MESSAGE
+        try:
+            return self.future.result()
+        except CancelledError:
+            return None, CANCELLED_MESSAGE
+        except Exception as e:
+            return None, f"Error calling Granite model: {e}"
+
+    def cancel(self):
+        if not self.cancelled and not self.future.done():
+            inc("refinements_cancelled_total", task=self.task)
+        self.cancel_event.set()
+        self.future.cancel()
+
+
+class RefinementPool:
+    """
+    Worker threads shared by every dashboard session.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_REFINE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="granite-refine")
+
+    def submit(
+        self,
+        task: str,
+        roll_no: str,
+        profile: Dict[str, Any],
+        local: Dict[str, Any],
+        fn: Callable[[threading.Event], GraniteResult],
+    ) -> RefinementJob:
+        """
+        Run fn(cancel_event) in the background; fn should give up once the event is set.
+        """
+        cancel_event = threading.Event()
+        inc("refinements_started_total", task=task)
+        future = self._executor.submit(fn, cancel_event)
+        return RefinementJob(task, roll_no, profile, local, future, cancel_event)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,58 @@
+"""
+Cohort overview latency: one-off cube build vs. per-interaction re-slicing.
+
+    python benchmarks/bench_cohort_overview.py --students 500000
+
+Target: slice_cube (what a filter change or rerun costs) under 200 ms at 500k students.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cohort_overview import build_cohort_cube, slice_cube  # noqa: E402
+from run_benchmarks import cohort_frame  # noqa: E402
+
+
+def synthetic_cohort(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    frames = [cohort_frame(task, n) for task in ("dropout", "placement", "exam")]
+    frame = pd.concat(frames, axis=1)
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    frame["department"] = rng.choice(["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT"], n)
+    frame["semester"] = frame["current_semester"]
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cohort overview cube benchmark")
+    parser.add_argument("--students", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    frame = synthetic_cohort(args.students)
+    start = time.perf_counter()
+    cube = build_cohort_cube(frame)
+    build_s = time.perf_counter() - start
+
+    filters = [([], []), (["CSE"], []), (["CSE", "IT"], [5, 6]), ([], [1, 2, 3])]
+    samples = []
+    for i in range(args.repeat):
+        depts, sems = filters[i % len(filters)]
+        start = time.perf_counter()
+        slice_cube(cube, depts, sems)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    print(f"students={args.students:,} cube rows={len(cube.counts) + len(cube.levels) + len(cube.attendance) + len(cube.histograms):,}")
+    print(f"build: {build_s:.2f} s (once per dataset)")
+    print(f"slice: p50 {samples[len(samples) // 2]:.1f} ms, max {samples[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: per-report render time with and without the report template.
+
+"before" redraws the header/footer on every page and re-decodes the logo for
+every report; "after" records them once as form XObjects and reuses the
+process-wide decoded logo.
+
+Run from the repo root:
+    python benchmarks/bench_pdf_template.py --reports 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_pdf import load_logo, render_report_pdf  # noqa: E402
+
+SAMPLE_REPORTS = {
+    "dropout": {
+        "profile": {"attendance_percent": 68},
+        "result": {
+            "risk_level": "Medium",
+            "predicted_score": 2,
+            "summary": "Student is at moderate risk. Timely mentoring and follow-up can prevent escalation. " * 4,
+            "recommendations": [
+                "Schedule a 1:1 mentoring or counselling session.",
+                "Share a personalized study roadmap and upcoming assessments.",
+                "Monitor attendance and assignment submissions for the next few weeks.",
+            ],
+        },
+    },
+    "placement": {
+        "profile": {},
+        "result": {
+            "risk_level": "Tier-2",
+            "predicted_score": 0.72,
+            "summary": "Good profile for Tier-2 companies; can push towards Tier-1 with focused prep.",
+            "recommendations": ["Organize mock interviews focusing on problem solving and communication."] * 12,
+        },
+    },
+    "exam": {
+        "profile": {"attendance_percent": 82},
+        "result": {
+            "risk_level": "Low",
+            "predicted_score": 71.4,
+            "summary": "Likely to pass comfortably. Attendance credits have been factored into this prediction.",
+            "recommendations": ["Provide topic-wise revision schedules and quizzes."] * 12,
+        },
+    },
+}
+
+
+def time_reports(n: int, reuse: bool) -> list:
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        render_report_pdf("Benchmark Student", f"BENCH{i:05d}", SAMPLE_REPORTS, reuse_template=reuse)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reports", type=int, default=200)
+    args = parser.parse_args()
+
+    load_logo.cache_clear()
+    time_reports(5, True)  # warm-up (imports, font metrics)
+    _, pages = render_report_pdf("Benchmark Student", "BENCH", SAMPLE_REPORTS)
+
+    before = time_reports(args.reports, reuse=False)
+    after = time_reports(args.reports, reuse=True)
+    print(f"{args.reports} reports, {pages} pages each")
+    for label, samples in (("before (redraw + reload logo)", before), ("after (template + cached logo)", after)):
+        print(
+            f"{label:32s} median {statistics.median(samples):7.2f} ms/report   "
+            f"mean {statistics.mean(samples):7.2f} ms/report"
+        )
+    print(f"speed-up (median): {statistics.median(before) / statistics.median(after):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
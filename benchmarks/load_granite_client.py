@@ -0,0 +1,114 @@
+"""
+Throughput and tail latency of the real Granite client path, offline.
+
+Runs call_granite_for_task (ModelInference, streaming or not, JSON
+extraction) against benchmarks/mock_watsonx.py instead of IBM Cloud:
+
+    python benchmarks/mock_watsonx.py --port 8899 --latency lognormal:400,0.5 --token-ms 10 &
+    python benchmarks/load_granite_client.py --url http://127.0.0.1:8899 --calls 500 --concurrency 16
+
+--start-mock runs the mock in-process (the --mock-* flags configure it), and
+--json keeps the figures. The response cache is bypassed so every call hits
+the endpoint.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_scoring_service import percentile, random_profile  # noqa: E402
+from granite_client import GRANITE_TASKS, call_granite_for_task, settings_from_env  # noqa: E402
+from granite_executor import run_concurrent  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test call_granite_for_task against the watsonx mock")
+    parser.add_argument("--url", default="http://127.0.0.1:8899")
+    parser.add_argument("--task", default="dropout", choices=sorted(GRANITE_TASKS))
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--no-stream", action="store_true", help="Use generate_text instead of the token stream.")
+    parser.add_argument("--retries", type=int, default=0, help="Retries for transient errors (granite_executor).")
+    parser.add_argument("--start-mock", action="store_true", help="Run benchmarks/mock_watsonx.py in-process.")
+    parser.add_argument("--mock-latency", default="lognormal:300,0.4")
+    parser.add_argument("--mock-token-ms", type=float, default=5.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-malformed-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    if args.start_mock:
+        from benchmarks import mock_watsonx
+
+        port = int(args.url.rsplit(":", 1)[-1].split("/")[0])
+        mock_args = mock_watsonx.build_parser().parse_args(
+            [
+                "--port", str(port),
+                "--latency", args.mock_latency,
+                "--token-ms", str(args.mock_token_ms),
+                "--error-rate", str(args.mock_error_rate),
+                "--malformed-rate", str(args.mock_malformed_rate),
+            ]
+        )
+        server = mock_watsonx.build_server(mock_args)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    settings = settings_from_env(
+        url=args.url,
+        token=os.getenv("WATSONX_TOKEN", "mock"),
+        project_id=os.getenv("WATSONX_PROJECT_ID", "mock"),
+        demo_mode=False,
+        stream=not args.no_stream,
+        use_cache=False,
+    )
+    task = GRANITE_TASKS[args.task]
+    profiles = {str(i): random_profile(args.task) for i in range(args.calls)}
+    latencies, errors = [], {}
+    lock = threading.Lock()
+
+    def one_call(profile):
+        start = time.perf_counter()
+        parsed, err = call_granite_for_task(settings, task["task_name"], profile, task["extra_instructions"])
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if err:
+                kind = err.split(":", 1)[0]
+                errors[kind] = errors.get(kind, 0) + 1
+            else:
+                latencies.append(elapsed)
+        return parsed, err
+
+    start = time.perf_counter()
+    run_concurrent(one_call, profiles, max_concurrency=args.concurrency, max_retries=args.retries)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    results = {
+        "task": args.task,
+        "calls": args.calls,
+        "concurrency": args.concurrency,
+        "stream": not args.no_stream,
+        "ok": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_cps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "mean_ms": round(statistics.mean(latencies), 2) if latencies else 0.0,
+    }
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
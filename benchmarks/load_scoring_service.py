@@ -0,0 +1,128 @@
+"""
+Load generator for scoring_service.py: p50 / p99 latency and throughput.
+
+Start the service, then:
+    python scoring_service.py --port 8765 --window-ms 5 &
+    python benchmarks/load_scoring_service.py --url http://127.0.0.1:8765 --requests 5000 --concurrency 64
+
+Pass --start-server to launch an in-process service for a quick local run,
+and --json results.json to keep the figures for comparison.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def random_profile(task: str) -> dict:
+    if task == "dropout":
+        return {
+            "cgpa": round(random.uniform(4, 10), 1),
+            "attendance_percent": random.randint(40, 100),
+            "avg_assignment_score_percent": random.randint(30, 100),
+            "no_of_academic_warnings": random.randint(0, 4),
+            "current_semester": random.randint(1, 8),
+            "active_backlogs": random.randint(0, 5),
+        }
+    if task == "placement":
+        return {
+            "cgpa": round(random.uniform(5, 10), 1),
+            "internships": random.randint(0, 4),
+            "major_projects": random.randint(0, 5),
+            "hackathons": random.randint(0, 6),
+            "communication_skill_1_10": random.randint(1, 10),
+            "technical_skill_1_10": random.randint(1, 10),
+        }
+    return {
+        "internal_test_1_percent": random.randint(20, 100),
+        "internal_test_2_percent": random.randint(20, 100),
+        "quiz_average_percent": random.randint(20, 100),
+        "attendance_percent": random.randint(40, 100),
+        "lab_performance_percent": random.randint(20, 100),
+        "attendance_credits": random.choice([0.0, 1.0, 2.0, 3.5]),
+        "class_engagement_1_10": random.randint(1, 10),
+    }
+
+
+def post(url: str, payload: dict) -> float:
+    body = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        resp.read()
+    return (time.perf_counter() - start) * 1000
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the scoring service")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--task", default="dropout", choices=["dropout", "placement", "exam"])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--start-server", action="store_true", help="Run the service in-process on --url's port.")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    if args.start_server:
+        from scoring_service import build_server
+
+        port = int(args.url.rsplit(":", 1)[-1].split("/")[0])
+        server = build_server(port=port, window_ms=args.window_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    endpoint = f"{args.url.rstrip('/')}/v1/{args.task}"
+    payloads = [random_profile(args.task) for _ in range(args.requests)]
+    latencies, errors = [], 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for fut in [pool.submit(post, endpoint, p) for p in payloads]:
+            try:
+                latencies.append(fut.result())
+            except Exception:
+                errors += 1
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    results = {
+        "task": args.task,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2) if latencies else 0.0,
+    }
+    try:
+        with urllib.request.urlopen(f"{args.url.rstrip('/')}/metrics", timeout=10) as resp:
+            results["server"] = json.loads(resp.read())
+    except Exception:
+        pass
+
+    print(json.dumps(results, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Server CPU per dashboard interaction, before vs. after form / fragment scoping.
+
+Starts `streamlit run` for two versions of app.py and drives N concurrent
+sessions over Streamlit's websocket protocol the way a browser would:
+changing a widget outside a form triggers a full rerun, changes inside a form
+are held until the form is submitted, and submits inside a fragment rerun only
+that fragment. Slider changes and submits are measured in separate phases so
+each gets its own row: server CPU (user + system, from /proc) is divided by
+the number of interactions of that kind and by the reruns actually sent.
+
+    python benchmarks/measure_rerun_cpu.py --before-rev <commit-before-fragments> --sessions 8 --interactions 40
+
+The "before" tree is exported from git into a temporary directory (so the
+baseline runs with the modules it was written against) and removed
+afterwards. Demo Mode is switched on so no watsonx.ai calls are made, and
+script exceptions are counted so a broken run is visible in the results.
+Linux only (reads /proc/<pid>/stat).
+
+Results from the reference run are in benchmarks/results/rerun_cpu.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect as websocket_connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# Interaction mix of a counsellor on the dropout tab: drag sliders, then analyze.
+SLIDER_LABELS = ["Attendance (%)", "Avg Assignment Score (%)"]
+ACTIONS = ("slider", "submit")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def process_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat", encoding="ascii") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    # utime, stime, cutime, cstime are fields 14-17 (1-based) of the full line.
+    return sum(int(x) for x in fields[11:15]) / CLK_TCK
+
+
+class Widget:
+    def __init__(self, element_type: str, proto: Any, fragment_id: str):
+        self.type = element_type
+        self.id = proto.id
+        self.label = getattr(proto, "label", "")
+        self.form_id = getattr(proto, "form_id", "")
+        self.fragment_id = fragment_id
+
+
+class Session:
+    """
+    Minimal browser stand-in: tracks widgets from deltas and sends rerun requests with widget state.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.conn = None
+        self.widgets: Dict[str, Widget] = {}
+        self.states: Dict[str, Any] = {}  # widget id -> (kind, value)
+        self.reruns = 0
+        self.exceptions = 0
+
+    async def connect(self):
+        self.conn = await websocket_connect(self.url, subprotocols=["streamlit"], max_size=None)
+        await self.rerun()
+
+    async def _read_until_finished(self):
+        while True:
+            raw = await self.conn.recv()
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                etype = element.WhichOneof("type")
+                proto = getattr(element, etype)
+                if etype == "exception":
+                    self.exceptions += 1
+                if hasattr(proto, "id") and getattr(proto, "id", ""):
+                    w = Widget(etype, proto, getattr(msg.delta, "fragment_id", ""))
+                    self.widgets[w.id] = w
+            elif kind == "script_finished":
+                return
+
+    def _widget_states(self, trigger_id: Optional[str] = None):
+        back = BackMsg()
+        rerun = back.rerun_script
+        rerun.query_string = ""
+        for wid, (kind, value) in self.states.items():
+            ws = rerun.widget_states.widgets.add()
+            ws.id = wid
+            if kind == "double_array":
+                ws.double_array_value.data.extend([float(value)])
+            elif kind == "string":
+                ws.string_value = value
+            elif kind == "bool":
+                ws.bool_value = value
+        if trigger_id:
+            ws = rerun.widget_states.widgets.add()
+            ws.id = trigger_id
+            ws.trigger_value = True
+        return back
+
+    async def rerun(self, trigger_id: Optional[str] = None, fragment_id: str = ""):
+        back = self._widget_states(trigger_id)
+        if fragment_id:
+            back.rerun_script.fragment_id = fragment_id
+        await self.conn.send(back.SerializeToString())
+        self.reruns += 1
+        await self._read_until_finished()
+
+    def find(self, etype: str, label: str) -> Widget:
+        for w in self.widgets.values():
+            if w.type == etype and w.label.startswith(label):
+                return w
+        raise KeyError(f"No {etype} widget labelled {label!r}")
+
+    async def set_widget(self, widget: Widget, kind: str, value: Any):
+        self.states[widget.id] = (kind, value)
+        if widget.form_id:
+            return  # browsers hold form values until submit
+        await self.rerun(fragment_id=widget.fragment_id)
+
+    async def click(self, widget: Widget):
+        await self.rerun(trigger_id=widget.id, fragment_id=widget.fragment_id)
+
+
+async def open_session(url: str, seed: int) -> Session:
+    session = Session(url)
+    await session.connect()
+    await session.set_widget(session.find("checkbox", "Use Demo Mode"), "bool", True)
+    await session.set_widget(session.find("text_input", "Student Name"), "string", f"Load Student {seed}")
+    await session.set_widget(session.find("text_input", "Roll No"), "string", f"LOAD{seed:04d}")
+    return session
+
+
+async def run_actions(session: Session, action: str, interactions: int, seed: int) -> Tuple[int, int]:
+    """
+    action="slider": move a slider each time (a full rerun before, nothing sent inside a form after).
+    action="submit": change a slider value locally, then press Analyze, so each
+    submit carries new inputs the way a counsellor's would.
+    """
+    rng = random.Random(seed)
+    submit = session.find("button", "🔍 Analyze Dropout Risk")
+    start_reruns, start_exceptions = session.reruns, session.exceptions
+    for _ in range(interactions):
+        slider = session.find("slider", rng.choice(SLIDER_LABELS))
+        if action == "slider":
+            await session.set_widget(slider, "double_array", rng.randint(40, 100))
+        else:
+            session.states[slider.id] = ("double_array", rng.randint(40, 100))
+            await session.click(submit)
+    return session.reruns - start_reruns, session.exceptions - start_exceptions
+
+
+def measure(app_path: str, sessions: int, interactions: int) -> List[Dict[str, Any]]:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", app_path,
+            "--server.headless", "true", "--server.port", str(port), "--browser.gatherUsageStats", "false",
+        ],
+        cwd=os.path.dirname(os.path.abspath(app_path)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "DEMO_MODE": "True"},
+    )
+    try:
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.5)
+
+        async def warm_and_run():
+            warm = await open_session(url, seed=9999)  # import / cache warm-up, excluded
+            for action in ACTIONS:
+                await run_actions(warm, action, 2, seed=9999)
+            await warm.conn.close()
+            clients = await asyncio.gather(*(open_session(url, seed=s) for s in range(sessions)))
+            phases = []
+            for action in ACTIONS:
+                cpu0 = process_cpu_seconds(server.pid)
+                wall0 = time.perf_counter()
+                runs = await asyncio.gather(
+                    *(run_actions(c, action, interactions, seed=s) for s, c in enumerate(clients))
+                )
+                cpu = process_cpu_seconds(server.pid) - cpu0
+                phases.append(
+                    (action, cpu, time.perf_counter() - wall0, sum(r for r, _ in runs), sum(e for _, e in runs))
+                )
+            for c in clients:
+                await c.conn.close()
+            return phases
+
+        phases = asyncio.run(warm_and_run())
+        total = sessions * interactions
+        return [
+            {
+                "app": os.path.basename(app_path),
+                "sessions": sessions,
+                "action": action,
+                "interactions": total,
+                "reruns_sent": reruns,
+                "script_exceptions": exceptions,
+                "server_cpu_s": round(cpu, 3),
+                "cpu_ms_per_interaction": round(1000 * cpu / total, 2),
+                "cpu_ms_per_rerun": round(1000 * cpu / reruns, 2) if reruns else None,
+                "wall_s": round(wall, 2),
+            }
+            for action, cpu, wall, reruns, exceptions in phases
+        ]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server CPU per interaction, before vs. after fragments")
+    parser.add_argument("--before-rev", help="Git revision whose app.py is the baseline.")
+    parser.add_argument("--before", help="Baseline app path (instead of --before-rev).")
+    parser.add_argument("--after", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--interactions", type=int, default=40, help="Interactions of each kind per session.")
+    parser.add_argument("--json", help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    before_path: Optional[str] = args.before
+    checked_out = None
+    if args.before_rev:
+        checked_out = tempfile.mkdtemp(prefix="app_before_fragments_")
+        archive = subprocess.check_output(["git", "archive", args.before_rev], cwd=ROOT)
+        with tarfile.open(fileobj=BytesIO(archive)) as tar:
+            tar.extractall(checked_out, filter="data")
+        before_path = os.path.join(checked_out, "app.py")
+
+    results: List[Dict[str, Any]] = []
+    try:
+        for n in args.sessions:
+            for label, path in (("before", before_path), ("after", args.after)):
+                if not path:
+                    continue
+                for row in measure(path, n, args.interactions):
+                    row = {"variant": label, **row}
+                    results.append(row)
+                    print(json.dumps(row))
+    finally:
+        if checked_out:
+            shutil.rmtree(checked_out, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
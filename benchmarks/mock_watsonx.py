@@ -0,0 +1,318 @@
+"""
+Offline stand-in for the watsonx.ai text-generation API (load and latency testing).
+
+Serves the endpoints the ibm_watsonx_ai client uses for Granite calls:
+
+    POST /identity/token                     IAM-style token (unsigned JWT)
+    POST /icp4d-api/v1/authorize             CPD-style token
+    GET  /ml/v1/foundation_model_specs       lists the configured model ids
+    POST /ml/v1/text/generation              full response
+    POST /ml/v1/text/generation_stream       server-sent events, one chunk per token
+    GET  /mock/stats                         request / injected-fault counters
+    GET  anything else                       {} (service / version probes)
+
+Answers are realistic: the student profile(s) in the prompt are scored with the
+local rules, so single and batched prompts both parse. Latency, token pacing,
+errors, hangs and malformed JSON are injected on demand:
+
+    python benchmarks/mock_watsonx.py --port 8899 --latency lognormal:400,0.5 \\
+        --token-ms 15 --error-rate 0.02 --timeout-rate 0.01 --malformed-rate 0.05
+
+Point the dashboard or CLI at it (the token skips IBM Cloud IAM):
+
+    WATSONX_URL=http://127.0.0.1:8899 WATSONX_TOKEN=mock WATSONX_PROJECT_ID=mock \\
+        python analytics_cli.py score students.csv --task dropout --out out.csv --granite
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cohort_scoring import score_profile  # noqa: E402
+
+DEFAULT_MODELS = ["ibm/granite-3-8b-instruct", "ibm/granite-3-2b-instruct", "ibm/granite-13b-instruct-v2"]
+
+# TASK: line of the prompt -> scoring task (matches GRANITE_TASKS task names)
+TASK_KEYWORDS = (("dropout", "dropout"), ("placement", "placement"), ("exam", "exam"))
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Latency distribution in milliseconds:
+    fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA
+    """
+    kind, _, raw = spec.partition(":")
+    args = [float(x) for x in raw.split(",") if x]
+    if kind == "fixed" and len(args) == 1:
+        return lambda rng: args[0]
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "normal" and len(args) == 2:
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1]))
+    if kind == "lognormal" and len(args) == 2:
+        mu = math.log(max(args[0], 1e-3))
+        return lambda rng: rng.lognormvariate(mu, args[1])
+    raise argparse.ArgumentTypeError(f"Bad latency spec: {spec!r}")
+
+
+def fake_jwt(ttl_s: int = 3600) -> str:
+    def b64(obj: Dict[str, Any]) -> str:
+        raw = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+    now = int(time.time())
+    return ".".join([b64({"alg": "none", "typ": "JWT"}), b64({"sub": "mock", "iat": now, "exp": now + ttl_s}), "mock"])
+
+
+def _task_from_prompt(prompt: str) -> str:
+    match = re.search(r"TASK:\s*(.+)", prompt)
+    line = (match.group(1) if match else prompt).lower()
+    for keyword, task in TASK_KEYWORDS:
+        if keyword in line:
+            return task
+    return "dropout"
+
+
+def _first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        obj, _ = json.JSONDecoder().raw_decode(text[start:])
+    except ValueError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _safe_score(task: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return score_profile(task, profile)
+    except Exception:
+        return {"risk_level": "Medium", "predicted_score": None, "summary": "Insufficient data.", "recommendations": []}
+
+
+def answer_for_prompt(prompt: str) -> str:
+    """
+    Generated text for a single-student or batched prompt.
+    """
+    task = _task_from_prompt(prompt)
+    if "STUDENTS (one JSON object per line" in prompt:
+        items = []
+        for line in prompt.splitlines():
+            line = line.strip()
+            if line.startswith('{"id"'):
+                try:
+                    student = json.loads(line)
+                except ValueError:
+                    continue
+                items.append({"id": student.get("id"), **_safe_score(task, student.get("profile") or {})})
+        return json.dumps(items)
+    marker = prompt.find("PROFILE")
+    profile = _first_json_object(prompt[marker:] if marker != -1 else prompt) or {}
+    return json.dumps(_safe_score(task, profile))
+
+
+def malform(text: str, rng: random.Random) -> str:
+    choice = rng.randrange(3)
+    if choice == 0:
+        return text[: max(1, len(text) // 2)]  # truncated mid-object
+    if choice == 1:
+        return "Sure! Here is my assessment of the student: " + text.replace('"', "'")
+    return "```json\n" + text.replace(",", ",,", 1) + "\n```"
+
+
+def tokenize(text: str) -> List[str]:
+    # Roughly one token per word / punctuation run, like the real stream.
+    return re.findall(r"\s*\S{1,6}", text) or [text]
+
+
+class MockState:
+    def __init__(self, args: argparse.Namespace):
+        self.models = args.models
+        self.latency = parse_latency(args.latency)
+        self.token_ms = args.token_ms
+        self.error_rate = args.error_rate
+        self.timeout_rate = args.timeout_rate
+        self.malformed_rate = args.malformed_rate
+        self.hang_s = args.hang_s
+        self._rng = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "generation": 0, "stream": 0, "errors": 0, "timeouts": 0, "malformed": 0}
+
+    def draw(self) -> Tuple[float, float]:
+        with self._lock:
+            return self._rng.random(), self.latency(self._rng) / 1000.0
+
+    def rng(self) -> random.Random:
+        with self._lock:
+            return random.Random(self._rng.random())
+
+    def count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+
+class MockWatsonxHandler(BaseHTTPRequestHandler):
+    server_version = "MockWatsonx/1.0"
+    protocol_version = "HTTP/1.1"
+    state: MockState
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+    def _send(self, status: int, payload: Any):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        self.state.count("requests")
+        path = urlparse(self.path).path
+        if path == "/ml/v1/foundation_model_specs":
+            self._send(200, {"total_count": len(self.state.models), "resources": [
+                {"model_id": m, "label": m, "provider": "IBM", "functions": [{"id": "text_generation"}]}
+                for m in self.state.models
+            ]})
+        elif path == "/mock/stats":
+            self._send(200, self.state.counters)
+        else:
+            self._send(200, {})
+
+    def do_POST(self):
+        self.state.count("requests")
+        path = urlparse(self.path).path
+        body = self._read_json()
+        if path in ("/identity/token", "/icp4d-api/v1/authorize"):
+            token = fake_jwt()
+            self._send(200, {"access_token": token, "token": token, "expires_in": 3600, "token_type": "Bearer"})
+            return
+        if path not in ("/ml/v1/text/generation", "/ml/v1/text/generation_stream"):
+            self._send(404, {"errors": [{"code": "not_found", "message": f"No mock for {path}"}]})
+            return
+
+        stream = path.endswith("_stream")
+        self.state.count("stream" if stream else "generation")
+        roll, delay = self.state.draw()
+        if roll < self.state.timeout_rate:
+            self.state.count("timeouts")
+            time.sleep(self.state.hang_s)
+            self.close_connection = True
+            return
+        if roll < self.state.timeout_rate + self.state.error_rate:
+            self.state.count("errors")
+            status = 429 if self.state.rng().random() < 0.5 else 503
+            self._send(status, {
+                "errors": [{"code": "rate_limited" if status == 429 else "service_unavailable",
+                            "message": "Injected fault from mock_watsonx."}],
+                "status_code": status,
+            })
+            return
+
+        prompt = str(body.get("input", ""))
+        model_id = body.get("model_id") or self.state.models[0]
+        text = answer_for_prompt(prompt)
+        if roll < self.state.timeout_rate + self.state.error_rate + self.state.malformed_rate:
+            self.state.count("malformed")
+            text = malform(text, self.state.rng())
+        input_tokens = max(1, len(prompt) // 4)
+
+        time.sleep(delay)  # time to first token
+        if not stream:
+            tokens = tokenize(text)
+            time.sleep(self.state.token_ms * len(tokens) / 1000.0)
+            self._send(200, self._result(model_id, text, len(tokens), input_tokens, "eos_token"))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        tokens = tokenize(text)
+        try:
+            for i, tok in enumerate(tokens, start=1):
+                reason = "eos_token" if i == len(tokens) else "not_finished"
+                event = json.dumps(self._result(model_id, tok, i, input_tokens, reason))
+                self.wfile.write(f"id: {i}\nevent: message\ndata: {event}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if self.state.token_ms:
+                    time.sleep(self.state.token_ms / 1000.0)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client stopped reading once the JSON closed
+
+    @staticmethod
+    def _result(model_id: str, text: str, generated: int, input_tokens: int, reason: str) -> Dict[str, Any]:
+        return {
+            "model_id": model_id,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+            "results": [
+                {
+                    "generated_text": text,
+                    "generated_token_count": generated,
+                    "input_token_count": input_tokens,
+                    "stop_reason": reason,
+                }
+            ],
+        }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Offline watsonx.ai text-generation mock")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", default="fixed:0", help="Time to first token (ms): fixed / uniform / normal / lognormal.")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Delay per generated token (ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 429 / 503.")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of calls that hang for --hang-s.")
+    parser.add_argument("--hang-s", type=float, default=120.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of answers with broken JSON.")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def build_server(args: argparse.Namespace) -> ThreadingHTTPServer:
+    handler = type("BoundMockWatsonxHandler", (MockWatsonxHandler,), {"state": MockState(args)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    server = build_server(args)
+    print(f"Mock watsonx.ai on http://{args.host}:{args.port} (latency {args.latency}, token {args.token_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
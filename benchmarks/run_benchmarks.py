@@ -0,0 +1,226 @@
+"""
+Reproducible benchmark suite for the hot paths.
+
+Covers the local scorers (1 and 100k students), extract_json_from_text on
+small / large / adversarial model outputs, PDF text wrapping on long summaries,
+PDF rendering with all three sections, and call_granite_for_task end-to-end
+against an offline stub model. Results are written as JSON so runs can be
+compared across commits:
+
+    python benchmarks/run_benchmarks.py --out bench_results.json
+    python benchmarks/run_benchmarks.py --quick            # fewer repeats
+    python benchmarks/run_benchmarks.py --only scoring      # name prefix filter
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from cohort_scoring import TASK_COLUMNS, score_cohort, score_profile  # noqa: E402
+from granite_client import GRANITE_TASKS, GraniteSettings, call_granite_for_task, extract_json_from_text  # noqa: E402
+from pdf_layout import wrap_text  # noqa: E402
+from report_pdf import render_report_pdf  # noqa: E402
+
+SEED = 1234
+
+RESULT_JSON = json.dumps(
+    {
+        "risk_level": "Medium",
+        "predicted_score": 2,
+        "summary": "Student is at moderate risk. Timely mentoring and follow-up can prevent escalation.",
+        "recommendations": [
+            "Schedule a 1:1 mentoring or counselling session.",
+            "Share a personalized study roadmap and upcoming assessments.",
+            "Monitor attendance and assignment submissions for the next few weeks.",
+        ],
+    }
+)
+
+
+class StubGraniteModel:
+    """
+    Offline stand-in for ModelInference: returns a canned answer with some chatter.
+    """
+
+    def __init__(self, reply: str = "Here is the analysis:\n" + RESULT_JSON + "\nHope this helps!"):
+        self.reply = reply
+
+    def generate_text(self, prompt: str, **kwargs: Any) -> str:
+        return self.reply
+
+    def generate_text_stream(self, prompt: str, **kwargs: Any):
+        for i in range(0, len(self.reply), 8):
+            yield self.reply[i : i + 8]
+
+
+def cohort_frame(task: str, n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(SEED)
+    data = {
+        "dropout": {
+            "cgpa": np.round(rng.uniform(3, 10, n), 1),
+            "attendance_percent": rng.integers(30, 101, n),
+            "avg_assignment_score_percent": rng.integers(20, 101, n),
+            "no_of_academic_warnings": rng.integers(0, 5, n),
+            "current_semester": rng.integers(1, 9, n),
+            "active_backlogs": rng.integers(0, 6, n),
+        },
+        "placement": {
+            "cgpa": np.round(rng.uniform(4, 10, n), 1),
+            "internships": rng.integers(0, 5, n),
+            "major_projects": rng.integers(0, 6, n),
+            "hackathons": rng.integers(0, 8, n),
+            "communication_skill_1_10": rng.integers(1, 11, n),
+            "technical_skill_1_10": rng.integers(1, 11, n),
+        },
+        "exam": {
+            "internal_test_1_percent": rng.integers(10, 101, n),
+            "internal_test_2_percent": rng.integers(10, 101, n),
+            "quiz_average_percent": rng.integers(10, 101, n),
+            "attendance_percent": rng.integers(30, 101, n),
+            "lab_performance_percent": rng.integers(10, 101, n),
+            "attendance_credits": rng.choice([0.0, 0.5, 1.0, 2.0, 3.5], n),
+            "class_engagement_1_10": rng.integers(1, 11, n),
+        },
+    }[task]
+    return pd.DataFrame(data, columns=TASK_COLUMNS[task])
+
+
+def model_outputs() -> Dict[str, str]:
+    filler = "The student shows mixed signals across terms. " * 2000
+    return {
+        "small": RESULT_JSON,
+        "large": "Analysis notes:\n" + filler + "\n" + RESULT_JSON + "\n" + filler,
+        "many_objects": " ".join('{"note": %d}' % i for i in range(5000)) + RESULT_JSON,
+        "deeply_nested": "{" * 20000 + "}" * 20000,
+        "unbalanced": "{" * 50000 + RESULT_JSON,
+    }
+
+
+def sample_reports() -> Dict[str, Dict[str, Any]]:
+    long_summary = "Attendance and internal marks dipped in the second half of the semester. " * 20
+    recs = ["Schedule a 1:1 mentoring or counselling session with the assigned faculty mentor."] * 8
+    return {
+        "dropout": {
+            "profile": {"attendance_percent": 68},
+            "result": {"risk_level": "Medium", "predicted_score": 2, "summary": long_summary, "recommendations": recs},
+        },
+        "placement": {
+            "profile": {},
+            "result": {"risk_level": "Tier-2", "predicted_score": 0.71, "summary": long_summary, "recommendations": recs},
+        },
+        "exam": {
+            "profile": {"attendance_percent": 81},
+            "result": {"risk_level": "Low", "predicted_score": 72.5, "summary": long_summary, "recommendations": recs},
+        },
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int, number: int = 1) -> Dict[str, float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "mean_ms": round(statistics.mean(samples), 4),
+        "stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def build_cases(quick: bool) -> List[Dict[str, Any]]:
+    r = 3 if quick else 15
+    cases: List[Dict[str, Any]] = []
+
+    for task in TASK_COLUMNS:
+        one = cohort_frame(task, 1).to_dict("records")[0]
+        big = cohort_frame(task, 100_000)
+        cases.append({"name": f"scoring.{task}.per_student.1", "fn": lambda t=task, p=one: score_profile(t, p), "repeat": r, "number": 1000})
+        cases.append({"name": f"scoring.{task}.vectorized.1", "fn": lambda t=task, f=big.iloc[:1]: score_cohort(t, f), "repeat": r, "number": 50})
+        cases.append({"name": f"scoring.{task}.vectorized.100k", "fn": lambda t=task, f=big: score_cohort(t, f), "repeat": r})
+
+    for label, text in model_outputs().items():
+        cases.append({"name": f"extract_json.{label}", "fn": lambda t=text: extract_json_from_text(t), "repeat": r, "chars": len(text)})
+
+    long_summary = "Granite observed a steady decline in engagement and internal assessment scores. " * 400
+    cases.append({"name": "wrap_text.long_summary", "fn": lambda: wrap_text(long_summary, "Helvetica-Oblique", 9, 505), "repeat": r, "chars": len(long_summary)})
+
+    reports = sample_reports()
+    cases.append({"name": "pdf.render.three_sections", "fn": lambda: render_report_pdf("Bench Student", "BENCH0001", reports), "repeat": r})
+
+    settings = GraniteSettings("offline", "http://stub", "offline", "ibm/granite-3-8b-instruct", use_cache=False)
+    task = GRANITE_TASKS["dropout"]
+    profile = cohort_frame("dropout", 1).to_dict("records")[0]
+    for stream in (False, True):
+        s = settings._replace(stream=stream)
+        cases.append(
+            {
+                "name": f"granite.call_task.stub.{'stream' if stream else 'full'}",
+                "fn": lambda s=s: call_granite_for_task(s, task["task_name"], profile, task["extra_instructions"], model=StubGraniteModel()),
+                "repeat": r,
+                "number": 200,
+            }
+        )
+    return cases
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SCET Student Analytics benchmark suite")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results path.")
+    parser.add_argument("--quick", action="store_true", help="Fewer repeats (smoke run).")
+    parser.add_argument("--only", default="", help="Only run cases whose name starts with this prefix.")
+    args = parser.parse_args()
+
+    results = []
+    for case in build_cases(args.quick):
+        if args.only and not case["name"].startswith(args.only):
+            continue
+        stats = measure(case["fn"], case["repeat"], case.get("number", 1))
+        entry = {"name": case["name"], **stats}
+        if "chars" in case:
+            entry["chars"] = case["chars"]
+        results.append(entry)
+        print(f"{case['name']:45s} median {stats['median_ms']:10.4f} ms")
+
+    payload = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "seed": SEED,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"Wrote {len(results)} results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Bulk PDF report generation for a whole cohort.
+
+Reports are rendered one per student across a process pool (ReportLab is
+pure Python and CPU-bound) and streamed to disk as they complete, either
+into a ZIP archive or a single merged PDF whose objects are copied out with
+pypdf and written as each report arrives. Jobs are pulled
+from the input lazily, a bounded window of chunks at a time, so a generator
+over a huge cohort is never materialised up front.
+"""
+
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from io import BytesIO
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from cohort_scoring import TASK_COLUMNS, TASK_RECOMMENDATIONS
+from report_pdf import render_report_pdf
+
+
+class ReportJob(NamedTuple):
+    student_name: str
+    student_id: str
+    reports: Dict[str, Dict[str, Any]]  # section key -> {"profile": ..., "result": ...}
+
+
+def _render_job(job: ReportJob) -> Tuple[str, Optional[bytes], int]:
+    pdf_bytes, pages = render_report_pdf(job.student_name, job.student_id, job.reports)
+    return job.student_id, pdf_bytes, pages
+
+
+def _render_chunk(jobs: List[ReportJob]) -> List[Tuple[str, Optional[bytes], int]]:
+    return [_render_job(job) for job in jobs]
+
+
+def _bounded_map(
+    pool: Executor, jobs: Iterable[ReportJob], chunksize: int, max_pending: int
+) -> Iterator[Tuple[str, Optional[bytes], int]]:
+    """
+    Ordered pool.map over chunks of `jobs` with at most max_pending chunks submitted at once.
+    """
+    jobs = iter(jobs)
+    pending: deque = deque()
+
+    def fill():
+        while len(pending) < max_pending:
+            chunk = list(islice(jobs, chunksize))
+            if not chunk:
+                return
+            pending.append(pool.submit(_render_chunk, chunk))
+
+    fill()
+    while pending:
+        done = pending.popleft()
+        fill()  # keep the workers busy while this chunk is written
+        yield from done.result()
+
+
+def _safe_filename(student_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", student_id or "student") or "student"
+
+
+def report_jobs_from_cohort(
+    task: str,
+    profiles: pd.DataFrame,
+    scored: pd.DataFrame,
+    recommendations: Optional[Iterable[str]] = None,
+) -> Iterator[ReportJob]:
+    """
+    Build one job per row from a profile frame (with roll_no / student_name
+    columns) and its scores from cohort_scoring.score_cohort.
+    """
+    recs = list(recommendations) if recommendations is not None else TASK_RECOMMENDATIONS[task]
+    cols = TASK_COLUMNS[task]
+    records = profiles[cols].to_dict("records")
+    names = profiles["student_name"].tolist() if "student_name" in profiles else [""] * len(profiles)
+    rolls = profiles["roll_no"].tolist() if "roll_no" in profiles else [str(i) for i in profiles.index]
+    for profile, name, roll, level, score, summary in zip(
+        records,
+        names,
+        rolls,
+        scored["risk_level"].tolist(),
+        scored["predicted_score"].tolist(),
+        scored["summary"].tolist(),
+    ):
+        result = {
+            "risk_level": level,
+            "predicted_score": score,
+            "summary": summary,
+            "recommendations": list(recs),
+        }
+        yield ReportJob(str(name or ""), str(roll), {task: {"profile": profile, "result": result}})
+
+
+class _StreamingPdfMerger:
+    """
+    Append whole PDFs to one output file, writing each report's objects as
+    soon as it arrives. Only object offsets, page ids and outline titles are
+    kept in memory; the page tree, outline and xref are written by close().
+    """
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.offsets: List[Optional[int]] = [None]  # object number -> byte offset (0 is unused)
+        self.page_ids: List[int] = []
+        self.outline: List[Tuple[str, int]] = []
+        self.catalog_id = self._reserve()
+        self.pages_id = self._reserve()
+        fh.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _reserve(self) -> int:
+        self.offsets.append(None)
+        return len(self.offsets) - 1
+
+    def _write(self, num: int, obj) -> None:
+        self.offsets[num] = self.fh.tell()
+        self.fh.write(f"{num} 0 obj\n".encode("ascii"))
+        obj.write_to_stream(self.fh)
+        self.fh.write(b"\nendobj\n")
+
+    def append(self, pdf_bytes: bytes, title: str) -> None:
+        from pypdf import PdfReader
+        from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, StreamObject
+
+        reader = PdfReader(BytesIO(pdf_bytes))
+        # Source object number -> output object number; the source page tree maps onto ours.
+        mapping = {reader.trailer["/Root"].raw_get("/Pages").idnum: self.pages_id}
+        queue: List[Tuple[int, Any]] = []
+
+        def copy(obj):
+            if isinstance(obj, IndirectObject):
+                if obj.idnum not in mapping:
+                    mapping[obj.idnum] = self._reserve()
+                    queue.append((mapping[obj.idnum], obj.get_object()))
+                return IndirectObject(mapping[obj.idnum], 0, None)
+            if isinstance(obj, StreamObject):
+                out = obj.__class__()
+                out._data = obj._data  # copied as stored, no re-encoding
+            elif isinstance(obj, DictionaryObject):
+                out = DictionaryObject()
+            elif isinstance(obj, ArrayObject):
+                return ArrayObject(copy(v) for v in obj)
+            else:
+                return obj
+            for key, value in obj.items():
+                out[NameObject(key)] = copy(value)
+            return out
+
+        pages = list(reader.pages)  # flattened: inherited resources / boxes are on each page
+        for page in pages:
+            mapping[page.indirect_reference.idnum] = self._reserve()
+        for page in pages:
+            num = mapping[page.indirect_reference.idnum]
+            self._write(num, copy(DictionaryObject(page)))
+            self.page_ids.append(num)
+            while queue:
+                ref, obj = queue.pop()
+                self._write(ref, copy(obj))
+        if pages:
+            self.outline.append((title, mapping[pages[0].indirect_reference.idnum]))
+
+    def close(self) -> None:
+        from pypdf.generic import (
+            ArrayObject,
+            DictionaryObject,
+            IndirectObject,
+            NameObject,
+            NumberObject,
+            TextStringObject,
+        )
+
+        def ref(num):
+            return IndirectObject(num, 0, None)
+
+        outlines_id = self._reserve()
+        item_ids = [self._reserve() for _ in self.outline]
+        for i, (title, page_id) in enumerate(self.outline):
+            item = DictionaryObject(
+                {
+                    NameObject("/Title"): TextStringObject(title),
+                    NameObject("/Parent"): ref(outlines_id),
+                    NameObject("/Dest"): ArrayObject([ref(page_id), NameObject("/Fit")]),
+                }
+            )
+            if i > 0:
+                item[NameObject("/Prev")] = ref(item_ids[i - 1])
+            if i + 1 < len(item_ids):
+                item[NameObject("/Next")] = ref(item_ids[i + 1])
+            self._write(item_ids[i], item)
+        outlines = DictionaryObject(
+            {NameObject("/Type"): NameObject("/Outlines"), NameObject("/Count"): NumberObject(len(item_ids))}
+        )
+        if item_ids:
+            outlines[NameObject("/First")] = ref(item_ids[0])
+            outlines[NameObject("/Last")] = ref(item_ids[-1])
+        self._write(outlines_id, outlines)
+        self._write(
+            self.pages_id,
+            DictionaryObject(
+                {
+                    NameObject("/Type"): NameObject("/Pages"),
+                    NameObject("/Kids"): ArrayObject(ref(p) for p in self.page_ids),
+                    NameObject("/Count"): NumberObject(len(self.page_ids)),
+                }
+            ),
+        )
+        self._write(
+            self.catalog_id,
+            DictionaryObject(
+                {
+                    NameObject("/Type"): NameObject("/Catalog"),
+                    NameObject("/Pages"): ref(self.pages_id),
+                    NameObject("/Outlines"): ref(outlines_id),
+                    NameObject("/PageMode"): NameObject("/UseOutlines"),
+                }
+            ),
+        )
+        xref = self.fh.tell()
+        lines = [f"xref\n0 {len(self.offsets)}\n", "0000000000 65535 f \n"]
+        lines += [f"{offset:010d} 00000 n \n" for offset in self.offsets[1:]]
+        lines.append(f"trailer\n<< /Size {len(self.offsets)} /Root {self.catalog_id} 0 R >>\n")
+        lines.append(f"startxref\n{xref}\n%%EOF\n")
+        self.fh.write("".join(lines).encode("ascii"))
+
+
+def generate_bulk_reports(
+    jobs: Iterable[ReportJob],
+    out_path: str,
+    mode: str = "zip",
+    processes: Optional[int] = None,
+    chunksize: int = 16,
+    max_pending_chunks: Optional[int] = None,
+) -> Dict[str, float]:
+    """
+    Render every job and write them to out_path.
+
+    mode="zip": one PDF per student inside a ZIP, each written as soon as it
+    is rendered.
+    mode="merged": a single PDF; each report's objects are written as soon as
+    it is rendered and only the page tree, outline and xref are written at
+    the end.
+
+    Either way memory stays flat. At most max_pending_chunks chunks (default
+    two per process) are queued at a time, so the job iterable is consumed
+    as rendering progresses. The output is written to out_path + ".part" and
+    renamed on success; the partial file is removed if anything raises.
+
+    Returns throughput stats: reports, pages, seconds, pages_per_sec.
+    """
+    if mode not in ("zip", "merged"):
+        raise ValueError("mode must be 'zip' or 'merged'")
+
+    start = time.perf_counter()
+    n_reports = 0
+    n_pages = 0
+    tmp_path = out_path + ".part"
+
+    workers = processes or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rendered = _bounded_map(pool, jobs, max(1, chunksize), max_pending_chunks or 2 * workers)
+            if mode == "zip":
+                used = set()
+                with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+                    for student_id, pdf_bytes, pages in rendered:
+                        if not pdf_bytes:
+                            continue
+                        name = _safe_filename(student_id)
+                        arcname = f"{name}_analytics_report.pdf"
+                        suffix = 1
+                        while arcname in used:
+                            suffix += 1
+                            arcname = f"{name}_{suffix}_analytics_report.pdf"
+                        used.add(arcname)
+                        zf.writestr(arcname, pdf_bytes)
+                        n_reports += 1
+                        n_pages += pages
+            else:
+                with open(tmp_path, "wb") as fh:
+                    merger = _StreamingPdfMerger(fh)
+                    for student_id, pdf_bytes, pages in rendered:
+                        if not pdf_bytes:
+                            continue
+                        merger.append(pdf_bytes, student_id)
+                        n_reports += 1
+                        n_pages += pages
+                    merger.close()
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    seconds = time.perf_counter() - start
+    return {
+        "reports": n_reports,
+        "pages": n_pages,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(n_pages / seconds, 1) if seconds > 0 else 0.0,
+    }
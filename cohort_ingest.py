@@ -0,0 +1,195 @@
+"""
+Chunked ingestion of bulk student profile files (CSV / Parquet).
+
+Files are read through a generator in fixed-size chunks, every profile
+column is coerced into the range the matching dashboard widget enforces,
+and each chunk is handed to the vectorized cohort scorer. Memory stays flat
+no matter how large the registrar export is.
+"""
+
+import os
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cohort_scoring import TASK_COLUMNS, score_cohort
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Identity columns carried through untouched when present in the file.
+ID_COLUMNS = ["roll_no", "student_name"]
+
+# --------------
+# Widget ranges: column -> (min, max, is_integer)
+# Mirrors the st.number_input / st.slider bounds of the drop_*, place_*, exam_* widgets.
+# --------------
+COLUMN_RULES: Dict[str, Dict[str, Tuple[float, float, bool]]] = {
+    "dropout": {
+        "cgpa": (0.0, 10.0, False),
+        "attendance_percent": (0, 100, True),
+        "avg_assignment_score_percent": (0, 100, True),
+        "no_of_academic_warnings": (0, 10, True),
+        "current_semester": (1, 8, True),
+        "active_backlogs": (0, 15, True),
+    },
+    "placement": {
+        "cgpa": (0.0, 10.0, False),
+        "internships": (0, 10, True),
+        "major_projects": (0, 10, True),
+        "hackathons": (0, 20, True),
+        "communication_skill_1_10": (1, 10, True),
+        "technical_skill_1_10": (1, 10, True),
+    },
+    "exam": {
+        "internal_test_1_percent": (0, 100, True),
+        "internal_test_2_percent": (0, 100, True),
+        "quiz_average_percent": (0, 100, True),
+        "attendance_percent": (0, 100, True),
+        "lab_performance_percent": (0, 100, True),
+        "attendance_credits": (0.0, 10.0, False),
+        "class_engagement_1_10": (1, 10, True),
+    },
+}
+
+
+class IngestChunk(NamedTuple):
+    frame: pd.DataFrame  # valid, coerced rows
+    rejected: int  # rows dropped because a required value was missing / non-numeric
+    clipped: int  # values pulled back into the widget range
+
+
+def _file_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt.lower()
+    lower = path.lower()
+    if lower.endswith((".parquet", ".pq")):
+        return "parquet"
+    return "csv"
+
+
+def _read_raw_chunks(path: str, columns: Sequence[str], chunk_rows: int, fmt: str) -> Iterator[pd.DataFrame]:
+    wanted = set(columns)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        present = [c for c in pf.schema_arrow.names if c in wanted]
+        for batch in pf.iter_batches(batch_size=chunk_rows, columns=present):
+            yield batch.to_pandas()
+    elif fmt == "csv":
+        reader = pd.read_csv(path, chunksize=chunk_rows, usecols=lambda c: c in wanted)
+        with reader:
+            for chunk in reader:
+                yield chunk
+    else:
+        raise ValueError(f"Unsupported file format '{fmt}' (expected 'csv' or 'parquet').")
+
+
+def field_errors(task: str, raw: pd.DataFrame) -> Dict[Any, List[str]]:
+    """
+    Row index -> problems ("cgpa: 85 is outside 0-10") for rows with a missing,
+    non-numeric or out-of-range value; rows without problems are left out.
+    For strict callers (the scoring service) that must not clip silently.
+    """
+    errors: Dict[Any, List[str]] = {}
+    for name, (lo, hi, _) in COLUMN_RULES[task].items():
+        column = raw[name] if name in raw.columns else pd.Series(np.nan, index=raw.index)
+        values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+        for idx, value in zip(raw.index, values):
+            if not np.isfinite(value):
+                errors.setdefault(idx, []).append(f"{name}: missing or not a number")
+            elif value < lo or value > hi:
+                errors.setdefault(idx, []).append(f"{name}: {value:g} is outside {lo:g}-{hi:g}")
+    return errors
+
+
+def coerce_chunk(task: str, raw: pd.DataFrame) -> IngestChunk:
+    """
+    Coerce one raw chunk to the widget ranges for a task.
+    Rows with a missing / non-numeric required value are rejected;
+    out-of-range values are clipped and integer widgets are rounded.
+    """
+    rules = COLUMN_RULES[task]
+    missing = [c for c in rules if c not in raw.columns]
+    if missing:
+        raise ValueError(f"Missing columns for '{task}' ingestion: {', '.join(missing)}")
+
+    out = pd.DataFrame(index=raw.index)
+    valid = np.ones(len(raw), dtype=bool)
+    clipped = 0
+    for name, (lo, hi, is_int) in rules.items():
+        values = pd.to_numeric(raw[name], errors="coerce").to_numpy(dtype=np.float64)
+        ok = np.isfinite(values)
+        valid &= ok
+        bounded = np.clip(values, lo, hi)
+        clipped += int(np.count_nonzero(ok & (bounded != values)))
+        if is_int:
+            bounded = np.rint(bounded)
+        out[name] = bounded
+
+    for name in ID_COLUMNS:
+        if name in raw.columns:
+            out[name] = raw[name].astype("string")
+
+    out = out[valid]
+    for name, (_, _, is_int) in rules.items():
+        if is_int:
+            out[name] = out[name].astype(np.int64)
+    return IngestChunk(frame=out, rejected=int(len(raw) - len(out)), clipped=clipped)
+
+
+def iter_profile_chunks(
+    path: str,
+    task: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    fmt: Optional[str] = None,
+) -> Iterator[IngestChunk]:
+    """
+    Yield validated, coerced chunks of student profiles from a CSV or Parquet file.
+    """
+    if task not in COLUMN_RULES:
+        raise ValueError(f"Unknown task '{task}'. Expected one of: {', '.join(COLUMN_RULES)}")
+    columns: List[str] = list(TASK_COLUMNS[task]) + ID_COLUMNS
+    for raw in _read_raw_chunks(path, columns, chunk_rows, _file_format(path, fmt)):
+        yield coerce_chunk(task, raw)
+
+
+def iter_scored_chunks(
+    path: str,
+    task: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    fmt: Optional[str] = None,
+) -> Iterator[Tuple[IngestChunk, pd.DataFrame]]:
+    """
+    Yield (chunk, scored) pairs; scored carries the ID columns followed by the scores.
+    """
+    for chunk in iter_profile_chunks(path, task, chunk_rows, fmt):
+        scored = score_cohort(task, chunk.frame)
+        ids = [c for c in ID_COLUMNS if c in chunk.frame.columns]
+        yield chunk, pd.concat([chunk.frame[ids], scored], axis=1)
+
+
+def score_file(
+    path: str,
+    task: str,
+    out_path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    fmt: Optional[str] = None,
+) -> Dict[str, int]:
+    """
+    Stream a cohort file through scoring and append results to a CSV.
+    Returns row counters: scored, rejected, clipped.
+    """
+    stats = {"scored": 0, "rejected": 0, "clipped": 0}
+    tmp_path = out_path + ".part"
+    header = True
+    with open(tmp_path, "w", newline="", encoding="utf-8") as fh:
+        for chunk, scored in iter_scored_chunks(path, task, chunk_rows, fmt):
+            scored.to_csv(fh, index=False, header=header)
+            header = False
+            stats["scored"] += len(scored)
+            stats["rejected"] += chunk.rejected
+            stats["clipped"] += chunk.clipped
+    os.replace(tmp_path, out_path)
+    return stats
@@ -0,0 +1,162 @@
+"""
+Pre-aggregated cohort statistics for the dashboard's Cohort Overview tab.
+
+A dataset is read and scored once (every task whose columns are present),
+then reduced with vectorized groupbys into small count tables keyed by
+department and semester (the "cube"). Filters only re-slice and sum the cube,
+which has at most departments × semesters × levels rows, so interaction
+cost no longer depends on the number of students.
+"""
+
+import hashlib
+import io
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from attendance_rules import CODE_NAMES, classify_attendance
+from cohort_ingest import coerce_chunk
+from cohort_scoring import TASK_COLUMNS, score_cohort
+
+DEPARTMENT_COLUMNS = ("department", "dept", "branch")
+SEMESTER_COLUMNS = ("semester", "current_semester")
+HISTOGRAM_BINS = 20
+ALL = "All"
+
+
+class CohortCube(NamedTuple):
+    students: int
+    counts: pd.DataFrame  # department, semester, count (every row, whatever task columns exist)
+    levels: pd.DataFrame  # department, semester, task, risk_level, count
+    attendance: pd.DataFrame  # department, semester, eligibility, count
+    histograms: pd.DataFrame  # department, semester, task, bin_left, bin_right, count
+    departments: list
+    semesters: list
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def read_cohort_bytes(data: bytes, filename: str) -> pd.DataFrame:
+    if filename.lower().endswith(".parquet"):
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data), compression="gzip" if filename.lower().endswith(".gz") else None)
+
+
+def _dimension(frame: pd.DataFrame, candidates: Sequence[str], default: Any) -> pd.Series:
+    for name in candidates:
+        if name in frame.columns:
+            return frame[name]
+    return pd.Series(default, index=frame.index)
+
+
+def build_cohort_cube(frame: pd.DataFrame) -> CohortCube:
+    """
+    Score every available task once and aggregate by (department, semester).
+    """
+    dims = pd.DataFrame(
+        {
+            "department": _dimension(frame, DEPARTMENT_COLUMNS, ALL).astype(str).str.strip().str.upper(),
+            "semester": pd.to_numeric(_dimension(frame, SEMESTER_COLUMNS, 0), errors="coerce").fillna(0).astype(int),
+        },
+        index=frame.index,
+    )
+    keys = ["department", "semester"]
+    counts = dims.groupby(keys).size().rename("count").reset_index()
+    level_parts, hist_parts = [], []
+    for task, cols in TASK_COLUMNS.items():
+        if not all(c in frame.columns for c in cols):
+            continue
+        coerced = coerce_chunk(task, frame[cols]).frame
+        if coerced.empty:
+            continue
+        scored = score_cohort(task, coerced)
+        part = dims.loc[coerced.index, keys].assign(task=task, risk_level=scored["risk_level"].to_numpy())
+        level_parts.append(part.groupby([*keys, "task", "risk_level"], observed=True).size().rename("count"))
+
+        scores = pd.to_numeric(scored["predicted_score"], errors="coerce").to_numpy(dtype=float)
+        valid = ~np.isnan(scores)
+        if valid.any():
+            edges = np.histogram_bin_edges(scores[valid], bins=HISTOGRAM_BINS)
+            bins = np.clip(np.searchsorted(edges, scores, side="right") - 1, 0, HISTOGRAM_BINS - 1)
+            hp = dims.loc[coerced.index, keys].assign(task=task, bin=bins)[valid]
+            counts = hp.groupby([*keys, "task", "bin"], observed=True).size().rename("count").reset_index()
+            counts["bin_left"] = edges[counts["bin"].to_numpy()]
+            counts["bin_right"] = edges[counts["bin"].to_numpy() + 1]
+            hist_parts.append(counts.drop(columns="bin"))
+
+    if "attendance_percent" in frame.columns:
+        codes = classify_attendance(pd.to_numeric(frame["attendance_percent"], errors="coerce").to_numpy(dtype=float))
+        labels = pd.Series(codes, index=frame.index).map(CODE_NAMES)
+        attendance = dims.assign(eligibility=labels).groupby([*keys, "eligibility"]).size().rename("count").reset_index()
+    else:
+        attendance = pd.DataFrame(columns=[*keys, "eligibility", "count"])
+
+    levels = (
+        pd.concat(level_parts).reset_index()
+        if level_parts
+        else pd.DataFrame(columns=[*keys, "task", "risk_level", "count"])
+    )
+    histograms = (
+        pd.concat(hist_parts, ignore_index=True)
+        if hist_parts
+        else pd.DataFrame(columns=[*keys, "task", "bin_left", "bin_right", "count"])
+    )
+    return CohortCube(
+        students=len(frame),
+        counts=counts,
+        levels=levels,
+        attendance=attendance,
+        histograms=histograms,
+        departments=sorted(dims["department"].unique().tolist()),
+        semesters=sorted(dims["semester"].unique().tolist()),
+    )
+
+
+def _filter(table: pd.DataFrame, departments: Optional[Sequence[str]], semesters: Optional[Sequence[int]]) -> pd.DataFrame:
+    mask = np.ones(len(table), dtype=bool)
+    if departments:
+        mask &= table["department"].isin(departments).to_numpy()
+    if semesters:
+        mask &= table["semester"].isin(semesters).to_numpy()
+    return table[mask]
+
+
+def slice_cube(
+    cube: CohortCube,
+    departments: Optional[Sequence[str]] = None,
+    semesters: Optional[Sequence[int]] = None,
+) -> Dict[str, Any]:
+    """
+    Summed views for the current filters (empty filter = everything):
+    risk_distribution[task], attendance_bands, placement_by_department,
+    placement_by_semester, histograms[task].
+    """
+    counts = _filter(cube.counts, departments, semesters)
+    levels = _filter(cube.levels, departments, semesters)
+    attendance = _filter(cube.attendance, departments, semesters)
+    histograms = _filter(cube.histograms, departments, semesters)
+
+    risk = {
+        task: part.groupby("risk_level")["count"].sum().sort_values(ascending=False)
+        for task, part in levels.groupby("task")
+    }
+    placement = levels[levels["task"] == "placement"]
+    hist = {
+        task: part.groupby(["bin_left", "bin_right"])["count"].sum().reset_index()
+        for task, part in histograms.groupby("task")
+    }
+    return {
+        "students": int(counts["count"].sum()),
+        "risk_distribution": risk,
+        "attendance_bands": attendance.groupby("eligibility")["count"].sum(),
+        "placement_by_department": placement.pivot_table(
+            index="department", columns="risk_level", values="count", aggfunc="sum", fill_value=0
+        ),
+        "placement_by_semester": placement.pivot_table(
+            index="semester", columns="risk_level", values="count", aggfunc="sum", fill_value=0
+        ),
+        "histograms": hist,
+    }
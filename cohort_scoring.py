@@ -0,0 +1,374 @@
+"""
+Local (rule-based) scoring for the Dropout, Placement and Exam tasks.
+
+The per-student scorers at the bottom are the dashboard's Demo Mode logic;
+the array / DataFrame scorers apply the same rules to whole cohorts at once
+as vectorized NumPy operations. Cohort inputs can be a pandas DataFrame
+(columns named like the tab profile keys) or plain NumPy arrays.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[np.ndarray, pd.Series, List[float]]
+
+# --------------
+# Profile columns per task (same keys as the profile dicts built in the tabs)
+# --------------
+DROPOUT_COLUMNS = [
+    "cgpa",
+    "attendance_percent",
+    "avg_assignment_score_percent",
+    "no_of_academic_warnings",
+    "current_semester",
+    "active_backlogs",
+]
+
+PLACEMENT_COLUMNS = [
+    "cgpa",
+    "internships",
+    "major_projects",
+    "hackathons",
+    "communication_skill_1_10",
+    "technical_skill_1_10",
+]
+
+EXAM_COLUMNS = [
+    "internal_test_1_percent",
+    "internal_test_2_percent",
+    "quiz_average_percent",
+    "attendance_percent",
+    "lab_performance_percent",
+    "attendance_credits",
+    "class_engagement_1_10",
+]
+
+TASK_COLUMNS: Dict[str, List[str]] = {
+    "dropout": DROPOUT_COLUMNS,
+    "placement": PLACEMENT_COLUMNS,
+    "exam": EXAM_COLUMNS,
+}
+
+# --------------
+# Level / message tables (indexed by the codes returned from np.select)
+# --------------
+DROPOUT_LEVELS = np.array(["Low", "Medium", "High"], dtype=object)
+DROPOUT_MESSAGES = np.array(
+    [
+        "Student currently appears low risk, but should still be monitored periodically.",
+        "Student is at moderate risk. Timely mentoring and follow-up can prevent escalation.",
+        "Student appears at very high risk of dropout based on academics & engagement indicators.",
+    ],
+    dtype=object,
+)
+DROPOUT_RECOMMENDATIONS = [
+    "Schedule a 1:1 mentoring or counselling session.",
+    "Share a personalized study roadmap and upcoming assessments.",
+    "Monitor attendance and assignment submissions for the next few weeks.",
+]
+
+PLACEMENT_LEVELS = np.array(["Not ready", "Tier-3", "Tier-2", "Tier-1"], dtype=object)
+PLACEMENT_MESSAGES = np.array(
+    [
+        "Placement readiness appears low; intensive training and real-world projects recommended.",
+        "Currently aligned with Tier-3 / service companies; needs improvement for higher tiers.",
+        "Good profile for Tier-2 companies; can push towards Tier-1 with focused prep.",
+        "Strong profile suitable for Tier-1 / Product companies.",
+    ],
+    dtype=object,
+)
+PLACEMENT_RECOMMENDATIONS = [
+    "Encourage participation in contests, hackathons, and technical clubs.",
+    "Recommend building standout portfolio projects (GitHub + live demos).",
+    "Organize mock interviews focusing on problem solving and communication.",
+]
+
+EXAM_LEVELS = np.array(["Low", "Medium", "High"], dtype=object)
+EXAM_MESSAGES = np.array(
+    [
+        "Likely to pass comfortably. Encourage attempting higher-order questions.",
+        "Borderline performance. Extra coaching and continuous assessment will help.",
+        "Student at high risk of failing. Strong remedial support is needed.",
+    ],
+    dtype=object,
+)
+EXAM_SUMMARY_SUFFIX = " Attendance credits have been factored into this prediction."
+EXAM_RECOMMENDATIONS = [
+    "Provide topic-wise revision schedules and quizzes.",
+    "Conduct weekly mini-tests to track concept mastery.",
+    "Ensure attendance credits are transparently communicated to the student.",
+]
+
+TASK_RECOMMENDATIONS: Dict[str, List[str]] = {
+    "dropout": DROPOUT_RECOMMENDATIONS,
+    "placement": PLACEMENT_RECOMMENDATIONS,
+    "exam": EXAM_RECOMMENDATIONS,
+}
+
+
+def _as_array(values: ArrayLike) -> np.ndarray:
+    return np.asarray(values)
+
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Round exactly like the builtin ``round`` used in the tabs.
+    np.round scales by 10**ndigits first and can differ on ties, so the
+    builtin is applied to the unique values only (cohorts have few).
+    """
+    uniques, inverse = np.unique(values, return_inverse=True)
+    rounded = np.fromiter((round(float(u), ndigits) for u in uniques), dtype=np.float64, count=len(uniques))
+    return rounded[inverse.reshape(values.shape)]
+
+
+# --------------
+# Array scorers
+# --------------
+def score_dropout_arrays(
+    cgpa: ArrayLike,
+    attendance: ArrayLike,
+    assignments: ArrayLike,
+    warnings: ArrayLike,
+    backlog: ArrayLike,
+) -> Dict[str, np.ndarray]:
+    """
+    Returns arrays: risk_score (int), level_code (0=Low, 1=Medium, 2=High).
+    """
+    risk_score = (
+        (_as_array(cgpa) < 6).astype(np.int8)
+        + (_as_array(attendance) < 75)
+        + (_as_array(assignments) < 60)
+        + (_as_array(warnings) >= 2)
+        + (_as_array(backlog) >= 2)
+    ).astype(np.int64)
+    level_code = np.select([risk_score >= 4, risk_score >= 2], [2, 1], default=0).astype(np.int8)
+    return {"risk_score": risk_score, "level_code": level_code}
+
+
+def score_placement_arrays(
+    cgpa: ArrayLike,
+    internships: ArrayLike,
+    projects: ArrayLike,
+    comm_skill: ArrayLike,
+    tech_skill: ArrayLike,
+) -> Dict[str, np.ndarray]:
+    """
+    Returns arrays: score (float, unrounded), level_code
+    (0=Not ready, 1=Tier-3, 2=Tier-2, 3=Tier-1).
+    """
+    score = (
+        (_as_array(cgpa) / 10) * 0.4
+        + (_as_array(tech_skill) / 10) * 0.3
+        + (_as_array(comm_skill) / 10) * 0.2
+    )
+    score = score + (
+        np.minimum(_as_array(internships), 3) * 0.03 + np.minimum(_as_array(projects), 3) * 0.02
+    )
+    level_code = np.select([score >= 0.8, score >= 0.6, score >= 0.4], [3, 2, 1], default=0).astype(np.int8)
+    return {"score": score, "level_code": level_code}
+
+
+def score_exam_arrays(
+    ia1: ArrayLike,
+    ia2: ArrayLike,
+    quiz: ArrayLike,
+    attendance: ArrayLike,
+    lab_perf: ArrayLike,
+    attendance_credit: ArrayLike,
+    engagement: ArrayLike,
+) -> Dict[str, np.ndarray]:
+    """
+    Returns arrays: pred (float, clipped to 0–100, unrounded),
+    level_code (0=Low, 1=Medium, 2=High risk of failing).
+    """
+    core = (_as_array(ia1) + _as_array(ia2) + _as_array(quiz) + _as_array(lab_perf)) / 4
+    pred = 0.65 * core + 0.15 * _as_array(attendance) + 1.2 * (_as_array(engagement) * 1.5)
+    pred = pred + _as_array(attendance_credit) * 1.5
+    pred = np.clip(pred, 0, 100).astype(np.float64)
+    level_code = np.select([pred < 40, pred < 60], [2, 1], default=0).astype(np.int8)
+    return {"pred": pred, "level_code": level_code}
+
+
+# --------------
+# DataFrame front-end
+# --------------
+def _require_columns(frame: pd.DataFrame, task: str) -> None:
+    missing = [c for c in TASK_COLUMNS[task] if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns for '{task}' scoring: {', '.join(missing)}")
+
+
+def score_cohort(task: str, frame: Union[pd.DataFrame, Mapping[str, ArrayLike]]) -> pd.DataFrame:
+    """
+    Score a whole cohort for one task ("dropout", "placement" or "exam").
+
+    Returns a DataFrame aligned with the input index with columns
+    risk_level, predicted_score and summary – the same values the
+    per-student Demo Mode path stores in its result dict.
+    """
+    if task not in TASK_COLUMNS:
+        raise ValueError(f"Unknown task '{task}'. Expected one of: {', '.join(TASK_COLUMNS)}")
+    if not isinstance(frame, pd.DataFrame):
+        frame = pd.DataFrame(dict(frame))
+    _require_columns(frame, task)
+
+    def col(name: str) -> np.ndarray:
+        return frame[name].to_numpy()
+
+    if task == "dropout":
+        out = score_dropout_arrays(
+            col("cgpa"),
+            col("attendance_percent"),
+            col("avg_assignment_score_percent"),
+            col("no_of_academic_warnings"),
+            col("active_backlogs"),
+        )
+        codes = out["level_code"]
+        predicted = out["risk_score"]
+        levels, summaries = DROPOUT_LEVELS[codes], DROPOUT_MESSAGES[codes]
+    elif task == "placement":
+        out = score_placement_arrays(
+            col("cgpa"),
+            col("internships"),
+            col("major_projects"),
+            col("communication_skill_1_10"),
+            col("technical_skill_1_10"),
+        )
+        codes = out["level_code"]
+        predicted = _round_like_python(out["score"], 2)
+        levels, summaries = PLACEMENT_LEVELS[codes], PLACEMENT_MESSAGES[codes]
+    else:
+        out = score_exam_arrays(
+            col("internal_test_1_percent"),
+            col("internal_test_2_percent"),
+            col("quiz_average_percent"),
+            col("attendance_percent"),
+            col("lab_performance_percent"),
+            col("attendance_credits"),
+            col("class_engagement_1_10"),
+        )
+        codes = out["level_code"]
+        predicted = _round_like_python(out["pred"], 2)
+        levels, summaries = EXAM_LEVELS[codes], EXAM_MESSAGES[codes] + EXAM_SUMMARY_SUFFIX
+
+    return pd.DataFrame(
+        {
+            "risk_level": levels,
+            "level_code": codes,
+            "predicted_score": predicted,
+            "summary": summaries,
+        },
+        index=frame.index,
+    )
+
+
+def cohort_results(task: str, scored: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Expand a scored cohort back into per-student result dicts
+    (the shape stored by store_report in the dashboard).
+    """
+    recs = TASK_RECOMMENDATIONS[task]
+    predicted = scored["predicted_score"].tolist()
+    return [
+        {
+            "risk_level": level,
+            "predicted_score": score,
+            "summary": summary,
+            "recommendations": list(recs),
+        }
+        for level, score, summary in zip(scored["risk_level"].tolist(), predicted, scored["summary"].tolist())
+    ]
+
+
+def score_profiles(task: str, profiles: List[Dict[str, Any]], index: Optional[List[Any]] = None) -> pd.DataFrame:
+    """
+    Convenience wrapper for a list of profile dicts.
+    """
+    return score_cohort(task, pd.DataFrame.from_records(profiles, index=index, columns=TASK_COLUMNS[task]))
+
+
+# --------------
+# Per-student scorers (the Demo Mode path of the dashboard tabs)
+# --------------
+def score_dropout_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    risk_score = 0
+    if profile["cgpa"] < 6: risk_score += 1
+    if profile["attendance_percent"] < 75: risk_score += 1
+    if profile["avg_assignment_score_percent"] < 60: risk_score += 1
+    if profile["no_of_academic_warnings"] >= 2: risk_score += 1
+    if profile["active_backlogs"] >= 2: risk_score += 1
+    if risk_score >= 4:
+        code = 2
+    elif risk_score >= 2:
+        code = 1
+    else:
+        code = 0
+    return {
+        "risk_level": DROPOUT_LEVELS[code],
+        "predicted_score": risk_score,
+        "summary": DROPOUT_MESSAGES[code],
+        "recommendations": list(DROPOUT_RECOMMENDATIONS),
+    }
+
+
+def score_placement_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    score = (
+        (profile["cgpa"] / 10) * 0.4
+        + (profile["technical_skill_1_10"] / 10) * 0.3
+        + (profile["communication_skill_1_10"] / 10) * 0.2
+    )
+    score += min(profile["internships"], 3) * 0.03 + min(profile["major_projects"], 3) * 0.02
+    if score >= 0.8:
+        code = 3
+    elif score >= 0.6:
+        code = 2
+    elif score >= 0.4:
+        code = 1
+    else:
+        code = 0
+    return {
+        "risk_level": PLACEMENT_LEVELS[code],
+        "predicted_score": round(score, 2),
+        "summary": PLACEMENT_MESSAGES[code],
+        "recommendations": list(PLACEMENT_RECOMMENDATIONS),
+    }
+
+
+def score_exam_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    core = (
+        profile["internal_test_1_percent"]
+        + profile["internal_test_2_percent"]
+        + profile["quiz_average_percent"]
+        + profile["lab_performance_percent"]
+    ) / 4
+    pred = 0.65 * core + 0.15 * profile["attendance_percent"] + 1.2 * (profile["class_engagement_1_10"] * 1.5)
+    pred += profile["attendance_credits"] * 1.5  # attendance credit-based boost
+    pred = max(0, min(100, pred))
+    if pred < 40:
+        code = 2
+    elif pred < 60:
+        code = 1
+    else:
+        code = 0
+    return {
+        "risk_level": EXAM_LEVELS[code],
+        "predicted_score": round(pred, 2),
+        "summary": EXAM_MESSAGES[code] + EXAM_SUMMARY_SUFFIX,
+        "recommendations": list(EXAM_RECOMMENDATIONS),
+    }
+
+
+PROFILE_SCORERS = {
+    "dropout": score_dropout_profile,
+    "placement": score_placement_profile,
+    "exam": score_exam_profile,
+}
+
+
+def score_profile(task: str, profile: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score one student locally; same result dict as the dashboard's Demo Mode.
+    """
+    return PROFILE_SCORERS[task](profile)
@@ -0,0 +1,217 @@
+"""
+Multi-student batched prompts for Granite.
+
+Packs several student profiles into one prompt (instructions and schema are
+sent once), asks for a JSON array of the usual
+{risk_level, predicted_score, summary, recommendations} objects tagged with
+a per-student id, and demultiplexes the answer back to each student.
+Students missing from a partial / truncated response fall back to a
+single-student call. A failed request (e.g. 429 / 503) is retried as a whole
+batch with the executor's backoff instead of fanning out into single calls.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from granite_executor import DEFAULT_MAX_RETRIES, error_message, run_with_retries
+from metrics import inc, span
+
+GraniteResult = Tuple[Optional[Dict[str, Any]], str]
+
+DEFAULT_BATCH_SIZE = 10
+# Output budget: roughly one short JSON object per student plus array framing.
+TOKENS_PER_STUDENT = 180
+BATCH_TOKEN_OVERHEAD = 40
+
+REQUIRED_KEYS = ("risk_level", "summary")
+MISSING_FROM_BATCH = "Student missing from batched Granite response."
+
+
+def build_batch_prompt(
+    task_name: str,
+    students: Sequence[Tuple[str, Dict[str, Any]]],
+    extra_instructions: str = "",
+) -> str:
+    """
+    students: (short_id, profile) pairs. Profiles are serialized compactly.
+    """
+    lines = "\n".join(
+        json.dumps({"id": sid, "profile": profile}, separators=(",", ":"), default=str)
+        for sid, profile in students
+    )
+    return f"""
+You are an academic analytics assistant helping college faculty make data-driven decisions.
+
+TASK: {task_name}
+
+{extra_instructions}
+
+STUDENTS (one JSON object per line, each with an "id" and a "profile"):
+{lines}
+
+Assess EACH student independently. Return a strict JSON array with exactly one object per student,
+in the same order, using this schema for every element:
+{{"id": string, "risk_level": string, "predicted_score": number|null, "summary": string, "recommendations": ["string", "string", "string"]}}
+
+Important: Return ONLY the JSON array. No markdown.
+"""
+
+
+def _balanced_segments(text: str, open_ch: str, close_ch: str, depth_wanted: int) -> List[str]:
+    """
+    Collect segments delimited by open_ch/close_ch at the given nesting depth
+    (only open_ch/close_ch count towards depth),
+    skipping over JSON string literals so braces inside summaries don't count.
+    """
+    segments = []
+    depth = 0
+    start = None
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch == open_ch:
+            depth += 1
+            if depth == depth_wanted:
+                start = i
+        elif ch == close_ch and depth > 0:
+            if depth == depth_wanted and start is not None:
+                segments.append(text[start : i + 1])
+                start = None
+            depth -= 1
+    return segments
+
+
+def extract_json_items_from_text(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse a batched response into a list of objects.
+    Prefers a complete top-level JSON array; if the array is truncated or
+    wrapped in chatter, falls back to every complete {...} object found.
+    """
+    for seg in _balanced_segments(text, "[", "]", 1):
+        try:
+            parsed = json.loads(seg)
+        except Exception:
+            continue
+        if isinstance(parsed, list) and any(isinstance(x, dict) for x in parsed):
+            return [x for x in parsed if isinstance(x, dict)]
+
+    items = []
+    for seg in _balanced_segments(text, "{", "}", 1):
+        try:
+            parsed = json.loads(seg)
+        except Exception:
+            continue
+        if isinstance(parsed, dict):
+            items.append(parsed)
+    return items
+
+
+def demux_batch_results(items: List[Dict[str, Any]], short_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Map parsed objects back to short ids. Objects without a known id or
+    missing required keys are ignored (their students fall back).
+    """
+    wanted = set(short_ids)
+    out: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        sid = str(item.get("id", ""))
+        if sid not in wanted or sid in out:
+            continue
+        if not all(k in item for k in REQUIRED_KEYS):
+            continue
+        result = {k: v for k, v in item.items() if k != "id"}
+        result.setdefault("predicted_score", None)
+        result.setdefault("recommendations", [])
+        out[sid] = result
+    return out
+
+
+def response_text(payload: Any) -> Tuple[str, int, int]:
+    """
+    (generated text, input tokens, generated tokens) from a raw_response dict or plain text.
+    """
+    if isinstance(payload, dict):
+        first = (payload.get("results") or [{}])[0]
+        return (
+            str(first.get("generated_text", "")),
+            int(first.get("input_token_count") or 0),
+            int(first.get("generated_token_count") or 0),
+        )
+    return (payload if isinstance(payload, str) else str(payload)), 0, 0
+
+
+def call_granite_batch(
+    model: Any,
+    task_name: str,
+    profiles: Dict[str, Dict[str, Any]],
+    extra_instructions: str = "",
+    fallback: Optional[Callable[[Dict[str, Any]], GraniteResult]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    params: Optional[Dict[str, Any]] = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> Dict[str, GraniteResult]:
+    """
+    Score many students with batched prompts.
+
+    profiles: caller key (e.g. roll number) -> profile dict.
+    fallback: single-student call for students missing from a parsed response
+    (without it they get MISSING_FROM_BATCH). A batch whose request fails after
+    max_retries transient retries gives every student that error instead.
+    params: decoding parameters of single calls (granite_params); each batch
+    only overrides max_new_tokens with its own budget.
+    Returns caller key -> (result, err) in the same shape as call_granite_for_task.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+    keys = list(profiles)
+    results: Dict[str, GraniteResult] = {}
+    for offset in range(0, len(keys), batch_size):
+        batch_keys = keys[offset : offset + batch_size]
+        short_ids = [f"S{i + 1}" for i in range(len(batch_keys))]
+        with span("prompt_build", mode="batch"):
+            prompt = build_batch_prompt(
+                task_name,
+                [(sid, profiles[k]) for sid, k in zip(short_ids, batch_keys)],
+                extra_instructions,
+            )
+        budget = BATCH_TOKEN_OVERHEAD + TOKENS_PER_STUDENT * len(batch_keys)
+        batch_params = {**(params or {}), "max_new_tokens": budget}
+
+        def generate(_):
+            inc("granite_calls_total", mode="batch")
+            return model.generate_text(prompt=prompt, params=batch_params, raw_response=True)
+
+        batch_err = ""
+        try:
+            with span("generate_text", mode="batch"):
+                raw = run_with_retries(generate, None, max_retries=max_retries)
+            generated, input_tokens, generated_tokens = response_text(raw)
+            inc("granite_input_tokens_total", input_tokens, mode="batch")
+            inc("granite_generated_tokens_total", generated_tokens, mode="batch")
+            with span("extract_json", mode="batch"):
+                by_id = demux_batch_results(extract_json_items_from_text(generated), short_ids)
+        except Exception as e:
+            inc("granite_errors_total", mode="batch")
+            by_id = {}
+            batch_err = error_message(e, f"Error calling Granite model: {e}")
+
+        for sid, key in zip(short_ids, batch_keys):
+            if sid in by_id:
+                results[key] = (by_id[sid], "")
+            elif batch_err:
+                results[key] = (None, batch_err)
+            elif fallback is not None:
+                results[key] = fallback(profiles[key])
+            else:
+                results[key] = (None, MISSING_FROM_BATCH)
+    return results
@@ -0,0 +1,351 @@
+"""
+Granite (IBM watsonx.ai) client used by the dashboard, the batch CLI and services.
+
+No Streamlit dependency: connection and behaviour settings travel in a
+GraniteSettings tuple instead of being read from sidebar globals.
+"""
+
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from ibm_watsonx_ai import Credentials
+from ibm_watsonx_ai.foundation_models import ModelInference
+from ibm_watsonx_ai.foundation_models.schema import (
+    TextGenParameters,
+    TextGenDecodingMethod,
+)
+
+from granite_batch import DEFAULT_BATCH_SIZE, MISSING_FROM_BATCH, call_granite_batch, response_text
+from granite_cache import GraniteCache, cache_key
+from granite_executor import DEFAULT_MAX_CONCURRENCY, error_message, run_concurrent
+from json_stream import consume_until_json
+from metrics import METRICS, inc, span
+from prompt_templates import GRANITE_TASKS, PromptTemplate, template_for
+
+GraniteResult = Tuple[Optional[Dict[str, Any]], str]
+
+DEMO_MODE_MESSAGE = "Demo mode active (local simulated logic used)."
+CANCELLED_MESSAGE = "Granite call cancelled (inputs changed)."
+
+class GraniteSettings(NamedTuple):
+    api_key: str
+    url: str
+    project_id: str
+    model_id: str
+    demo_mode: bool = False
+    greedy: bool = False
+    stream: bool = True
+    use_cache: bool = True
+    token: str = ""  # bearer token instead of an API key (CPD / offline mock server)
+
+
+def settings_from_env(**overrides: Any) -> GraniteSettings:
+    """
+    Build settings from WATSONX_* / GRANITE_MODEL_ID environment variables (.env supported by callers).
+    """
+    settings = GraniteSettings(
+        api_key=os.getenv("WATSONX_APIKEY", ""),
+        url=os.getenv("WATSONX_URL", "https://us-south.ml.cloud.ibm.com"),
+        project_id=os.getenv("WATSONX_PROJECT_ID", ""),
+        model_id=os.getenv("GRANITE_MODEL_ID", "ibm/granite-3-8b-instruct"),
+        demo_mode=os.getenv("DEMO_MODE") == "True",
+        token=os.getenv("WATSONX_TOKEN", ""),
+    )
+    return settings._replace(**overrides)
+
+
+def granite_params(greedy: bool = False) -> Dict[str, Any]:
+    """
+    Text-generation parameters used by get_granite_model (also part of the cache key).
+    """
+    if greedy:
+        return {"decoding_method": TextGenDecodingMethod.GREEDY, "max_new_tokens": 512}
+    return {
+        "decoding_method": TextGenDecodingMethod.SAMPLE,
+        "temperature": 0.25,
+        "top_p": 0.9,
+        "max_new_tokens": 512,
+    }
+
+
+@lru_cache(maxsize=8)
+def get_granite_model(
+    api_key: str,
+    url: str,
+    project_id: str,
+    model_id: str,
+    greedy: bool = False,
+    token: str = "",
+) -> Tuple[Optional[ModelInference], Optional[str]]:
+    if not (api_key or token) or not url or not project_id:
+        return None, "Missing WATSONX_APIKEY, WATSONX_URL, or WATSONX_PROJECT_ID."
+    try:
+        if token:
+            # Non-IBM-Cloud endpoint (Cloud Pak for Data, benchmarks/mock_watsonx.py): no IAM exchange.
+            creds = Credentials(
+                url=url,
+                token=token,
+                instance_id=os.getenv("WATSONX_INSTANCE_ID", "openshift"),
+                version=os.getenv("WATSONX_VERSION", "5.0"),
+            )
+        else:
+            creds = Credentials(api_key=api_key, url=url)
+        params = TextGenParameters(**granite_params(greedy))
+        model = ModelInference(
+            model_id=model_id,
+            params=params,
+            credentials=creds,
+            project_id=project_id,
+        )
+        return model, None
+    except Exception as e:
+        return None, f"Error creating Granite model client: {e}"
+
+
+@lru_cache(maxsize=1)
+def get_granite_cache() -> GraniteCache:
+    return GraniteCache()
+
+
+def model_for(settings: GraniteSettings) -> Tuple[Optional[ModelInference], Optional[str]]:
+    return get_granite_model(
+        settings.api_key,
+        settings.url,
+        settings.project_id,
+        settings.model_id,
+        settings.greedy,
+        settings.token,
+    )
+
+
+def granite_cache_key(
+    settings: GraniteSettings,
+    task_name: str,
+    profile: Dict[str, Any],
+    extra_instructions: str,
+    mode: str = "single",
+) -> str:
+    """
+    mode="batch" keys answers from multi-student prompts apart from single-call answers.
+    """
+    params = task_params(settings, template_for(task_name, extra_instructions))
+    if mode != "single":
+        params["prompt_mode"] = mode
+    return cache_key(task_name, profile, extra_instructions, settings.model_id, params)
+
+
+def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
+    segments = []
+    stack = 0
+    start = None
+    for i, ch in enumerate(text):
+        if ch == "{":
+            if stack == 0:
+                start = i
+            stack += 1
+        elif ch == "}":
+            if stack > 0:
+                stack -= 1
+                if stack == 0 and start is not None:
+                    segments.append(text[start : i + 1])
+                    start = None
+    for seg in reversed(segments):
+        try:
+            return json.loads(seg)
+        except Exception:
+            continue
+    try:
+        return json.loads(text)
+    except Exception:
+        return None
+
+
+def _stream_text(
+    events: Iterable[Any], usage: Dict[str, int], cancel: Optional[threading.Event] = None
+) -> Iterator[str]:
+    """
+    Text chunks from a raw_response stream, tracking token counts in `usage`.
+    Stops early (closing the stream) once `cancel` is set.
+    """
+    try:
+        for event in events:
+            if cancel is not None and cancel.is_set():
+                return
+            text, input_tokens, generated_tokens = response_text(event)
+            usage["input"] = max(usage["input"], input_tokens)
+            usage["generated"] = max(usage["generated"], generated_tokens)
+            yield text
+    finally:
+        close = getattr(events, "close", None)
+        if close:
+            close()
+
+
+def build_task_prompt(task_name: str, profile: Dict[str, Any], extra_instructions: str = "") -> str:
+    return template_for(task_name, extra_instructions).render(profile)
+
+
+def task_params(settings: GraniteSettings, template: PromptTemplate) -> Dict[str, Any]:
+    """
+    Generation parameters for one call: the decoding setup plus the task's output budget.
+    """
+    return {**granite_params(settings.greedy), "max_new_tokens": template.max_new_tokens}
+
+
+def call_granite_for_task(
+    settings: GraniteSettings,
+    task_name: str,
+    profile: Dict[str, Any],
+    extra_instructions: str = "",
+    model: Optional[Any] = None,
+    cancel: Optional[threading.Event] = None,
+) -> GraniteResult:
+    """
+    model: optional pre-built client (anything with generate_text /
+    generate_text_stream), e.g. an offline stub; defaults to get_granite_model.
+    cancel: set it to abandon the call; a streaming generation stops reading
+    tokens and the result is discarded (CANCELLED_MESSAGE).
+    """
+    if settings.demo_mode:
+        return None, DEMO_MODE_MESSAGE
+    if cancel is not None and cancel.is_set():
+        return None, CANCELLED_MESSAGE
+
+    # Cache first: a hit needs no client (and no credentials check).
+    cache = get_granite_cache() if settings.use_cache else None
+    key = granite_cache_key(settings, task_name, profile, extra_instructions)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            inc("granite_cache_hits_total")
+            return cached, ""
+        inc("granite_cache_misses_total")
+
+    if model is None:
+        model, err = model_for(settings)
+        if err:
+            return None, err
+
+    template = template_for(task_name, extra_instructions)
+    with span("prompt_build"):
+        prompt = template.render(profile)
+    params = task_params(settings, template)
+    parsed = None
+    usage = {"input": 0, "generated": 0}
+    inc("granite_calls_total", task=template.task_key)
+    try:
+        with span("generate_text", mode="stream" if settings.stream else "full"):
+            if settings.stream:
+                # Stop reading tokens as soon as the first complete result object closes.
+                events = model.generate_text_stream(prompt=prompt, params=params, raw_response=True)
+                parsed, generated = consume_until_json(_stream_text(events, usage, cancel))
+            else:
+                generated, usage["input"], usage["generated"] = response_text(
+                    model.generate_text(prompt=prompt, params=params, raw_response=True)
+                )
+    except Exception as e:
+        inc("granite_errors_total")
+        return None, error_message(e, f"Error calling Granite model: {e}")
+    if cancel is not None and cancel.is_set():
+        inc("granite_cancelled_total", task=template.task_key)
+        return None, CANCELLED_MESSAGE
+    inc("granite_input_tokens_total", usage["input"], task=template.task_key)
+    inc("granite_generated_tokens_total", usage["generated"], task=template.task_key)
+    METRICS.record(
+        "granite_call",
+        task=template.task_key,
+        prompt_chars=len(prompt),
+        prompt_tokens=usage["input"],
+        completion_tokens=usage["generated"],
+        max_new_tokens=template.max_new_tokens,
+    )
+
+    if parsed is None:
+        with span("extract_json"):
+            parsed = extract_json_from_text(generated)
+    if parsed is None:
+        inc("granite_parse_failures_total")
+        return None, f"Could not parse JSON from model response. Raw output:\n\n{generated}"
+    if cache is not None:
+        cache.put(key, parsed)
+    return parsed, ""
+
+
+def call_granite_for_batch(
+    settings: GraniteSettings,
+    task_key: str,
+    profiles: Dict[str, Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, GraniteResult]:
+    """
+    Score many students (roll no -> profile) with multi-student prompts.
+    Students missing from a partial batch response are retried one by one.
+    Cached single-call answers are reused; new answers are cached under the
+    batch-mode key, so single calls never return a batched answer.
+    """
+    if settings.demo_mode:
+        return {k: (None, DEMO_MODE_MESSAGE) for k in profiles}
+
+    task = GRANITE_TASKS[task_key]
+    cache = get_granite_cache() if settings.use_cache else None
+    keys = {
+        k: granite_cache_key(settings, task["task_name"], p, task["extra_instructions"], mode="batch")
+        for k, p in profiles.items()
+    }
+    results: Dict[str, GraniteResult] = {}
+    if cache is not None:
+        for k, p in profiles.items():
+            cached = cache.get(granite_cache_key(settings, task["task_name"], p, task["extra_instructions"]))
+            if cached is None:
+                cached = cache.get(keys[k])
+            if cached is not None:
+                results[k] = (cached, "")
+
+    pending = {k: p for k, p in profiles.items() if k not in results}
+    if not pending:
+        return results
+    model, err = model_for(settings)
+    if err:
+        return {**results, **{k: (None, err) for k in pending}}
+    fresh = call_granite_batch(
+        model,
+        task["task_name"],
+        pending,
+        extra_instructions=task["extra_instructions"],
+        batch_size=batch_size,
+        params=granite_params(settings.greedy),
+    )
+    for k, (parsed, batch_err) in fresh.items():
+        if batch_err == MISSING_FROM_BATCH:
+            # Single-call fallback; call_granite_for_task caches it under the single-call key.
+            results[k] = call_granite_for_task(settings, task["task_name"], pending[k], task["extra_instructions"])
+            continue
+        if cache is not None and parsed is not None:
+            cache.put(keys[k], parsed)
+        results[k] = (parsed, batch_err)
+    return results
+
+
+def call_granite_for_cohort(
+    settings: GraniteSettings,
+    task_key: str,
+    profiles: Dict[str, Dict[str, Any]],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    rate_per_sec: Optional[float] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, GraniteResult]:
+    """
+    Fan out one call_granite_for_task per student (roll no -> profile) over a
+    bounded thread pool with rate limiting and retries.
+    """
+    task = GRANITE_TASKS[task_key]
+    return run_concurrent(
+        lambda p: call_granite_for_task(settings, task["task_name"], p, task["extra_instructions"]),
+        profiles,
+        max_concurrency=max_concurrency,
+        rate_per_sec=rate_per_sec,
+        on_progress=on_progress,
+    )
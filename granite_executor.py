@@ -0,0 +1,173 @@
+"""
+Concurrent execution layer for Granite calls.
+
+Fans many blocking calls (e.g. call_granite_for_task) out over a thread pool
+with a concurrency cap, a shared token-bucket rate limiter and jittered
+exponential backoff on transient failures. Progress is reported from the
+calling thread, so Streamlit widgets can be updated from the callback.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 4
+
+# HTTP statuses worth retrying: timeout, throttling and gateway / server hiccups.
+TRANSIENT_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+try:  # transport errors of the HTTP clients used by ibm-watsonx-ai
+    import httpx
+
+    _HTTPX_ERRORS: Tuple[type, ...] = (httpx.TimeoutException, httpx.NetworkError)
+except ImportError:
+    _HTTPX_ERRORS = ()
+try:
+    import requests
+
+    _REQUESTS_ERRORS: Tuple[type, ...] = (requests.ConnectionError, requests.Timeout)
+except ImportError:
+    _REQUESTS_ERRORS = ()
+
+TRANSIENT_EXCEPTIONS: Tuple[type, ...] = (ConnectionError, TimeoutError) + _HTTPX_ERRORS + _REQUESTS_ERRORS
+
+
+class TransientError(str):
+    """
+    Error message for a failure classified as retryable where it was caught.
+    Plain str errors (parse failures, bad credentials, 4xx) are never retried.
+    """
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` tokens per second, at most `burst` saved up.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """
+    HTTP status of an API failure (the exception's own or its response's), if any.
+    """
+    for obj in (exc, getattr(exc, "response", None)):
+        code = getattr(obj, "status_code", None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def is_transient_exception(exc: BaseException) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code in TRANSIENT_STATUS_CODES
+    return isinstance(exc, TRANSIENT_EXCEPTIONS)
+
+
+def error_message(exc: BaseException, message: str) -> str:
+    """
+    `message` for a GraniteResult err, tagged TransientError when the exception is retryable.
+    """
+    return TransientError(message) if is_transient_exception(exc) else message
+
+
+def backoff_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 20.0) -> float:
+    """
+    "Full jitter" exponential backoff: uniform in [0, min(max_delay, base * 2**attempt)].
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def _granite_error(result: Any) -> str:
+    # call_granite_for_task returns (parsed, err); a non-empty err is a failure.
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], str):
+        return result[1]
+    return ""
+
+
+def run_with_retries(
+    fn: Callable[[Any], Any],
+    arg: Any,
+    limiter: Optional[TokenBucket] = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    base_delay: float = 0.5,
+    max_delay: float = 20.0,
+) -> Any:
+    """
+    Call fn(arg), retrying transient failures: raised exceptions classified by
+    is_transient_exception, or a returned TransientError err.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            result = fn(arg)
+            err = _granite_error(result)
+        except Exception as e:
+            if attempt >= max_retries or not is_transient_exception(e):
+                raise
+        else:
+            if not isinstance(err, TransientError) or attempt >= max_retries:
+                return result
+        time.sleep(backoff_delay(attempt, base_delay, max_delay))
+        attempt += 1
+
+
+def run_concurrent(
+    fn: Callable[[Any], Any],
+    items: Dict[Hashable, Any],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    rate_per_sec: Optional[float] = None,
+    burst: Optional[int] = None,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[Hashable, Any]:
+    """
+    Run fn over every value in `items` (key -> argument) and return key -> result.
+
+    Exceptions that survive the retries are returned as (None, "<error>")
+    so one bad student never aborts a cohort run.
+    """
+    limiter = TokenBucket(rate_per_sec, burst) if rate_per_sec else None
+    total = len(items)
+    results: Dict[Hashable, Any] = {}
+    if on_progress:
+        on_progress(0, total)
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="granite") as pool:
+        futures = {
+            pool.submit(run_with_retries, fn, arg, limiter, max_retries): key for key, arg in items.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = (None, f"Error calling Granite model: {e}")
+            if on_progress:
+                on_progress(done, total)
+    return results
+
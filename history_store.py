@@ -0,0 +1,289 @@
+"""
+Append-only analytics history in partitioned Parquet.
+
+Every scored profile is kept with its result, timestamp, task and model id
+under hive-style partitions:
+
+    <root>/task=dropout/semester=5/part-<time>-<uuid>.parquet
+
+Task and semester filters prune whole directories. Rows inside each file are
+sorted by roll_no and written in small row groups, so a single student's
+history is read through Parquet min/max statistics (predicate pushdown)
+instead of a full scan. Appends create new files. Once a partition holds more
+than COMPACT_AFTER_FILES appended files they are merged into one, and once it
+holds that many merged files the whole partition is rewritten, so the file
+count stays bounded without an external job; compact() rewrites every
+partition into one sorted file.
+
+Merges take an exclusive flock on the partition's lock file, and reads take
+a shared one on each partition they scan, so several processes (the app and
+analytics_cli) never merge the same files twice or read a merged file next
+to its inputs. Automatic compaction is skipped while another process holds
+the lock; the next append retries it.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:  # Windows: merges are serialised within one process only
+    fcntl = None
+
+DEFAULT_HISTORY_DIR = os.getenv("HISTORY_DIR", ".analytics_history")
+ROW_GROUP_ROWS = 4096
+COMPACT_AFTER_FILES = 32
+READ_RETRIES = 3
+UNKNOWN_SEMESTER = 0
+LOCK_FILE = ".merge.lock"  # dot prefix: dataset discovery skips it
+
+SCHEMA = pa.schema(
+    [
+        ("ts", pa.timestamp("ms")),
+        ("roll_no", pa.string()),
+        ("student_name", pa.string()),
+        ("model_id", pa.string()),
+        ("risk_level", pa.string()),
+        ("predicted_score", pa.float64()),
+        ("summary", pa.string()),
+        ("profile", pa.string()),  # JSON
+        ("result", pa.string()),  # JSON
+    ]
+)
+DATASET_SCHEMA = pa.schema(list(SCHEMA) + [("task", pa.string()), ("semester", pa.int16())])
+PARTITIONING = ds.partitioning(pa.schema([("task", pa.string()), ("semester", pa.int16())]), flavor="hive")
+
+
+def _score(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def history_record(
+    roll_no: str,
+    task: str,
+    profile: Dict[str, Any],
+    result: Dict[str, Any],
+    model_id: str,
+    student_name: str = "",
+    semester: Optional[int] = None,
+    ts: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    One history row. semester defaults to the profile's current_semester (0 when unknown).
+    """
+    if semester is None:
+        semester = profile.get("current_semester", UNKNOWN_SEMESTER)
+    return {
+        "ts": pd.Timestamp(ts if ts is not None else time.time(), unit="s").floor("ms"),
+        "roll_no": str(roll_no).strip().upper(),
+        "student_name": student_name or "",
+        "task": task,
+        "semester": int(semester or UNKNOWN_SEMESTER),
+        "model_id": model_id,
+        "risk_level": result.get("risk_level"),
+        "predicted_score": _score(result.get("predicted_score")),
+        "summary": result.get("summary"),
+        "profile": json.dumps(profile, default=str, separators=(",", ":")),
+        "result": json.dumps(result, default=str, separators=(",", ":")),
+    }
+
+
+@contextmanager
+def _file_lock(path: str, shared: bool = False, blocking: bool = True) -> Iterator[bool]:
+    """
+    flock on path (created if missing); yields False when blocking=False and the lock is held elsewhere.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(path, "a") as fh:  # closing the file releases the lock
+        mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(fh, mode if blocking else mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        yield True
+
+
+class HistoryStore:
+    def __init__(self, root: str = DEFAULT_HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    # ---- writes ----
+    def _partition_dir(self, task: str, semester: int) -> str:
+        return os.path.join(self.root, f"task={task}", f"semester={semester}")
+
+    def _write_partition(self, task: str, semester: int, frame: pd.DataFrame, name: Optional[str] = None) -> str:
+        table = pa.Table.from_pandas(
+            frame.sort_values(["roll_no", "ts"], kind="stable")[SCHEMA.names],
+            schema=SCHEMA,
+            preserve_index=False,
+            safe=False,
+        )
+        directory = self._partition_dir(task, semester)
+        os.makedirs(directory, exist_ok=True)
+        name = name or f"part-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(directory, name)
+        tmp = os.path.join(directory, f".{name}.tmp")  # dot prefix: dataset discovery skips it
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP_ROWS, compression="zstd", write_statistics=True)
+        os.replace(tmp, path)  # readers never see a half-written file
+        return path
+
+    def _partition_lock(self, task: str, semester: int, shared: bool = False, blocking: bool = True):
+        return _file_lock(os.path.join(self._partition_dir(task, semester), LOCK_FILE), shared, blocking)
+
+    def _partition_files(self, task: str, semester: int) -> List[str]:
+        directory = self._partition_dir(task, semester)
+        return sorted(f for f in os.listdir(directory) if f.endswith(".parquet"))
+
+    def _merge(self, task: str, semester: int, files: List[str], prefix: str):
+        # Write the merged file before removing its inputs, so readers never miss rows.
+        directory = self._partition_dir(task, semester)
+        paths = [os.path.join(directory, f) for f in files]
+        frame = ds.dataset(paths, schema=SCHEMA, format="parquet").to_table().to_pandas()
+        self._write_partition(
+            task, semester, frame, name=f"{prefix}-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}.parquet"
+        )
+        for path in paths:
+            os.remove(path)
+
+    def _auto_compact(self, task: str, semester: int):
+        with self._partition_lock(task, semester, blocking=False) as locked:
+            if not locked:
+                return  # another process is merging or reading this partition
+            # Listed under the lock, so files another process already merged are not merged again.
+            files = self._partition_files(task, semester)
+            appended = [f for f in files if f.startswith("part-")]
+            if len(appended) > COMPACT_AFTER_FILES:
+                self._merge(task, semester, appended, "merged")
+                files = self._partition_files(task, semester)
+            if len(files) > COMPACT_AFTER_FILES:
+                self._merge(task, semester, files, "compact")
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append history_record() rows; one new file per (task, semester) partition touched.
+        """
+        frame = pd.DataFrame.from_records(list(records))
+        if frame.empty:
+            return 0
+        with self._lock:
+            for (task, semester), part in frame.groupby(["task", "semester"], sort=False):
+                self._write_partition(task, int(semester), part)
+                self._auto_compact(task, int(semester))
+        return len(frame)
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite every partition with more than one file into a single roll_no-sorted file.
+        """
+        stats = {"partitions": 0, "files_before": 0, "files_after": 0}
+        with self._lock:
+            for task_dir in sorted(os.listdir(self.root)):
+                if not task_dir.startswith("task="):
+                    continue
+                for sem_dir in sorted(os.listdir(os.path.join(self.root, task_dir))):
+                    task, semester = task_dir.split("=", 1)[1], int(sem_dir.split("=", 1)[1])
+                    with self._partition_lock(task, semester):
+                        files = self._partition_files(task, semester)
+                        stats["partitions"] += 1
+                        stats["files_before"] += len(files)
+                        if len(files) > 1:
+                            self._merge(task, semester, files, "compact")
+                            files = ["compacted"]
+                    stats["files_after"] += len(files)
+        return stats
+
+    # ---- reads ----
+    def _read_locks(self, task: Optional[str], semesters: Optional[Sequence[int]]) -> ExitStack:
+        """
+        Shared locks on every partition a query can touch, taken in sorted order.
+        """
+        wanted = None if semesters is None else {int(s) for s in semesters}
+        stack = ExitStack()
+        for task_dir in sorted(os.listdir(self.root)):
+            if not task_dir.startswith("task=") or (task is not None and task_dir != f"task={task}"):
+                continue
+            for sem_dir in sorted(os.listdir(os.path.join(self.root, task_dir))):
+                if wanted is not None and int(sem_dir.split("=", 1)[1]) not in wanted:
+                    continue
+                stack.enter_context(_file_lock(os.path.join(self.root, task_dir, sem_dir, LOCK_FILE), shared=True))
+        return stack
+
+    def _dataset(self) -> Optional[ds.Dataset]:
+        if not any(d.startswith("task=") for d in os.listdir(self.root)):
+            return None
+        for attempt in range(READ_RETRIES):
+            try:
+                # Temp files are dot-prefixed and skipped, so a vanished file (compaction) raises and is retried.
+                return ds.dataset(self.root, schema=DATASET_SCHEMA, format="parquet", partitioning=PARTITIONING)
+            except FileNotFoundError:
+                if attempt == READ_RETRIES - 1:
+                    raise
+
+    def query(
+        self,
+        task: Optional[str] = None,
+        roll_nos: Optional[Sequence[str]] = None,
+        semesters: Optional[Sequence[int]] = None,
+        since: Optional[float] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Filtered rows; every filter is pushed down to partition pruning or Parquet statistics.
+        """
+        names = columns or SCHEMA.names + ["task", "semester"]
+        if roll_nos is not None and not roll_nos:
+            return pd.DataFrame(columns=names)
+        expr = None
+        conditions = []
+        if task is not None:
+            conditions.append(ds.field("task") == task)
+        if semesters is not None:
+            conditions.append(ds.field("semester").isin([int(s) for s in semesters]))
+        if roll_nos is not None:
+            rolls = [str(r).strip().upper() for r in roll_nos]
+            conditions.append(ds.field("roll_no") == rolls[0] if len(rolls) == 1 else ds.field("roll_no").isin(rolls))
+        if since is not None:
+            conditions.append(ds.field("ts") >= pa.scalar(pd.Timestamp(since, unit="s").floor("ms"), type=pa.timestamp("ms")))
+        for cond in conditions:
+            expr = cond if expr is None else expr & cond
+        # The locks keep reads from seeing a merged file next to its inputs; the
+        # retry covers a partition created after the locks were taken.
+        with self._lock, self._read_locks(task, semesters):
+            dataset = self._dataset()
+            if dataset is None:
+                return pd.DataFrame(columns=names)
+            for attempt in range(READ_RETRIES):
+                try:
+                    return dataset.to_table(columns=names, filter=expr).to_pandas()
+                except FileNotFoundError:
+                    if attempt == READ_RETRIES - 1:
+                        raise
+                    dataset = self._dataset()
+
+    def student_history(self, roll_no: str, task: Optional[str] = None) -> pd.DataFrame:
+        """
+        One student's records, oldest first.
+        """
+        frame = self.query(task=task, roll_nos=[roll_no])
+        return frame.sort_values("ts", kind="stable").reset_index(drop=True)
+
+    def cohort_slice(self, task: str, semesters: Optional[Sequence[int]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.query(task=task, semesters=semesters, columns=columns)
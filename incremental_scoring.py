@@ -0,0 +1,205 @@
+"""
+Incremental re-scoring: only new or changed student profiles are scored again.
+
+A content hash of every (roll number, task) profile is stored with its last
+local and Granite results. On the next run, unchanged profiles are carried
+forward, changed ones are re-scored locally (one vectorized pass), and only
+those are re-sent to Granite.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from cohort_scoring import TASK_COLUMNS, cohort_results, score_cohort
+from granite_client import GraniteSettings, call_granite_for_batch, call_granite_for_cohort
+from granite_executor import DEFAULT_MAX_CONCURRENCY
+
+DEFAULT_STATE_PATH = ".scoring_state.sqlite3"
+# Bump when the local rules change so every stored local result is recomputed.
+LOCAL_RULES_VERSION = "1"
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    try:
+        return float(value)  # 70 and 70.0 (int vs float column) hash the same
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def profile_hash(task: str, profile: Dict[str, Any]) -> str:
+    payload = {"task": task, "profile": {k: _canonical(profile.get(k)) for k in TASK_COLUMNS[task]}}
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def granite_fingerprint(settings: Optional[GraniteSettings]) -> str:
+    """
+    Granite results are only reused if they came from the same model / decoding setup.
+    """
+    if settings is None:
+        return ""
+    return f"{settings.model_id}|greedy={settings.greedy}"
+
+
+class ScoreStateStore:
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS score_state (
+                roll_no TEXT NOT NULL,
+                task TEXT NOT NULL,
+                profile_hash TEXT NOT NULL,
+                local_version TEXT NOT NULL,
+                local_result TEXT,
+                granite_fingerprint TEXT,
+                granite_result TEXT,
+                updated REAL NOT NULL,
+                PRIMARY KEY (roll_no, task)
+            )
+            """
+        )
+
+    def load(self, task: str, roll_nos: List[str]) -> Dict[str, Tuple[Any, ...]]:
+        """
+        roll no -> (profile_hash, local_version, local_result, granite_fingerprint, granite_result)
+        """
+        out: Dict[str, Tuple[Any, ...]] = {}
+        with self._lock:
+            for offset in range(0, len(roll_nos), 500):
+                part = roll_nos[offset : offset + 500]
+                placeholders = ",".join("?" * len(part))
+                for row in self._conn.execute(
+                    "SELECT roll_no, profile_hash, local_version, local_result, granite_fingerprint, granite_result "
+                    f"FROM score_state WHERE task = ? AND roll_no IN ({placeholders})",
+                    [task, *part],
+                ):
+                    out[row[0]] = (
+                        row[1],
+                        row[2],
+                        json.loads(row[3]) if row[3] else None,
+                        row[4] or "",
+                        json.loads(row[5]) if row[5] else None,
+                    )
+        return out
+
+    def save(self, task: str, rows: List[Tuple[str, str, Any, str, Any]]):
+        """
+        rows: (roll_no, profile_hash, local_result, granite_fingerprint, granite_result)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO score_state "
+                "(roll_no, task, profile_hash, local_version, local_result, granite_fingerprint, granite_result, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        roll,
+                        task,
+                        h,
+                        LOCAL_RULES_VERSION,
+                        json.dumps(local, default=str),
+                        fp,
+                        json.dumps(granite, default=str) if granite is not None else None,
+                        now,
+                    )
+                    for roll, h, local, fp, granite in rows
+                ],
+            )
+            self._conn.execute("COMMIT")
+
+
+def rescore_incremental(
+    store: ScoreStateStore,
+    task: str,
+    profiles: Dict[str, Dict[str, Any]],
+    granite: Optional[GraniteSettings] = None,
+    batch_size: int = 10,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    rate_per_sec: Optional[float] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, int]]:
+    """
+    Score roll no -> profile, reusing stored results for unchanged profiles.
+    Changed profiles go to Granite in batches of batch_size, or one call each
+    over max_concurrency workers at rate_per_sec when batch_size is 1.
+
+    Returns (roll no -> {"local": result, "granite": result or None, "granite_error": str},
+    stats with total / skipped / rescored_local / sent_to_granite / new / changed).
+    """
+    rolls = list(profiles)
+    hashes = {r: profile_hash(task, profiles[r]) for r in rolls}
+    previous = store.load(task, rolls)
+    fingerprint = granite_fingerprint(granite)
+
+    stats = {"total": len(rolls), "skipped": 0, "rescored_local": 0, "sent_to_granite": 0, "new": 0, "changed": 0}
+    results: Dict[str, Dict[str, Any]] = {}
+    needs_local: List[str] = []
+    needs_granite: List[str] = []
+    kept_granite: Dict[str, Tuple[str, Any]] = {}  # local-only runs keep earlier Granite answers
+    for r in rolls:
+        prev = previous.get(r)
+        if prev is None:
+            stats["new"] += 1
+        elif prev[0] != hashes[r]:
+            stats["changed"] += 1
+        same_profile = prev is not None and prev[0] == hashes[r]
+        if granite is None and same_profile:
+            kept_granite[r] = (prev[3], prev[4])
+
+        local_ok = same_profile and prev[1] == LOCAL_RULES_VERSION and prev[2] is not None
+        granite_ok = granite is None or (same_profile and prev[3] == fingerprint and prev[4] is not None)
+        results[r] = {
+            "local": prev[2] if local_ok else None,
+            "granite": prev[4] if (granite is not None and granite_ok) else None,
+            "granite_error": "",
+        }
+        if not local_ok:
+            needs_local.append(r)
+        if not granite_ok:
+            needs_granite.append(r)
+        if local_ok and granite_ok:
+            stats["skipped"] += 1
+
+    if needs_local:
+        frame = pd.DataFrame.from_records([profiles[r] for r in needs_local], columns=TASK_COLUMNS[task])
+        for r, result in zip(needs_local, cohort_results(task, score_cohort(task, frame))):
+            results[r]["local"] = result
+        stats["rescored_local"] = len(needs_local)
+
+    if needs_granite:
+        pending = {r: profiles[r] for r in needs_granite}
+        if batch_size > 1:
+            answers = call_granite_for_batch(granite, task, pending, batch_size=batch_size)
+        else:
+            answers = call_granite_for_cohort(
+                granite, task, pending, max_concurrency=max_concurrency, rate_per_sec=rate_per_sec
+            )
+        for r in needs_granite:
+            parsed, err = answers.get(r, (None, "No Granite result."))
+            results[r]["granite"] = parsed
+            results[r]["granite_error"] = err
+        stats["sent_to_granite"] = len(needs_granite)
+
+    changed = set(needs_local) | set(needs_granite)
+    store.save(
+        task,
+        [
+            (r, hashes[r], results[r]["local"], *kept_granite.get(r, (fingerprint, results[r]["granite"])))
+            for r in rolls
+            if r in changed
+        ],
+    )
+    return results, stats
@@ -0,0 +1,102 @@
+"""
+Incremental JSON object extraction for streamed Granite output.
+
+The scanner keeps its brace/string state between chunks, so every character
+is looked at once. As soon as the first complete top-level {...} object that
+parses and carries the expected keys closes, the caller can stop consuming
+the stream – no tokens are spent on trailing chatter.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+SCHEMA_KEYS = ("risk_level", "summary")
+
+
+class IncrementalJSONExtractor:
+    def __init__(self, required_keys: Sequence[str] = SCHEMA_KEYS):
+        self.required_keys = tuple(required_keys)
+        self._pos = 0  # characters consumed so far
+        self._depth = 0
+        self._start: Optional[int] = None
+        self._in_string = False
+        self._escaped = False
+        self._text = ""
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return self._text
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """
+        Consume the next chunk; returns the first schema-matching object once it closes.
+        """
+        if not chunk:
+            return None
+        self._text += chunk
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                # Quotes only matter inside an object; stray prose quotes are ignored.
+                self._in_string = self._depth > 0
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0 and self._start is not None:
+                    candidate = self._parse(text[self._start : i + 1])
+                    self._start = None
+                    if candidate is not None:
+                        self._pos = i + 1
+                        return candidate
+        self._pos = len(text)
+        return None
+
+    def _parse(self, segment: str) -> Optional[Dict[str, Any]]:
+        try:
+            parsed = json.loads(segment)
+        except Exception:
+            return None
+        if isinstance(parsed, dict) and all(k in parsed for k in self.required_keys):
+            return parsed
+        return None
+
+
+def consume_until_json(
+    chunks: Iterable[str],
+    required_keys: Sequence[str] = SCHEMA_KEYS,
+    on_text: Optional[Callable[[str], None]] = None,
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Read a text stream until the first complete schema-matching object.
+    The underlying generator is closed on early stop so the HTTP stream is released.
+    Returns (parsed or None, text consumed).
+    """
+    extractor = IncrementalJSONExtractor(required_keys)
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if not isinstance(chunk, str):
+                chunk = str(chunk)
+            parsed = extractor.feed(chunk)
+            if on_text:
+                on_text(extractor.text)
+            if parsed is not None:
+                return parsed, extractor.text
+    finally:
+        close = getattr(iterator, "close", None)
+        if close:
+            close()
+    return None, extractor.text
@@ -0,0 +1,384 @@
+"""
+Hybrid local / Granite routing.
+
+A small multinomial logistic regression per task (NumPy, full-batch gradient
+descent) is trained on the analytics history to predict the level Granite
+would return. Its probabilities are calibrated with temperature scaling on a
+calibration split, and a per-task confidence threshold is chosen on that split
+so that profiles answered locally agree with Granite at least
+`target_accuracy` of the time. Everything below the threshold escalates to
+call_granite_for_task, so clear-cut profiles no longer pay a watsonx.ai
+round trip.
+
+Reported accuracy is always out of sample: train_router scores a third test
+split it never fitted or calibrated on, and the saved router keeps the keys of
+its fitted profiles so escalation_report can leave them out later.
+
+Features are the task's profile fields scaled to the widget ranges plus a
+one-hot of the rule-based level, so the model starts from the Demo Mode
+rules and learns where Granite disagrees with them.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cohort_ingest import COLUMN_RULES
+from cohort_scoring import (
+    DROPOUT_LEVELS,
+    DROPOUT_MESSAGES,
+    EXAM_LEVELS,
+    EXAM_MESSAGES,
+    EXAM_SUMMARY_SUFFIX,
+    PLACEMENT_LEVELS,
+    PLACEMENT_MESSAGES,
+    score_profile,
+)
+from granite_client import GraniteSettings, call_granite_for_task
+from history_store import HistoryStore
+from metrics import inc
+from prompt_templates import GRANITE_TASKS
+
+DEFAULT_ROUTER_DIR = os.getenv("ROUTER_DIR", ".local_router")
+DEFAULT_TARGET_ACCURACY = 0.95
+LOCAL_ROUTER_MODEL_ID = "local-router"
+LOCAL_MODEL_IDS = ("local-rules", LOCAL_ROUTER_MODEL_ID)
+MIN_TRAINING_ROWS = 50
+
+# task -> (levels, messages, summary suffix) of the rule-based scorer
+TASK_LEVEL_TABLES: Dict[str, Tuple[np.ndarray, np.ndarray, str]] = {
+    "dropout": (DROPOUT_LEVELS, DROPOUT_MESSAGES, ""),
+    "placement": (PLACEMENT_LEVELS, PLACEMENT_MESSAGES, ""),
+    "exam": (EXAM_LEVELS, EXAM_MESSAGES, EXAM_SUMMARY_SUFFIX),
+}
+
+
+def _norm_label(label: Any) -> str:
+    return "".join(ch for ch in str(label or "").lower() if ch.isalnum())
+
+
+def canonical_level(task: str, label: Any) -> Optional[str]:
+    """
+    Map a Granite level ("tier 1", "HIGH", "Not Ready") onto the task's level names; None if unknown.
+    """
+    wanted = _norm_label(label)
+    for level in TASK_LEVEL_TABLES[task][0]:
+        if _norm_label(level) == wanted:
+            return str(level)
+    return None
+
+
+def feature_matrix(task: str, profiles: Sequence[Dict[str, Any]]) -> np.ndarray:
+    rules = COLUMN_RULES[task]
+    levels = TASK_LEVEL_TABLES[task][0]
+    n = len(profiles)
+    out = np.zeros((n, len(rules) + len(levels)), dtype=np.float64)
+    for j, (name, (lo, hi, _)) in enumerate(rules.items()):
+        col = np.fromiter((float(p.get(name, lo) or 0.0) for p in profiles), dtype=np.float64, count=n)
+        out[:, j] = (np.clip(col, lo, hi) - lo) / (hi - lo)
+    level_index = {str(level): i for i, level in enumerate(levels)}
+    for i, p in enumerate(profiles):
+        out[i, len(rules) + level_index[str(score_profile(task, p)["risk_level"])]] = 1.0
+    return out
+
+
+def profile_key(profile: Dict[str, Any]) -> int:
+    """
+    Stable 63-bit key of a profile, used to recognise rows a router was fitted on.
+    """
+    payload = json.dumps(profile, sort_keys=True, default=str).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _with_bias(X: np.ndarray) -> np.ndarray:
+    return np.hstack([X, np.ones((len(X), 1))])
+
+
+def fit_softmax(X: np.ndarray, y: np.ndarray, k: int, l2: float = 1e-3, lr: float = 0.5, epochs: int = 800) -> np.ndarray:
+    """
+    Weights (d + 1, k) of a multinomial logistic regression; bias is the last row.
+    """
+    Xb = _with_bias(X)
+    W = np.zeros((Xb.shape[1], k))
+    Y = np.eye(k)[y]
+    for _ in range(epochs):
+        grad = Xb.T @ (_softmax(Xb @ W) - Y) / len(Xb)
+        grad[:-1] += l2 * W[:-1]
+        W -= lr * grad
+    return W
+
+
+def fit_temperature(logits: np.ndarray, y: np.ndarray) -> float:
+    """
+    Temperature minimising held-out negative log-likelihood (grid search).
+    """
+    best_t, best_nll = 1.0, np.inf
+    for t in np.geomspace(0.25, 4.0, 41):
+        p = _softmax(logits / t)[np.arange(len(y)), y]
+        nll = -np.log(np.clip(p, 1e-12, None)).mean()
+        if nll < best_nll:
+            best_t, best_nll = float(t), nll
+    return best_t
+
+
+def choose_threshold(confidence: np.ndarray, correct: np.ndarray, target_accuracy: float) -> float:
+    """
+    Lowest confidence cut-off whose accepted set is still at least target_accuracy correct.
+    Returns a value above 1 (always escalate) when no cut-off reaches the target.
+    """
+    order = np.argsort(-confidence, kind="stable")
+    running = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+    ok = np.nonzero(running >= target_accuracy)[0]
+    if not len(ok):
+        return 1.01
+    return float(confidence[order][ok[-1]])
+
+
+class TaskRouter:
+    def __init__(
+        self,
+        task: str,
+        classes: List[str],
+        weights: np.ndarray,
+        temperature: float,
+        threshold: float,
+        fitted_keys: Optional[np.ndarray] = None,
+    ):
+        self.task = task
+        self.classes = classes
+        self.weights = weights
+        self.temperature = temperature
+        self.threshold = threshold
+        # profile_key() of every train / calibration profile; excluded from reports
+        self.fitted_keys = np.zeros(0, dtype=np.int64) if fitted_keys is None else np.asarray(fitted_keys, dtype=np.int64)
+
+    def unseen(self, profiles: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Boolean mask of profiles the router was neither fitted nor calibrated on.
+        """
+        keys = np.fromiter((profile_key(p) for p in profiles), dtype=np.int64, count=len(profiles))
+        return ~np.isin(keys, self.fitted_keys)
+
+    def predict(self, profiles: Sequence[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+        """
+        (predicted levels, calibrated confidence) for each profile.
+        """
+        logits = _with_bias(feature_matrix(self.task, profiles)) @ self.weights
+        proba = _softmax(logits / self.temperature)
+        best = proba.argmax(axis=1)
+        return [self.classes[i] for i in best], proba[np.arange(len(best)), best]
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.task}.npz")
+        meta = {"classes": self.classes, "temperature": self.temperature, "threshold": self.threshold}
+        with open(path + ".tmp", "wb") as fh:
+            np.savez(fh, weights=self.weights, fitted=self.fitted_keys, meta=np.array(json.dumps(meta)))
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, task: str, directory: str) -> Optional["TaskRouter"]:
+        path = os.path.join(directory, f"{task}.npz")
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            fitted = data["fitted"] if "fitted" in data.files else None
+            return cls(task, meta["classes"], data["weights"], meta["temperature"], meta["threshold"], fitted)
+
+
+def training_data(history: HistoryStore, task: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Granite-scored profiles from the history (latest result per student and profile).
+    """
+    frame = history.query(task=task, columns=["ts", "roll_no", "model_id", "risk_level", "profile"])
+    frame = frame[~frame["model_id"].isin(LOCAL_MODEL_IDS)]
+    frame = frame.sort_values("ts", kind="stable").drop_duplicates(["roll_no", "profile"], keep="last")
+    profiles, labels = [], []
+    for profile_json, level in zip(frame["profile"], frame["risk_level"]):
+        label = canonical_level(task, level)
+        profile = json.loads(profile_json or "{}")
+        if label is None or not all(c in profile for c in COLUMN_RULES[task]):
+            continue
+        profiles.append(profile)
+        labels.append(label)
+    return profiles, labels
+
+
+def evaluate(router: TaskRouter, profiles: Sequence[Dict[str, Any]], labels: Sequence[str]) -> Dict[str, Any]:
+    """
+    Escalation rate and agreement with Granite-only scoring on labelled profiles.
+    Escalated profiles are answered by Granite, so they count as agreeing.
+    """
+    n = len(profiles)
+    if not n:
+        return {"rows": 0}
+    predicted, confidence = router.predict(profiles)
+    truth = np.array(labels, dtype=object)
+    local = confidence >= router.threshold
+    correct = np.array(predicted, dtype=object) == truth
+    rules = np.array([str(score_profile(router.task, p)["risk_level"]) for p in profiles], dtype=object) == truth
+    return {
+        "rows": n,
+        "threshold": round(router.threshold, 4),
+        "temperature": round(router.temperature, 3),
+        "escalation_rate": round(1 - local.mean(), 4),
+        "granite_calls_saved": int(local.sum()),
+        "local_accuracy": round(float(correct[local].mean()), 4) if local.any() else None,
+        "hybrid_accuracy": round(float((correct | ~local).mean()), 4),
+        "model_only_accuracy": round(float(correct.mean()), 4),
+        "rules_accuracy": round(float(rules.mean()), 4),
+    }
+
+
+def train_router(
+    task: str,
+    profiles: Sequence[Dict[str, Any]],
+    labels: Sequence[str],
+    target_accuracy: float = DEFAULT_TARGET_ACCURACY,
+    holdout: float = 0.25,
+    test: float = 0.2,
+    seed: int = 0,
+) -> Tuple[TaskRouter, Dict[str, Any]]:
+    """
+    Fit on one split, calibrate and pick the threshold on a second (`holdout`),
+    and evaluate on a third (`test`) that neither step has seen.
+    Rows are split by profile_key, so identical profiles (the same inputs
+    scored for several students) always land in the same split.
+    Returns the router and its test-split evaluation.
+    """
+    keys = np.array([profile_key(p) for p in profiles], dtype=np.int64)
+    unique_keys, group = np.unique(keys, return_inverse=True)
+    if len(unique_keys) < MIN_TRAINING_ROWS:
+        raise ValueError(
+            f"Need at least {MIN_TRAINING_ROWS} distinct Granite-scored '{task}' profiles, have {len(unique_keys)}."
+        )
+    classes = [str(level) for level in TASK_LEVEL_TABLES[task][0]]
+    y = np.array([classes.index(label) for label in labels])
+    X = feature_matrix(task, profiles)
+    # Position of each row's profile in a shuffled list of distinct profiles.
+    position = np.argsort(np.random.default_rng(seed).permutation(len(unique_keys)))[group]
+    n_test = max(1, int(len(unique_keys) * test))
+    n_held = max(1, int(len(unique_keys) * holdout))
+    tested = np.flatnonzero(position < n_test)
+    held = np.flatnonzero((position >= n_test) & (position < n_test + n_held))
+    train = np.flatnonzero(position >= n_test + n_held)
+
+    weights = fit_softmax(X[train], y[train], len(classes))
+    logits = _with_bias(X[held]) @ weights
+    temperature = fit_temperature(logits, y[held])
+    proba = _softmax(logits / temperature)
+    confidence = proba.max(axis=1)
+    threshold = choose_threshold(confidence, proba.argmax(axis=1) == y[held], target_accuracy)
+
+    fitted = np.unique(keys[np.concatenate([train, held])])
+    router = TaskRouter(task, classes, weights, temperature, threshold, fitted)
+    report = evaluate(router, [profiles[i] for i in tested], [labels[i] for i in tested])
+    report.update(
+        {
+            "task": task,
+            "train_rows": int(len(train)),
+            "calibration_rows": int(len(held)),
+            "target_accuracy": target_accuracy,
+        }
+    )
+    return router, report
+
+
+def local_result(task: str, profile: Dict[str, Any], level: str, confidence: float) -> Dict[str, Any]:
+    """
+    Rule-based result dict with the router's level (and that level's summary) swapped in.
+    """
+    result = score_profile(task, profile)
+    if str(result["risk_level"]) != level:
+        levels, messages, suffix = TASK_LEVEL_TABLES[task]
+        result["risk_level"] = level
+        result["summary"] = messages[[str(x) for x in levels].index(level)] + suffix
+    result["routed"] = "local"
+    result["confidence"] = round(float(confidence), 4)
+    return result
+
+
+class HybridRouter:
+    """
+    Per-task routers loaded lazily from disk. Tasks without a trained router always escalate.
+    A router is reloaded when its .npz changes, so retraining takes effect without a restart.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ROUTER_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # task -> (.npz mtime_ns or None when absent, router)
+        self._routers: Dict[str, Tuple[Optional[int], Optional[TaskRouter]]] = {}
+
+    def router(self, task: str) -> Optional[TaskRouter]:
+        try:
+            mtime = os.stat(os.path.join(self.directory, f"{task}.npz")).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with self._lock:
+            cached = self._routers.get(task)
+            if cached is None or cached[0] != mtime:
+                cached = self._routers[task] = (mtime, TaskRouter.load(task, self.directory) if mtime else None)
+            return cached[1]
+
+    def route(self, task: str, profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        A local result when the router is confident enough, else None (escalate).
+        """
+        router = self.router(task)
+        if router is None:
+            return None
+        (level,), confidence = router.predict([profile])
+        if confidence[0] < router.threshold:
+            return None
+        return local_result(task, profile, level, confidence[0])
+
+    def call(
+        self,
+        settings: GraniteSettings,
+        task: str,
+        profile: Dict[str, Any],
+        cancel: Optional[threading.Event] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Drop-in for call_granite_for_task keyed by task ("dropout" / "placement" / "exam").
+        """
+        result = self.route(task, profile)
+        if result is not None:
+            inc("router_local_total", task=task)
+            return result, ""
+        inc("router_escalated_total", task=task)
+        spec = GRANITE_TASKS[task]
+        return call_granite_for_task(settings, spec["task_name"], profile, spec["extra_instructions"], cancel=cancel)
+
+
+def escalation_report(history: HistoryStore, directory: str = DEFAULT_ROUTER_DIR) -> pd.DataFrame:
+    """
+    evaluate() of every trained router against the Granite-scored history it was
+    not fitted or calibrated on (its test split plus anything scored since), one row per task.
+    """
+    rows = []
+    routers = HybridRouter(directory)
+    for task in TASK_LEVEL_TABLES:
+        router = routers.router(task)
+        if router is None:
+            continue
+        profiles, labels = training_data(history, task)
+        unseen = router.unseen(profiles)
+        report = evaluate(
+            router, [p for p, u in zip(profiles, unseen) if u], [lab for lab, u in zip(labels, unseen) if u]
+        )
+        rows.append({"task": task, **report, "fitted_rows_excluded": int((~unseen).sum())})
+    return pd.DataFrame(rows)
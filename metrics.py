@@ -0,0 +1,219 @@
+"""
+Hot-path timing spans and counters (prompt build, Granite generation, JSON
+extraction, dashboard rendering, PDF generation; tokens and cache hits).
+
+Process-wide and thread-safe. Stage durations go into fixed-bucket
+histograms, with a window of recent samples kept for the sidebar's
+percentiles. Export with prometheus_text() or stream every span as a JSON
+line by setting METRICS_JSONL=/path/to/metrics.jsonl (one handle stays open;
+lines are flushed at least every JSONL_FLUSH_SECONDS and at exit).
+
+    with span("extract_json"):
+        parsed = extract_json_from_text(text)
+    inc("granite_cache_hits_total")
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+# Histogram upper bounds in seconds (Prometheus "le" buckets).
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+RECENT_SAMPLES = 512
+JSONL_FLUSH_SECONDS = 1.0
+
+STAGES = ("prompt_build", "generate_text", "extract_json", "render", "generate_pdf")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.recent: Deque[float] = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Metrics:
+    def __init__(self, jsonl_path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.jsonl_path = jsonl_path
+        # The sink has its own lock so file writes never hold up inc() / observe().
+        self._sink_lock = threading.Lock()
+        self._sink = None
+        self._sink_path: Optional[str] = None
+        self._last_flush = 0.0
+
+    def inc(self, name: str, value: float = 1.0, **labels: Any):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, stage: str, seconds: float, **labels: Any):
+        key = (stage, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(seconds)
+        if self.jsonl_path:
+            self._write_line({"ts": time.time(), "stage": stage, "seconds": round(seconds, 6), **labels})
+
+    @contextmanager
+    def span(self, stage: str, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def record(self, event: str, **fields: Any):
+        """
+        One structured event (e.g. per-call token usage); only written to the JSON-lines sink.
+        """
+        if self.jsonl_path:
+            self._write_line({"ts": time.time(), "event": event, **fields})
+
+    def _write_line(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + "\n"
+        with self._sink_lock:
+            if self._sink is None or self._sink_path != self.jsonl_path:
+                if self._sink is not None:
+                    self._sink.close()
+                if self._sink_path is None:
+                    atexit.register(self.close)
+                self._sink = open(self.jsonl_path, "a", encoding="utf-8")
+                self._sink_path = self.jsonl_path
+            self._sink.write(line)
+            now = time.monotonic()
+            if now - self._last_flush >= JSONL_FLUSH_SECONDS:
+                self._sink.flush()
+                self._last_flush = now
+
+    def close(self):
+        """
+        Flush and close the JSON-lines sink (reopened by the next write).
+        """
+        with self._sink_lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # ---- export ----
+    def summary(self) -> Dict[str, Any]:
+        """
+        {"stages": {stage: {count, mean_ms, p50_ms, p95_ms}}, "counters": {name: value},
+         "tokens_per_call": {task: {"prompt": avg, "completion": avg}}}
+        (labels folded together; used by the dashboard sidebar and /metrics).
+        """
+        with self._lock:
+            merged: Dict[str, List[Histogram]] = {}
+            for (stage, _), hist in self.histograms.items():
+                merged.setdefault(stage, []).append(hist)
+            stages = {}
+            for stage, hists in merged.items():
+                count = sum(h.count for h in hists)
+                recent = Histogram()
+                for h in hists:
+                    recent.recent.extend(h.recent)
+                stages[stage] = {
+                    "count": count,
+                    "mean_ms": round(1000 * sum(h.total for h in hists) / count, 2) if count else 0.0,
+                    "p50_ms": round(1000 * recent.percentile(50), 2),
+                    "p95_ms": round(1000 * recent.percentile(95), 2),
+                }
+            counters: Dict[str, float] = {}
+            by_task: Dict[str, Dict[str, float]] = {}
+            for (name, labels), value in self.counters.items():
+                counters[name] = counters.get(name, 0.0) + value
+                task = dict(labels).get("task")
+                if task:
+                    totals = by_task.setdefault(task, {})
+                    totals[name] = totals.get(name, 0.0) + value
+        tokens_per_call = {
+            task: {
+                "prompt": round(c.get("granite_input_tokens_total", 0.0) / c["granite_calls_total"], 1),
+                "completion": round(c.get("granite_generated_tokens_total", 0.0) / c["granite_calls_total"], 1),
+            }
+            for task, c in by_task.items()
+            if c.get("granite_calls_total")
+        }
+        return {"stages": stages, "counters": counters, "tokens_per_call": tokens_per_call}
+
+    def prometheus_text(self, prefix: str = "scet_") -> str:
+        lines: List[str] = []
+        with self._lock:
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                for (n, labels), value in sorted(self.counters.items()):
+                    if n == name:
+                        lines.append(f"{prefix}{name}{_fmt_labels(labels)} {value:g}")
+            if self.histograms:
+                metric = f"{prefix}stage_duration_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for (stage, labels), hist in sorted(self.histograms.items()):
+                    base = (("stage", stage),) + labels
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f"{metric}_bucket{_fmt_labels(base, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{metric}_bucket{_fmt_labels(base, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{metric}_sum{_fmt_labels(base)} {hist.total:.6f}")
+                    lines.append(f"{metric}_count{_fmt_labels(base)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: str):
+        """
+        .prom / .txt -> Prometheus text (node_exporter textfile format), otherwise JSON.
+        """
+        with open(path, "w", encoding="utf-8") as fh:
+            if path.endswith((".prom", ".txt")):
+                fh.write(self.prometheus_text())
+            else:
+                json.dump(self.summary(), fh, indent=2)
+
+
+METRICS = Metrics(os.getenv("METRICS_JSONL") or None)
+span = METRICS.span
+inc = METRICS.inc
@@ -0,0 +1,124 @@
+"""
+Width-aware text layout for the PDF report (ReportLab).
+
+Lines are wrapped by measured glyph width, not character count. Each word is
+measured once per (font, size) through a cache and added to a running line
+width, so wrapping is linear in the text length. TextFlow draws wrapped blocks
+top-down and starts a new page whenever the next line would cross the bottom
+margin, so no block can run off the page.
+"""
+
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+@lru_cache(maxsize=65536)
+def text_width(text: str, font: str, size: float) -> float:
+    return stringWidth(text, font, size)
+
+
+def _break_word(word: str, font: str, size: float, max_width: float) -> List[str]:
+    # A single token wider than the line (URLs, IDs): hard-break it by character width.
+    pieces, start, width = [], 0, 0.0
+    for i, ch in enumerate(word):
+        w = text_width(ch, font, size)
+        if width + w > max_width and i > start:
+            pieces.append(word[start:i])
+            start, width = i, 0.0
+        width += w
+    pieces.append(word[start:])
+    return pieces
+
+
+def wrap_text(text: str, font: str, size: float, max_width: float) -> List[str]:
+    """
+    Greedy wrap of `text` into lines no wider than max_width points.
+    """
+    space = text_width(" ", font, size)
+    lines: List[str] = []
+    line: List[str] = []
+    width = 0.0
+    for word in str(text).split():
+        w = text_width(word, font, size)
+        if w > max_width:
+            pieces = _break_word(word, font, size, max_width)
+            if line:
+                lines.append(" ".join(line))
+            lines.extend(pieces[:-1])
+            line, width = [pieces[-1]], text_width(pieces[-1], font, size)
+            continue
+        if line and width + space + w > max_width:
+            lines.append(" ".join(line))
+            line, width = [word], w
+        else:
+            width += (space if line else 0.0) + w
+            line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+class TextFlow:
+    """
+    A cursor over a canvas that paginates. new_page finishes the current page
+    (footer + showPage); the flow then restores its font / colour and
+    continues at `top`.
+    """
+
+    def __init__(self, c, new_page, top: float, bottom: float, left: float, right: float):
+        self.c = c
+        self.new_page = new_page
+        self.top = top
+        self.bottom = bottom
+        self.left = left
+        self.right = right
+        self.y = top
+        self._font = ("Helvetica", 10.0)
+        self._color = None
+
+    def set_style(self, font: str, size: float, color=None):
+        self._font = (font, size)
+        self._color = color
+        self._apply_style()
+
+    def _apply_style(self):
+        self.c.setFont(*self._font)
+        if self._color is not None:
+            self.c.setFillColor(self._color)
+
+    def ensure(self, height: float):
+        """
+        Start a new page unless `height` points still fit above the bottom margin.
+        """
+        if self.y - height < self.bottom:
+            self.new_page()
+            self.y = self.top
+            self._apply_style()  # showPage resets the graphics state
+
+    def skip(self, height: float):
+        self.y -= height
+
+    def line(self, text: str, leading: float, x: Optional[float] = None):
+        self.ensure(leading)
+        self.c.drawString(self.left if x is None else x, self.y, text)
+        self.y -= leading
+
+    def paragraph(self, text: str, leading: float, indent: float = 0.0, bullet: str = ""):
+        """
+        Wrap `text` to the frame width (minus indent and bullet) and draw it line by line.
+        """
+        font, size = self._font
+        x = self.left + indent
+        bullet_width = text_width(bullet, font, size) if bullet else 0.0
+        lines = wrap_text(text, font, size, self.right - x - bullet_width)
+        for i, text_line in enumerate(lines):
+            if bullet and i == 0:
+                self.line(bullet + text_line, leading, x)
+            else:
+                self.line(text_line, leading, x + bullet_width)
+
+    def lines(self, texts: Sequence[str], leading: float, indent: float = 0.0):
+        for text in texts:
+            self.paragraph(text, leading, indent)
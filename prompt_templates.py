@@ -0,0 +1,98 @@
+"""
+Precompiled per-task Granite prompts.
+
+Each template keeps its fixed text (preamble, task, instructions, schema) as two
+prebuilt strings around the profile, so a call only serializes the profile
+(compact JSON, no indentation) and concatenates. Each task also carries its
+own output budget: dropout / placement answers are short, exam forecasts
+need a little more room for the score rationale.
+"""
+
+import json
+from typing import Any, Dict, NamedTuple, Optional
+
+# Task name + instructions sent to Granite for each tab (shared by single and batched calls)
+GRANITE_TASKS: Dict[str, Dict[str, str]] = {
+    "dropout": {
+        "task_name": "Student Dropout Risk Prediction",
+        "extra_instructions": (
+            "Assess how likely this student is to drop out in the next 1–2 semesters. "
+            "Use 'High', 'Medium', or 'Low' in risk_level."
+        ),
+    },
+    "placement": {
+        "task_name": "Placement Success & Company Tier Analysis",
+        "extra_instructions": (
+            "Based on this profile, estimate the most likely placement outcome. "
+            "Use 'Tier-1', 'Tier-2', 'Tier-3', or 'Not ready' in risk_level."
+        ),
+    },
+    "exam": {
+        "task_name": "Final Exam Score Forecasting (with Attendance Credits)",
+        "extra_instructions": (
+            "Predict an approximate final exam score out of 100 for this student. "
+            "Consider internal tests, quizzes, lab performance, overall attendance_percent, "
+            "and attendance_credits (marks awarded for high attendance). "
+            "Put the numeric value (0–100) in predicted_score. "
+            "In risk_level, use 'High', 'Medium', or 'Low' to indicate RISK OF FAILING."
+        ),
+    },
+}
+
+# max_new_tokens per task (a 2–3 sentence summary + 3 recommendations is ~150–220 tokens).
+TASK_MAX_NEW_TOKENS: Dict[str, int] = {"dropout": 256, "placement": 256, "exam": 320}
+DEFAULT_MAX_NEW_TOKENS = 512
+
+PREAMBLE = "You are an academic analytics assistant helping college faculty make data-driven decisions."
+SCHEMA = (
+    'Return ONLY a strict JSON object, no markdown: {"risk_level": string, "predicted_score": number|null, '
+    '"summary": string, "recommendations": [string, string, string]}'
+)
+
+
+def compact_json(profile: Dict[str, Any]) -> str:
+    return json.dumps(profile, separators=(",", ":"), default=str)
+
+
+class PromptTemplate(NamedTuple):
+    task_key: str
+    task_name: str
+    extra_instructions: str
+    head: str
+    tail: str
+    max_new_tokens: int
+
+    def render(self, profile: Dict[str, Any]) -> str:
+        return self.head + compact_json(profile) + self.tail
+
+
+def compile_template(task_key: str, task_name: str, extra_instructions: str = "", max_new_tokens: Optional[int] = None) -> PromptTemplate:
+    head = f"{PREAMBLE}\nTASK: {task_name}\n"
+    if extra_instructions:
+        head += extra_instructions + "\n"
+    head += "STUDENT PROFILE: "
+    return PromptTemplate(
+        task_key=task_key,
+        task_name=task_name,
+        extra_instructions=extra_instructions,
+        head=head,
+        tail="\n" + SCHEMA + "\n",
+        max_new_tokens=max_new_tokens or TASK_MAX_NEW_TOKENS.get(task_key, DEFAULT_MAX_NEW_TOKENS),
+    )
+
+
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    key: compile_template(key, task["task_name"], task["extra_instructions"]) for key, task in GRANITE_TASKS.items()
+}
+_BY_TASK_TEXT = {(t.task_name, t.extra_instructions): t for t in PROMPT_TEMPLATES.values()}
+
+
+def template_for(task_name: str, extra_instructions: str = "") -> PromptTemplate:
+    """
+    Precompiled template for a known task; ad-hoc task text gets a one-off
+    compact template with the default budget.
+    """
+    template = _BY_TASK_TEXT.get((task_name, extra_instructions))
+    if template is not None:
+        return template
+    return compile_template("custom", task_name, extra_instructions, DEFAULT_MAX_NEW_TOKENS)
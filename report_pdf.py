@@ -0,0 +1,230 @@
+"""
+PDF report builder for student analytics results (ReportLab).
+
+Independent of Streamlit so the same renderer serves the dashboard and bulk jobs.
+"""
+
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, Optional, Tuple
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.lib import colors
+
+from attendance_rules import ATTENDANCE_RULES, attendance_code
+from metrics import span
+from pdf_layout import TextFlow
+
+
+LOGO_PATH = "scet_logo.jpg"
+FOOTER_TEXT = "Generated using SCET Student Analytics Dashboard (IBM watsonx.ai – Granite)."
+
+# Parsed once instead of per section / per report.
+HEADER_BG = colors.HexColor("#0f172a")
+INFO_BG = colors.HexColor("#f3f4ff")
+SECTION_BG = colors.HexColor("#1d4ed8")
+TEXT_DARK = colors.HexColor("#111827")
+TEXT_MUTED = colors.HexColor("#374151")
+TEXT_FOOTER = colors.HexColor("#6b7280")
+
+BOTTOM_MARGIN = 80  # footer sits at y=40
+SECTION_KEEP_TOGETHER = 80
+
+HEADER_FORM = "scet_report_header"
+FOOTER_FORM = "scet_report_footer"
+
+
+# --------------
+# Report template: cached logo + header/footer recorded once per document as form XObjects
+# --------------
+@lru_cache(maxsize=8)
+def load_logo(path: str = LOGO_PATH) -> Optional[ImageReader]:
+    """
+    Decode the logo once per process; None if it is missing or unreadable.
+    """
+    try:
+        logo = ImageReader(path)
+        logo.getSize()  # force the decode now so a bad file is cached as None too
+        return logo
+    except Exception:
+        return None
+
+
+def _draw_header(c: canvas.Canvas, width: float, y: float, logo: Optional[ImageReader]):
+    c.setFillColor(HEADER_BG)
+    c.rect(0, y - 40, width, 50, fill=1, stroke=0)
+    c.setFillColor(colors.white)
+    if logo is not None:
+        try:
+            c.drawImage(logo, 40, y - 38, width=90, height=40, preserveAspectRatio=True, mask='auto')
+        except Exception:
+            pass
+    c.setFont("Helvetica-Bold", 15)
+    c.drawString(150, y - 15, "")
+    c.setFont("Helvetica", 10)
+    c.drawString(150, y - 30, "Student Performance & Retention Analytics Report")
+
+
+def _draw_footer(c: canvas.Canvas):
+    c.setFont("Helvetica-Oblique", 8)
+    c.setFillColor(TEXT_FOOTER)
+    c.drawString(40, 40, FOOTER_TEXT)
+
+
+class ReportTemplate:
+    """
+    Static page furniture for one canvas. With reuse=True the header and footer
+    are recorded once as form XObjects and placed by reference on every page;
+    reuse=False redraws them and re-decodes the logo each time (the old
+    behaviour, kept for benchmarking).
+    """
+
+    def __init__(self, c: canvas.Canvas, reuse: bool = True):
+        self.c = c
+        self.reuse = reuse
+        self.width, self.height = A4
+        if reuse:
+            logo = load_logo()
+            c.beginForm(HEADER_FORM)
+            _draw_header(c, self.width, self.height - 60, logo)
+            c.endForm()
+            c.beginForm(FOOTER_FORM)
+            _draw_footer(c)
+            c.endForm()
+
+    def header(self):
+        if self.reuse:
+            self.c.doForm(HEADER_FORM)
+        else:
+            try:
+                logo = ImageReader(LOGO_PATH)
+            except Exception:
+                logo = None
+            _draw_header(self.c, self.width, self.height - 60, logo)
+
+    def end_page(self):
+        if self.reuse:
+            self.c.doForm(FOOTER_FORM)
+        else:
+            self.c.saveState()
+            _draw_footer(self.c)
+            self.c.restoreState()
+        self.c.showPage()
+
+
+@lru_cache(maxsize=None)
+def _attendance_lines_for_code(code: int) -> Tuple[str, ...]:
+    label, msg, _ = ATTENDANCE_RULES[code]
+    return (f"Attendance Eligibility: {label}", msg)
+
+
+def attendance_status_lines(att_percent: Optional[float]):
+    code = attendance_code(att_percent)
+    if code is None:
+        return []
+    return list(_attendance_lines_for_code(code))
+
+
+def render_report_pdf(
+    student_name: str,
+    student_id: str,
+    reports: Dict[str, Dict[str, Any]],
+    reuse_template: bool = True,
+) -> Tuple[Optional[bytes], int]:
+    """
+    Render one student's report. reports: section key ("dropout" / "placement" /
+    "exam") -> {"profile": ..., "result": ...}. Returns (pdf bytes, page count).
+    """
+    if not reports:
+        return None, 0
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    template = ReportTemplate(c, reuse=reuse_template)
+    width, height = A4
+    y = height - 60
+
+    # Header band
+    template.header()
+    y -= 80
+
+    # Student info box
+    c.setFillColor(INFO_BG)
+    c.roundRect(30, y - 40, width - 60, 55, 10, fill=1, stroke=0)
+    c.setFillColor(TEXT_DARK)
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(40, y - 15, f"Student Name: {student_name}")
+    if student_id:
+        c.drawString(300, y - 15, f"Roll No / ID: {student_id}")
+    y -= 70
+
+    flow = TextFlow(c, template.end_page, top=height - 60, bottom=BOTTOM_MARGIN, left=40, right=width - 40)
+    flow.y = y
+
+    sections = [
+        ("Dropout Risk Analysis", "dropout"),
+        ("Placement Readiness", "placement"),
+        ("Exam Performance Forecast", "exam"),
+    ]
+
+    for section_label, key in sections:
+        data = reports.get(key)
+        if not data:
+            continue
+        profile = data.get("profile", {})
+        result = data.get("result", {})
+
+        # Keep the section band together with its first lines.
+        flow.ensure(SECTION_KEEP_TOGETHER)
+        c.setFillColor(SECTION_BG)
+        c.roundRect(30, flow.y - 24, width - 60, 22, 8, fill=1, stroke=0)
+        c.setFillColor(colors.white)
+        c.setFont("Helvetica-Bold", 11)
+        c.drawString(40, flow.y - 10, section_label)
+        flow.skip(32)
+
+        flow.set_style("Helvetica", 10, TEXT_DARK)
+        risk_level = str(result.get("risk_level", "N/A"))
+        pred_score = result.get("predicted_score", None)
+        flow.line(f"Level / Tier: {risk_level}", 14)
+        if pred_score is not None:
+            flow.line(f"Score / Prediction: {pred_score}", 16)
+
+        summary = str(result.get("summary", ""))
+        if summary:
+            flow.set_style("Helvetica-Oblique", 9, TEXT_MUTED)
+            flow.paragraph(summary, 12, indent=10)
+
+        # Attendance eligibility line (for sections that have attendance)
+        att_val = profile.get("attendance_percent") if key in ("dropout", "exam") else None
+        if att_val is not None:
+            lines = attendance_status_lines(att_val)
+            if lines:
+                flow.skip(4)
+                flow.set_style("Helvetica", 9, TEXT_DARK)
+                flow.lines(lines, 11, indent=10)
+
+        recs = result.get("recommendations", []) or []
+        if recs:
+            flow.skip(6)
+            flow.set_style("Helvetica-Bold", 10, TEXT_DARK)
+            flow.line("Recommendations:", 12)
+            flow.set_style("Helvetica", 9, TEXT_DARK)
+            for rec in recs:
+                flow.paragraph(str(rec), 11, indent=10, bullet="- ")
+
+        flow.skip(18)
+
+    template.end_page()
+    pages = c.getPageNumber() - 1
+    c.save()
+    buffer.seek(0)
+    return buffer.getvalue(), pages
+
+
+def build_report_pdf(student_name: str, student_id: str, reports: Dict[str, Dict[str, Any]]) -> Optional[bytes]:
+    with span("generate_pdf"):
+        pdf_bytes, _ = render_report_pdf(student_name, student_id, reports)
+    return pdf_bytes
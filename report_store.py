@@ -0,0 +1,236 @@
+"""
+Per-student report store for the dashboard, keyed by (scope, roll number).
+
+Holds each student's latest section results (dropout / placement / exam) and
+generated PDF. The scope is the dashboard session, so counsellors sharing one
+server never see each other's results for the same roll number. Every write
+goes through to a local SQLite file; a bounded LRU working set (max items and
+max bytes) stays in memory as a read cache and evicted students are read back
+on access. A counsellor can work through hundreds of students in one session
+without the server's memory growing, and nothing is lost on restart.
+
+Every session gets a new scope, so rows not read or written for ttl_seconds
+are swept from disk (at most once per SWEEP_INTERVAL_SECONDS, on write) and
+the file does not grow with every session the server has ever had.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", ".report_store.sqlite3")
+DEFAULT_MAX_ITEMS = 64
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+SWEEP_INTERVAL_SECONDS = 300
+
+
+def _roll_key(roll_no: str) -> str:
+    return str(roll_no).strip().upper()
+
+
+def _key(scope: str, roll_no: str) -> Tuple[str, str]:
+    return str(scope), _roll_key(roll_no)
+
+
+class ReportStore:
+    def __init__(
+        self,
+        path: str = DEFAULT_REPORT_STORE_PATH,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.path = path
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # (scope, roll key) -> {"student_name", "sections", "pdf", "size", "last_access"}
+        self._mem: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._mem_bytes = 0
+        self._last_sweep = 0.0
+        self.writes = 0
+        self.promotions = 0
+        self.expired = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scoped_reports (
+                scope TEXT NOT NULL,
+                roll_no TEXT NOT NULL,
+                student_name TEXT,
+                sections TEXT NOT NULL,
+                pdf BLOB,
+                updated REAL NOT NULL,
+                last_access REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (scope, roll_no)
+            )
+            """
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(scoped_reports)")]
+        if "last_access" not in columns:  # store created before the sweep existed
+            self._conn.execute("ALTER TABLE scoped_reports ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE scoped_reports SET last_access = updated")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scoped_reports_access ON scoped_reports(last_access)")
+
+    # ---- internals (call with the lock held) ----
+    @staticmethod
+    def _size(entry: Dict[str, Any]) -> int:
+        return len(json.dumps(entry["sections"], default=str)) + len(entry["pdf"] or b"")
+
+    def _write(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO scoped_reports (scope, roll_no, student_name, sections, pdf, updated, last_access)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (*key, entry["student_name"], json.dumps(entry["sections"], default=str), entry["pdf"], now, now),
+        )
+        self.writes += 1
+        self._sweep(now)
+
+    def _sweep(self, now: float):
+        if not self.ttl_seconds or now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        self._touch(self._mem.items())
+        cutoff = now - self.ttl_seconds
+        expired = self._conn.execute(
+            "SELECT scope, roll_no FROM scoped_reports WHERE last_access < ?", (cutoff,)
+        ).fetchall()
+        if not expired:
+            return
+        self._conn.execute("DELETE FROM scoped_reports WHERE last_access < ?", (cutoff,))
+        for key in expired:
+            entry = self._mem.pop(tuple(key), None)
+            if entry is not None:
+                self._mem_bytes -= entry["size"]
+        self.expired += len(expired)
+
+    def _evict(self):
+        # Entries are already on disk, so eviction only drops them from memory.
+        # The most recently used entry always stays, even if it alone exceeds max_bytes.
+        while len(self._mem) > 1 and (len(self._mem) > self.max_items or self._mem_bytes > self.max_bytes):
+            key, entry = self._mem.popitem(last=False)
+            self._mem_bytes -= entry["size"]
+            self._touch([(key, entry)])
+
+    def _touch(self, entries):
+        # Reads served from memory only stamp the entry; carry that to disk before the sweep judges age.
+        self._conn.executemany(
+            "UPDATE scoped_reports SET last_access = MAX(last_access, ?) WHERE scope = ? AND roll_no = ?",
+            [(entry["last_access"], *key) for key, entry in entries],
+        )
+
+    def _entry(self, key: Tuple[str, str], create: bool = False) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        entry = self._mem.get(key)
+        if entry is not None:
+            self._mem.move_to_end(key)
+            entry["last_access"] = now
+            return entry
+        row = self._conn.execute(
+            "SELECT student_name, sections, pdf FROM scoped_reports WHERE scope = ? AND roll_no = ?", key
+        ).fetchone()
+        if row is not None:
+            entry = {"student_name": row[0], "sections": json.loads(row[1]), "pdf": row[2]}
+            self._conn.execute(
+                "UPDATE scoped_reports SET last_access = ? WHERE scope = ? AND roll_no = ?", (now, *key)
+            )
+            self.promotions += 1
+        elif create:
+            entry = {"student_name": "", "sections": {}, "pdf": None}
+        else:
+            return None
+        entry["size"] = self._size(entry)
+        entry["last_access"] = now
+        self._mem[key] = entry
+        self._mem_bytes += entry["size"]
+        self._evict()
+        return entry
+
+    def _update(self, key: Tuple[str, str], entry: Dict[str, Any]):
+        self._write(key, entry)
+        size = self._size(entry)
+        self._mem_bytes += size - entry["size"]
+        entry["size"] = size
+        self._evict()
+
+    # ---- public API ----
+    def put_section(
+        self, scope: str, roll_no: str, student_name: str, section: str, profile: Dict[str, Any], result: Dict[str, Any]
+    ):
+        """
+        Store the latest result for one section; a previously generated PDF is now stale and dropped.
+        """
+        key = _key(scope, roll_no)
+        with self._lock:
+            entry = self._entry(key, create=True)
+            entry["student_name"] = student_name or entry["student_name"]
+            entry["sections"][section] = {"profile": profile, "result": result}
+            entry["pdf"] = None
+            self._update(key, entry)
+
+    def sections(self, scope: str, roll_no: str) -> Dict[str, Dict[str, Any]]:
+        """
+        section -> {"profile", "result"} in the shape build_report_pdf expects.
+        """
+        with self._lock:
+            entry = self._entry(_key(scope, roll_no))
+            return dict(entry["sections"]) if entry else {}
+
+    def set_pdf(self, scope: str, roll_no: str, pdf: bytes):
+        key = _key(scope, roll_no)
+        with self._lock:
+            entry = self._entry(key, create=True)
+            entry["pdf"] = pdf
+            self._update(key, entry)
+
+    def get_pdf(self, scope: str, roll_no: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entry(_key(scope, roll_no))
+            return entry["pdf"] if entry else None
+
+    def students(self, scope: str) -> List[Dict[str, Any]]:
+        """
+        Every student stored under `scope`, most recently updated first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT roll_no, student_name, sections FROM scoped_reports WHERE scope = ? ORDER BY updated DESC",
+                (str(scope),),
+            ).fetchall()
+            return [
+                {
+                    "roll_no": roll,
+                    "student_name": name,
+                    "sections": sorted(json.loads(sections)),
+                    "in_memory": (str(scope), roll) in self._mem,
+                }
+                for roll, name, sections in rows
+            ]
+
+    def stats(self, scope: Optional[str] = None) -> Dict[str, int]:
+        """
+        Memory figures are process-wide; on_disk counts `scope` only when given.
+        """
+        with self._lock:
+            if scope is None:
+                on_disk = self._conn.execute("SELECT COUNT(*) FROM scoped_reports").fetchone()[0]
+            else:
+                on_disk = self._conn.execute(
+                    "SELECT COUNT(*) FROM scoped_reports WHERE scope = ?", (str(scope),)
+                ).fetchone()[0]
+            return {
+                "in_memory": len(self._mem),
+                "memory_bytes": self._mem_bytes,
+                "on_disk": int(on_disk),
+                "writes": self.writes,
+                "promotions": self.promotions,
+                "expired": self.expired,
+            }
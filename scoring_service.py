@@ -0,0 +1,345 @@
+"""
+Local HTTP scoring service for other campus systems (LMS, attendance portal).
+
+Endpoints (JSON in / JSON out):
+    POST /v1/dropout             profile dict -> result dict
+    POST /v1/placement           profile dict -> result dict
+    POST /v1/exam                profile dict -> result dict
+    POST /v1/attendance_status   {"attendance_percent": 72} -> {label, message, severity}
+                                 {"attendance_percent": [72, 80, ...]} -> {codes, legend, counts}
+    GET  /healthz
+    GET  /metrics                request / batch counters + stage timings (JSON)
+    GET  /metrics/prometheus     the same in Prometheus text format
+
+Profiles with a missing, non-numeric or out-of-range field get a 400 naming
+the fields, and attendance percentages outside 0-100 get a 400 listing them
+(by index in the bulk form); values are never clipped into range.
+
+Concurrent single-student requests are collected for a short window
+(--window-ms) and scored together: one vectorized local pass, or one batched
+Granite prompt with --granite. Uses only the standard library HTTP server,
+so it runs anywhere the batch CLI runs:
+
+    python scoring_service.py --port 8765 --window-ms 5
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from attendance_rules import CODE_NAMES, attendance_status, classify_attendance, eligibility_counts
+from cohort_ingest import coerce_chunk, field_errors
+from cohort_scoring import TASK_COLUMNS, TASK_RECOMMENDATIONS, score_cohort
+from granite_client import GraniteSettings, call_granite_for_batch, settings_from_env
+from metrics import METRICS, span
+
+DEFAULT_WINDOW_MS = 5.0
+DEFAULT_MAX_BATCH = 256
+DEFAULT_GRANITE_IN_FLIGHT = 4
+
+
+class MicroBatcher:
+    """
+    Collects submitted profiles for up to window_ms (or max_batch items)
+    and scores them in one pass on a background thread.
+
+    Local batches are scored inline by the collector. Granite batches go to a
+    pool with up to max_in_flight batches outstanding, so one slow round trip
+    does not hold up the next batch; when all slots are busy the collector
+    waits and the queue grows into a larger next batch.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        granite: Optional[GraniteSettings] = None,
+        max_in_flight: int = DEFAULT_GRANITE_IN_FLIGHT,
+    ):
+        self.task = task
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.granite = granite
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Tuple[Dict[str, Any], Future]]" = queue.Queue()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if granite is not None:
+            self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+            self._pool = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix=f"granite-{task}")
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{task}", daemon=True)
+        self._thread.start()
+
+    def submit(self, profile: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        self._queue.put((profile, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.items += len(batch)
+            if self._pool is None:
+                self._process(batch)
+                continue
+            self._slots.acquire()
+            self._pool.submit(self._process, batch).add_done_callback(lambda _: self._slots.release())
+
+    def _process(self, batch: List[Tuple[Dict[str, Any], Future]]):
+        try:
+            with span("score_batch", task=self.task):
+                self._score(batch)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _score(self, batch: List[Tuple[Dict[str, Any], Future]]):
+        raw = pd.DataFrame.from_records([p for p, _ in batch], columns=TASK_COLUMNS[self.task])
+        # Reject out-of-range values instead of letting coerce_chunk clip them.
+        errors = field_errors(self.task, raw)
+        for i, problems in errors.items():
+            batch[i][1].set_exception(ValueError("Invalid values: " + "; ".join(problems)))
+        coerced = coerce_chunk(self.task, raw.drop(index=list(errors))).frame
+        if coerced.empty:
+            return
+
+        if self.granite is not None:
+            profiles = {str(i): rec for i, rec in zip(coerced.index, coerced.to_dict("records"))}
+            results = call_granite_for_batch(self.granite, self.task, profiles, batch_size=len(profiles))
+            for i in coerced.index:
+                parsed, err = results[str(i)]
+                future = batch[i][1]
+                if err:
+                    future.set_exception(RuntimeError(err))
+                else:
+                    future.set_result(parsed)
+            return
+
+        scored = score_cohort(self.task, coerced)
+        recs = TASK_RECOMMENDATIONS[self.task]
+        for i, level, score, summary in zip(
+            scored.index, scored["risk_level"].tolist(), scored["predicted_score"].tolist(), scored["summary"].tolist()
+        ):
+            batch[i][1].set_result(
+                {
+                    "risk_level": level,
+                    "predicted_score": score,
+                    "summary": summary,
+                    "recommendations": list(recs),
+                }
+            )
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    server_version = "SCETScoring/1.0"
+    batchers: Dict[str, MicroBatcher] = {}
+    started = time.time()
+    requests_total = 0
+    errors_total = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format: str, *args: Any):
+        pass  # keep the hot path quiet
+
+    def _send(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str, content_type: str):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, error: bool = False):
+        with ScoringHandler._lock:
+            ScoringHandler.requests_total += 1
+            if error:
+                ScoringHandler.errors_total += 1
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send(
+                200,
+                {
+                    "uptime_s": round(time.time() - self.started, 1),
+                    "requests_total": self.requests_total,
+                    "errors_total": self.errors_total,
+                    "batches": {t: b.batches for t, b in self.batchers.items()},
+                    "avg_batch_size": {
+                        t: round(b.items / b.batches, 2) if b.batches else 0.0 for t, b in self.batchers.items()
+                    },
+                    **METRICS.summary(),
+                },
+            )
+        elif self.path == "/metrics/prometheus":
+            lines = [
+                "# TYPE scet_http_requests_total counter",
+                f"scet_http_requests_total {self.requests_total}",
+                "# TYPE scet_http_errors_total counter",
+                f"scet_http_errors_total {self.errors_total}",
+                "# TYPE scet_batches_total counter",
+                *(f'scet_batches_total{{task="{t}"}} {b.batches}' for t, b in self.batchers.items()),
+                "# TYPE scet_batched_items_total counter",
+                *(f'scet_batched_items_total{{task="{t}"}} {b.items}' for t, b in self.batchers.items()),
+            ]
+            self._send_text(200, "\n".join(lines) + "\n" + METRICS.prometheus_text(), "text/plain; version=0.0.4")
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except Exception:
+            self._count(error=True)
+            self._send(400, {"error": "Body must be a JSON object."})
+            return
+        if not isinstance(payload, dict):
+            self._count(error=True)
+            self._send(400, {"error": "Body must be a JSON object."})
+            return
+
+        route = self.path.rstrip("/")
+        if route == "/v1/attendance_status":
+            value = payload.get("attendance_percent")
+            if isinstance(value, list):
+                # Bulk form: compact codes + one copy of each label. Missing values map to "unknown".
+                values = pd.to_numeric(pd.Series(value, dtype=object), errors="coerce").to_numpy(dtype=float)
+                bad = np.flatnonzero((values < 0) | (values > 100))
+                if len(bad):
+                    self._count(error=True)
+                    self._send(
+                        400,
+                        {
+                            "error": "attendance_percent values must be within 0-100.",
+                            "invalid": [{"index": int(i), "value": value[i]} for i in bad[:100]],
+                        },
+                    )
+                    return
+                codes = classify_attendance(values)
+                self._count()
+                self._send(
+                    200,
+                    {
+                        "codes": codes.tolist(),
+                        "legend": {str(c): CODE_NAMES[c] for c in CODE_NAMES},
+                        "counts": eligibility_counts(codes),
+                    },
+                )
+                return
+            status = attendance_status(value)
+            if status is None:
+                self._count(error=True)
+                self._send(400, {"error": "attendance_percent must be a number."})
+                return
+            if not 0 <= float(value) <= 100:
+                self._count(error=True)
+                self._send(400, {"error": f"attendance_percent {value} is outside 0-100."})
+                return
+            label, msg, severity = status
+            self._count()
+            self._send(200, {"label": label, "message": msg, "severity": severity})
+            return
+
+        task = route.rsplit("/", 1)[-1] if route.startswith("/v1/") else ""
+        batcher = self.batchers.get(task)
+        if batcher is None:
+            self._count(error=True)
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            result = batcher.submit(payload).result(timeout=120)
+        except ValueError as e:
+            self._count(error=True)
+            self._send(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self._count(error=True)
+            self._send(502, {"error": str(e)})
+            return
+        self._count()
+        self._send(200, result)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The socketserver default backlog of 5 drops connections under bursts,
+    # which clients see as resets or ~1 s SYN retransmits.
+    request_queue_size = 128
+
+
+def build_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    window_ms: float = DEFAULT_WINDOW_MS,
+    max_batch: int = DEFAULT_MAX_BATCH,
+    granite: Optional[GraniteSettings] = None,
+    max_in_flight: int = DEFAULT_GRANITE_IN_FLIGHT,
+) -> ThreadingHTTPServer:
+    ScoringHandler.batchers = {
+        task: MicroBatcher(task, window_ms, max_batch, granite, max_in_flight) for task in TASK_COLUMNS
+    }
+    server = ScoringServer((host, port), ScoringHandler)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SCET Student Analytics – local scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS, help="Micro-batching window.")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--granite", action="store_true", help="Score with batched Granite prompts instead of local rules.")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=DEFAULT_GRANITE_IN_FLIGHT,
+        help="Granite batches per task awaiting a response at once (--granite only).",
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    granite = settings_from_env() if args.granite else None
+    max_batch = min(args.max_batch, 10) if granite else args.max_batch
+    server = build_server(args.host, args.port, args.window_ms, max_batch, granite, args.max_in_flight)
+    print(f"Scoring service on http://{args.host}:{args.port} (window {args.window_ms} ms, max batch {max_batch})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+"Similar students" search backed by FAISS.
+
+Each task's profile fields are min-max normalized (using the dashboard
+widget ranges) into float32 vectors and kept in a FAISS index keyed by a
+stable 63-bit id derived from the roll number. Small cohorts use exact flat
+search; past IVF_THRESHOLD vectors the index is rebuilt as IVF so queries
+stay in the millisecond range at a million records. Adds and removes are
+incremental, and the index plus roll-number/outcome metadata persist to disk.
+
+Updates only mark the index dirty. A maintenance thread writes dirty indexes
+every SAVE_INTERVAL_SECONDS (and once more at exit) and does the IVF rebuild,
+training on a snapshot outside the lock, so neither runs inside a request.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import faiss
+import numpy as np
+
+from cohort_ingest import COLUMN_RULES
+from metrics import inc
+
+DEFAULT_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", ".similarity_index")
+IVF_THRESHOLD = 50_000
+DEFAULT_NPROBE = 16
+SAVE_INTERVAL_SECONDS = float(os.getenv("SIMILARITY_SAVE_INTERVAL", "30"))
+
+
+def roll_to_id(roll_no: str) -> int:
+    """
+    Stable non-negative int64 id for a roll number.
+    """
+    digest = hashlib.blake2b(str(roll_no).strip().upper().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def profile_vectors(task: str, profiles: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Normalize profiles to [0, 1] per field (widget range) as a float32 matrix.
+    """
+    rules = COLUMN_RULES[task]
+    out = np.empty((len(profiles), len(rules)), dtype=np.float32)
+    for j, (name, (lo, hi, _)) in enumerate(rules.items()):
+        col = np.fromiter((float(p.get(name, lo) or 0.0) for p in profiles), dtype=np.float32, count=len(profiles))
+        out[:, j] = (np.clip(col, lo, hi) - lo) / (hi - lo)
+    return out
+
+
+class SimilarityIndex:
+    """
+    One FAISS index per task with a SQLite side table (id -> roll no, outcome).
+    """
+
+    def __init__(self, task: str, index_dir: str = DEFAULT_INDEX_DIR, nprobe: int = DEFAULT_NPROBE):
+        self.task = task
+        self.dim = len(COLUMN_RULES[task])
+        self.nprobe = nprobe
+        os.makedirs(index_dir, exist_ok=True)
+        self.index_path = os.path.join(index_dir, f"{task}.faiss")
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._stop = threading.Event()
+        self._maintainer: Optional[threading.Thread] = None
+        self._meta = sqlite3.connect(
+            os.path.join(index_dir, f"{task}.meta.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self._meta.execute("PRAGMA journal_mode=WAL")
+        self._meta.execute(
+            "CREATE TABLE IF NOT EXISTS students (id INTEGER PRIMARY KEY, roll_no TEXT NOT NULL, outcome TEXT)"
+        )
+        if os.path.exists(self.index_path):
+            self.index = faiss.read_index(self.index_path)
+        else:
+            self.index = self._flat_index()
+        self._set_nprobe()
+
+    # ---- index construction ----
+    def _flat_index(self) -> faiss.Index:
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(self.dim))
+
+    def _ivf_index(self, train: np.ndarray) -> faiss.Index:
+        nlist = int(min(4096, max(64, 4 * np.sqrt(len(train)))))
+        quantizer = faiss.IndexFlatL2(self.dim)
+        ivf = faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_L2)
+        ivf.train(train)
+        # Hashtable direct map: arbitrary 63-bit ids with remove_ids() + reconstruct().
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return ivf
+
+    def _set_nprobe(self):
+        ivf = faiss.try_extract_index_ivf(self.index)
+        if ivf is not None:
+            ivf.nprobe = self.nprobe
+
+    @property
+    def is_ivf(self) -> bool:
+        return faiss.try_extract_index_ivf(self.index) is not None
+
+    def _all_vectors(self):
+        # Flat IndexIDMap2: id_map[i] is the id of the i-th stored vector.
+        ids = faiss.vector_to_array(self.index.id_map).astype(np.int64)
+        vecs = self.index.index.reconstruct_n(0, self.index.ntotal)
+        return ids, np.ascontiguousarray(vecs, dtype=np.float32)
+
+    @property
+    def needs_upgrade(self) -> bool:
+        return not self.is_ivf and self.index.ntotal >= IVF_THRESHOLD
+
+    def upgrade(self) -> bool:
+        """
+        Rebuild a flat index past IVF_THRESHOLD as IVF. Training runs on a snapshot
+        outside the lock; only the final add of the current vectors holds it.
+        """
+        with self._lock:
+            if not self.needs_upgrade:
+                return False
+            _, train = self._all_vectors()
+        ivf = self._ivf_index(train)
+        with self._lock:
+            if self.is_ivf:
+                return False
+            ids, vecs = self._all_vectors()  # includes upserts / removes made while training
+            ivf.add_with_ids(vecs, ids)
+            self.index = ivf
+            self._set_nprobe()
+            self._dirty = True
+        return True
+
+    # ---- updates ----
+    def upsert(self, roll_nos: Sequence[str], profiles: Sequence[Dict[str, Any]], outcomes: Sequence[Any]):
+        """
+        Add or replace students. outcomes: any JSON-serializable result summary per student.
+        """
+        if not roll_nos:
+            return
+        ids = np.array([roll_to_id(r) for r in roll_nos], dtype=np.int64)
+        vecs = profile_vectors(self.task, profiles)
+        with self._lock:
+            self.index.remove_ids(ids)
+            self.index.add_with_ids(vecs, ids)
+            self._meta.execute("BEGIN")
+            self._meta.executemany(
+                "INSERT OR REPLACE INTO students (id, roll_no, outcome) VALUES (?, ?, ?)",
+                [(int(i), str(r), json.dumps(o, default=str)) for i, r, o in zip(ids, roll_nos, outcomes)],
+            )
+            self._meta.execute("COMMIT")
+            self._dirty = True
+
+    def remove(self, roll_nos: Sequence[str]) -> int:
+        ids = np.array([roll_to_id(r) for r in roll_nos], dtype=np.int64)
+        with self._lock:
+            removed = int(self.index.remove_ids(ids))
+            self._meta.executemany("DELETE FROM students WHERE id = ?", [(int(i),) for i in ids])
+            self._dirty = self._dirty or removed > 0
+        return removed
+
+    # ---- persistence ----
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def save(self):
+        # Serialize in memory under the lock; the disk write happens outside it.
+        with self._lock:
+            data = faiss.serialize_index(self.index)
+            self._dirty = False
+        tmp = self.index_path + ".part"
+        with open(tmp, "wb") as fh:
+            fh.write(data.tobytes())
+        os.replace(tmp, self.index_path)
+
+    def save_if_dirty(self) -> bool:
+        if not self._dirty:
+            return False
+        self.save()
+        return True
+
+    def start_maintenance(self, interval: float = SAVE_INTERVAL_SECONDS):
+        """
+        Start the background thread that upgrades to IVF and saves dirty indexes.
+        """
+        if self._maintainer is not None:
+            return
+        self._maintainer = threading.Thread(
+            target=self._maintain, args=(interval,), name=f"similarity-{self.task}", daemon=True
+        )
+        self._maintainer.start()
+        atexit.register(self.close)
+
+    def _maintain(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.upgrade()
+                self.save_if_dirty()
+            except Exception:
+                inc("similarity_maintenance_errors_total", task=self.task)  # retried on the next tick
+
+    def close(self):
+        self._stop.set()
+        self.save_if_dirty()
+
+    # ---- queries ----
+    def nearest(self, profile: Dict[str, Any], k: int = 5, exclude_roll: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        k nearest past students: [{roll_no, distance, outcome}], closest first.
+        """
+        if self.index.ntotal == 0:
+            return []
+        query = profile_vectors(self.task, [profile])
+        extra = 1 if exclude_roll else 0
+        with self._lock:
+            distances, ids = self.index.search(query, k + extra)
+        skip = roll_to_id(exclude_roll) if exclude_roll else None
+        hits = [(int(i), float(d)) for i, d in zip(ids[0], distances[0]) if i != -1 and i != skip][:k]
+        if not hits:
+            return []
+        placeholders = ",".join("?" * len(hits))
+        with self._lock:  # the connection is shared with upsert() / remove() on other threads
+            rows = {
+                r[0]: (r[1], r[2])
+                for r in self._meta.execute(
+                    f"SELECT id, roll_no, outcome FROM students WHERE id IN ({placeholders})", [i for i, _ in hits]
+                )
+            }
+        return [
+            {"roll_no": rows[i][0], "distance": round(d, 4), "outcome": json.loads(rows[i][1] or "null")}
+            for i, d in hits
+            if i in rows
+        ]
+
+    def __len__(self) -> int:
+        return int(self.index.ntotal)
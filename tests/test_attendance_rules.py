@@ -0,0 +1,31 @@
+import numpy as np
+
+from attendance_rules import (
+    CONDONATION,
+    DETENTION,
+    ELIGIBLE,
+    UNKNOWN,
+    aggregate_attendance_counts,
+    attendance_code,
+    classify_attendance,
+)
+
+
+def test_classify_attendance_bands_and_missing_values():
+    codes = classify_attendance([100, 75, 74.99, 65, 64.99, 0, np.nan])
+    assert codes.dtype == np.int8
+    assert codes.tolist() == [ELIGIBLE, ELIGIBLE, CONDONATION, CONDONATION, DETENTION, DETENTION, UNKNOWN]
+
+
+def test_classify_attendance_matches_single_student_rule():
+    values = np.round(np.random.default_rng(0).uniform(0, 100, 5000), 2)
+    assert classify_attendance(values).tolist() == [attendance_code(v) for v in values]
+
+
+def test_aggregate_counts_ignore_missing_subjects():
+    attended = [[30, 40, np.nan], [0, 0, 0]]
+    conducted = [[40, 40, np.nan], [0, 0, 0]]
+    pct = aggregate_attendance_counts(attended, conducted)
+    assert pct[0] == 70 / 80 * 100
+    assert np.isnan(pct[1])
+    assert classify_attendance(pct).tolist() == [ELIGIBLE, UNKNOWN]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_ingest import coerce_chunk, field_errors
+
+
+def _raw():
+    return pd.DataFrame(
+        {
+            "roll_no": ["R1", "R2", "R3"],
+            "cgpa": [7.5, 85, "n/a"],
+            "internships": [1.6, 2, 3],
+            "major_projects": [2, -1, 1],
+            "hackathons": [0, 25, 1],
+            "communication_skill_1_10": [7, 8, 9],
+            "technical_skill_1_10": [6, 7, None],
+        }
+    )
+
+
+def test_field_errors_lists_every_problem_per_row():
+    errors = field_errors("placement", _raw())
+    assert 0 not in errors
+    assert errors[1] == [
+        "cgpa: 85 is outside 0-10",
+        "major_projects: -1 is outside 0-10",
+        "hackathons: 25 is outside 0-20",
+    ]
+    assert errors[2] == ["cgpa: missing or not a number", "technical_skill_1_10: missing or not a number"]
+
+
+def test_coerce_chunk_rejects_missing_clips_and_rounds():
+    chunk = coerce_chunk("placement", _raw())
+    assert chunk.rejected == 1
+    assert chunk.clipped == 3  # cgpa 85, major_projects -1, hackathons 25
+    frame = chunk.frame
+    assert frame["roll_no"].tolist() == ["R1", "R2"]
+    assert frame["cgpa"].tolist() == [7.5, 10.0]
+    assert frame["internships"].tolist() == [2, 2]
+    assert frame["major_projects"].tolist() == [2, 0]
+    assert frame["hackathons"].dtype == np.int64
+
+
+def test_coerce_chunk_requires_every_column():
+    with pytest.raises(ValueError, match="technical_skill_1_10"):
+        coerce_chunk("placement", _raw().drop(columns=["technical_skill_1_10"]))
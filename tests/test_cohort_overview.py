@@ -0,0 +1,24 @@
+import pandas as pd
+
+from cohort_overview import build_cohort_cube, slice_cube
+
+
+def test_student_count_without_attendance_column():
+    # Placement-only file: no attendance_percent, so no attendance aggregate.
+    frame = pd.DataFrame(
+        {
+            "cgpa": [8.0, 6.5, 7.2],
+            "internships": [1, 0, 2],
+            "major_projects": [2, 1, 3],
+            "hackathons": [3, 1, 2],
+            "communication_skill_1_10": [7, 5, 8],
+            "technical_skill_1_10": [8, 4, 9],
+            "department": ["CSE", "ECE", "CSE"],
+            "semester": [7, 7, 8],
+        }
+    )
+    cube = build_cohort_cube(frame)
+    assert set(cube.levels["task"]) == {"placement"}
+    assert slice_cube(cube)["students"] == 3
+    assert slice_cube(cube, departments=["CSE"])["students"] == 2
+    assert slice_cube(cube, departments=["CSE"], semesters=[8])["students"] == 1
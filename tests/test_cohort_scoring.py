@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cohort_ingest import COLUMN_RULES
+from cohort_scoring import TASK_COLUMNS, score_cohort, score_profile
+
+ROWS = 20_000
+
+
+def _cohort(task: str, seed: int) -> pd.DataFrame:
+    """
+    Random in-range profiles; integer columns and one-decimal floats land exactly on the rule thresholds.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for name, (lo, hi, integer) in COLUMN_RULES[task].items():
+        if integer:
+            data[name] = rng.integers(lo, hi, size=ROWS, endpoint=True)
+        else:
+            values = rng.uniform(lo, hi, size=ROWS)
+            coarse = rng.random(ROWS) < 0.5
+            values[coarse] = np.round(values[coarse], 1)
+            data[name] = values
+    return pd.DataFrame(data)[TASK_COLUMNS[task]]
+
+
+@pytest.mark.parametrize("task", sorted(TASK_COLUMNS))
+def test_vectorized_scores_match_per_student_scorer(task):
+    frame = _cohort(task, seed=len(task))
+    scored = score_cohort(task, frame)
+    for i, profile in enumerate(frame.to_dict("records")):
+        expected = score_profile(task, profile)
+        row = scored.iloc[i]
+        assert (row["risk_level"], row["predicted_score"], row["summary"]) == (
+            expected["risk_level"],
+            expected["predicted_score"],
+            expected["summary"],
+        ), profile
@@ -0,0 +1,84 @@
+import json
+
+import granite_executor
+from granite_batch import MISSING_FROM_BATCH, call_granite_batch
+from granite_executor import TransientError
+
+PROFILES = {f"R{i}": {"cgpa": float(i)} for i in range(4)}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class StubModel:
+    """
+    Fails the first `failures` requests with `status`, then answers every id
+    in the prompt except the last `drop` ones.
+    """
+
+    def __init__(self, failures=0, status=503, drop=0):
+        self.failures = failures
+        self.status = status
+        self.drop = drop
+        self.calls = 0
+
+    def generate_text(self, prompt, params, raw_response=True):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise HTTPError(self.status)
+        n = prompt.count('"id":"S') - self.drop
+        items = [{"id": f"S{i + 1}", "risk_level": "Low", "summary": "batched"} for i in range(n)]
+        return {"results": [{"generated_text": json.dumps(items)}]}
+
+
+def _fallback(calls):
+    def fallback(profile):
+        calls.append(profile)
+        return {"risk_level": "High", "summary": "single"}, ""
+
+    return fallback
+
+
+def test_transient_failure_retries_the_whole_batch(monkeypatch):
+    monkeypatch.setattr(granite_executor, "backoff_delay", lambda *a, **k: 0)
+    model, singles = StubModel(failures=2), []
+    results = call_granite_batch(model, "Dropout", PROFILES, fallback=_fallback(singles), batch_size=4)
+    assert model.calls == 3
+    assert singles == []
+    assert all(parsed["summary"] == "batched" for parsed, _ in results.values())
+
+
+def test_exhausted_retries_do_not_fan_out(monkeypatch):
+    monkeypatch.setattr(granite_executor, "backoff_delay", lambda *a, **k: 0)
+    model, singles = StubModel(failures=10), []
+    results = call_granite_batch(
+        model, "Dropout", PROFILES, fallback=_fallback(singles), batch_size=4, max_retries=2
+    )
+    assert model.calls == 3
+    assert singles == []
+    assert all(parsed is None and isinstance(err, TransientError) for parsed, err in results.values())
+
+
+def test_non_transient_failure_is_not_retried():
+    model, singles = StubModel(failures=1, status=400), []
+    results = call_granite_batch(model, "Dropout", PROFILES, fallback=_fallback(singles), batch_size=4)
+    assert model.calls == 1
+    assert singles == []
+    assert {err for _, err in results.values()} == {"Error calling Granite model: HTTP 400"}
+
+
+def test_only_students_missing_from_the_response_fall_back():
+    model, singles = StubModel(drop=1), []
+    results = call_granite_batch(model, "Dropout", PROFILES, fallback=_fallback(singles), batch_size=4)
+    assert singles == [PROFILES["R3"]]
+    assert results["R3"][0]["summary"] == "single"
+    assert results["R0"][0]["summary"] == "batched"
+
+
+def test_missing_students_without_fallback():
+    results = call_granite_batch(StubModel(drop=1), "Dropout", PROFILES, batch_size=4)
+    assert results["R3"] == (None, MISSING_FROM_BATCH)
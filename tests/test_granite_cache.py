@@ -0,0 +1,42 @@
+import granite_cache
+from granite_cache import GraniteCache, cache_key
+
+
+def test_key_covers_everything_that_changes_the_answer():
+    base = cache_key("dropout", {"cgpa": 7, "attendance_percent": 80}, "", "granite", {"temperature": 0})
+    assert base == cache_key("dropout", {"attendance_percent": 80, "cgpa": 7}, "", "granite", {"temperature": 0})
+    assert base != cache_key("dropout", {"cgpa": 7, "attendance_percent": 80}, "", "granite", {"temperature": 0.7})
+    assert base != cache_key("dropout", {"cgpa": 7, "attendance_percent": 80}, "", "other-model", {"temperature": 0})
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(granite_cache.time, "time", lambda: now[0])
+    cache = GraniteCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+    cache.put("k", {"risk_level": "Low"})
+
+    now[0] = 1059.0
+    assert cache.get("k") == {"risk_level": "Low"}
+    now[0] = 1061.0
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted_past_the_byte_budget(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(granite_cache.time, "time", lambda: now[0])
+    value = {"summary": "x" * 100}
+    entry_bytes = len('{"summary":"' + "x" * 100 + '"}')
+    cache = GraniteCache(str(tmp_path / "cache.sqlite3"), max_bytes=2 * entry_bytes)
+
+    cache.put("a", value)
+    now[0] += 1
+    cache.put("b", value)
+    now[0] += 1
+    assert cache.get("a") == value  # "a" is now more recently used than "b"
+    now[0] += 1
+    cache.put("c", value)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
@@ -0,0 +1,31 @@
+import multiprocessing
+
+import history_store
+from history_store import HistoryStore, history_record
+
+WORKERS = 4
+APPENDS = 40
+
+
+def _append_and_read(args):
+    root, worker = args
+    history_store.COMPACT_AFTER_FILES = 3  # compact constantly so processes collide
+    store = HistoryStore(root)
+    duplicates = 0
+    for i in range(APPENDS):
+        record = history_record(f"R{worker}-{i}", "dropout", {"current_semester": 5}, {"risk_level": "Low"}, "m")
+        store.append([record])
+        if i % 5 == 0:
+            rows = store.query(task="dropout")
+            duplicates += len(rows) - rows["roll_no"].nunique()
+    return duplicates
+
+
+def test_concurrent_processes_never_duplicate_rows(tmp_path):
+    root = str(tmp_path / "history")
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(WORKERS) as pool:
+        duplicates = pool.map(_append_and_read, [(root, w) for w in range(WORKERS)])
+    assert duplicates == [0] * WORKERS
+    rows = HistoryStore(root).query()
+    assert len(rows) == rows["roll_no"].nunique() == WORKERS * APPENDS
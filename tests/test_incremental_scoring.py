@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import incremental_scoring
+from analytics_cli import incremental_columns
+from granite_client import GraniteSettings
+from incremental_scoring import ScoreStateStore
+
+SETTINGS = GraniteSettings(api_key="k", url="u", project_id="p", model_id="granite", demo_mode=False, use_cache=False)
+
+
+def _frame(rolls):
+    return pd.DataFrame(
+        {
+            "roll_no": rolls,
+            "cgpa": 7.0,
+            "attendance_percent": 80.0,
+            "avg_assignment_score_percent": 70.0,
+            "no_of_academic_warnings": 0,
+            "current_semester": 5,
+            "active_backlogs": 0,
+        }
+    )
+
+
+def test_repeated_roll_numbers_are_rejected(tmp_path):
+    store = ScoreStateStore(str(tmp_path / "state.sqlite3"))
+    with pytest.raises(ValueError, match="R1"):
+        incremental_columns(store, None, "dropout", _frame(["R1", "R2", "R1"]), 10, 8, None)
+
+    seen = set()
+    incremental_columns(store, None, "dropout", _frame(["R1", "R2"]), 10, 8, None, seen=seen)
+    with pytest.raises(ValueError, match="R2"):
+        incremental_columns(store, None, "dropout", _frame(["R2", "R3"]), 10, 8, None, seen=seen)
+
+
+def test_single_calls_use_concurrency_and_rate(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_cohort(settings, task, profiles, max_concurrency, rate_per_sec):
+        calls.append((sorted(profiles), max_concurrency, rate_per_sec))
+        return {r: ({"risk_level": "Low"}, "") for r in profiles}
+
+    monkeypatch.setattr(incremental_scoring, "call_granite_for_cohort", fake_cohort)
+    store = ScoreStateStore(str(tmp_path / "state.sqlite3"))
+    scored, stats = incremental_columns(store, SETTINGS, "dropout", _frame(["R1", "R2"]), 1, 3, 2.5)
+
+    assert calls == [(["R1", "R2"], 3, 2.5)]
+    assert stats["sent_to_granite"] == 2
+    assert scored["granite_risk_level"].tolist() == ["Low", "Low"]
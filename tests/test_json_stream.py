@@ -0,0 +1,32 @@
+from json_stream import IncrementalJSONExtractor, consume_until_json
+
+
+def test_object_split_across_chunks_with_braces_in_strings():
+    extractor = IncrementalJSONExtractor()
+    chunks = ['Sure! {"note": "skip"} then {"risk_level": "Hi', 'gh", "summary": "a } and \\" {"', ', "x": 1}', " bye"]
+    results = [extractor.feed(chunk) for chunk in chunks]
+    assert results[:2] == [None, None]
+    assert results[2] == {"risk_level": "High", "summary": 'a } and " {', "x": 1}
+
+
+def test_consume_until_json_stops_and_closes_the_stream():
+    consumed = []
+
+    def stream():
+        try:
+            for chunk in ['{"risk_level": "Low", ', '"summary": "ok"}', " trailing", " chatter"]:
+                consumed.append(chunk)
+                yield chunk
+        finally:
+            consumed.append("closed")
+
+    parsed, text = consume_until_json(stream())
+    assert parsed == {"risk_level": "Low", "summary": "ok"}
+    assert text == '{"risk_level": "Low", "summary": "ok"}'
+    assert consumed[-1] == "closed" and " trailing" not in consumed
+
+
+def test_no_matching_object_returns_none():
+    parsed, text = consume_until_json(["no json here ", '{"risk_level": "Low"}'])
+    assert parsed is None
+    assert text.endswith("}")
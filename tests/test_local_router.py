@@ -0,0 +1,29 @@
+import numpy as np
+
+import local_router
+from cohort_ingest import COLUMN_RULES
+from cohort_scoring import score_profile
+from local_router import profile_key, train_router
+
+
+def test_duplicate_profiles_never_cross_splits(monkeypatch):
+    rng = np.random.default_rng(1)
+    profiles = []
+    for _ in range(200):
+        profile = {name: float(round(rng.uniform(lo, hi))) for name, (lo, hi, _) in COLUMN_RULES["dropout"].items()}
+        profiles += [profile] * int(rng.integers(1, 4))  # the same inputs scored for several students
+    labels = [str(score_profile("dropout", p)["risk_level"]) for p in profiles]
+
+    evaluated = []
+    real_evaluate = local_router.evaluate
+
+    def spy(router, test_profiles, test_labels):
+        evaluated.extend(test_profiles)
+        return real_evaluate(router, test_profiles, test_labels)
+
+    monkeypatch.setattr(local_router, "evaluate", spy)
+    router, report = train_router("dropout", profiles, labels)
+
+    tested = {profile_key(p) for p in evaluated}
+    assert tested and not tested & set(router.fitted_keys.tolist())
+    assert report["rows"] + report["train_rows"] + report["calibration_rows"] == len(profiles)
@@ -0,0 +1,25 @@
+import json
+
+from metrics import Metrics
+
+
+def test_tokens_per_call_adds_counters_across_labels():
+    metrics = Metrics()
+    for mode, tokens in (("single", 100), ("batch", 300)):
+        metrics.inc("granite_calls_total", task="dropout", mode=mode)
+        metrics.inc("granite_input_tokens_total", tokens, task="dropout", mode=mode)
+    assert metrics.summary()["tokens_per_call"]["dropout"]["prompt"] == 200.0
+
+
+def test_jsonl_sink_keeps_one_handle(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = Metrics(str(path))
+    for _ in range(3):
+        with metrics.span("render", tab="dropout"):
+            pass
+    sink = metrics._sink
+    metrics.record("usage", tokens=5)
+    assert metrics._sink is sink
+    metrics.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line.get("stage", line.get("event")) for line in lines] == ["render"] * 3 + ["usage"]
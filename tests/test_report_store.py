@@ -0,0 +1,20 @@
+import report_store
+from report_store import ReportStore
+
+
+def test_idle_session_scopes_are_swept(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(report_store.time, "time", lambda: now[0])
+    store = ReportStore(str(tmp_path / "reports.sqlite3"), max_items=1, ttl_seconds=600)
+    store.put_section("idle", "21CSE1", "A", "dropout", {"cgpa": 7}, {"risk_level": "Low"})
+    store.put_section("active", "21CSE2", "B", "dropout", {"cgpa": 8}, {"risk_level": "Low"})
+
+    now[0] = 1500.0
+    assert store.sections("active", "21CSE2")  # read only, from memory
+    now[0] = 2000.0
+    store.put_section("new", "21CSE3", "C", "dropout", {"cgpa": 9}, {"risk_level": "Low"})
+
+    assert store.sections("idle", "21CSE1") == {}
+    assert store.sections("active", "21CSE2")
+    assert store.stats()["expired"] == 1
+    assert store.stats()["on_disk"] == 2
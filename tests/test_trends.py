@@ -0,0 +1,39 @@
+from history_store import history_record
+from trends import CohortAggregates
+
+PROFILE = {
+    "cgpa": 8.0,
+    "attendance_percent": 90,
+    "avg_assignment_score_percent": 80,
+    "no_of_academic_warnings": 0,
+    "current_semester": 5,
+    "active_backlogs": 0,
+}
+
+
+def _table(tmp_path, batches):
+    aggregates = CohortAggregates(str(tmp_path / "agg.sqlite3"))
+    for batch in batches:
+        aggregates.ingest(batch)
+    return aggregates.semester_table("dropout").iloc[0]
+
+
+def test_repeated_roll_in_one_batch_counts_once(tmp_path):
+    local = history_record("21CSE1", "dropout", PROFILE, {"risk_level": "Low"}, "local-rules")
+    granite = history_record("21cse1", "dropout", {**PROFILE, "cgpa": 6.0}, {"risk_level": "High"}, "granite")
+    row = _table(tmp_path, [[local, granite]])
+    assert row["students"] == 1
+    assert row["cgpa_mean"] == 6.0
+    assert row["risk:High"] == 1.0
+    assert "risk:Low" not in row or row["risk:Low"] == 0.0
+
+
+def test_rescoring_replaces_previous_contribution(tmp_path):
+    first = history_record("21CSE1", "dropout", PROFILE, {"risk_level": "Low"}, "granite")
+    other = history_record("21CSE2", "dropout", {**PROFILE, "cgpa": 6.0}, {"risk_level": "High"}, "granite")
+    again = history_record("21CSE1", "dropout", {**PROFILE, "cgpa": 7.0}, {"risk_level": "Medium"}, "granite")
+    row = _table(tmp_path, [[first, other], [again, again]])
+    assert row["students"] == 2
+    assert row["cgpa_mean"] == 6.5
+    assert row["risk:Low"] == 0.0
+    assert row["risk:High"] == 0.5 and row["risk:Medium"] == 0.5
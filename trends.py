@@ -0,0 +1,262 @@
+"""
+Semester-over-semester trend analytics.
+
+Per student (from the analytics history): the latest record of each semester,
+deltas in CGPA / attendance / backlogs, the risk trajectory, and early
+warnings when a trend crosses a threshold.
+
+Per cohort: (task, semester) aggregates (count, sum, sum of squares per
+metric, risk-level counts) maintained incrementally in SQLite. Each
+student's contribution is remembered, so re-scoring a student replaces their
+previous contribution instead of double counting, and a new semester's data
+never requires a pass over the full history.
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_AGGREGATES_PATH = ".cohort_aggregates.sqlite3"
+
+# Profile / result fields tracked per task (result fields are prefixed "result.")
+TREND_FIELDS: Dict[str, List[str]] = {
+    "dropout": ["cgpa", "attendance_percent", "active_backlogs", "avg_assignment_score_percent"],
+    "placement": ["cgpa", "internships", "technical_skill_1_10", "communication_skill_1_10"],
+    "exam": ["attendance_percent", "internal_test_1_percent", "internal_test_2_percent", "result.predicted_score"],
+}
+
+RISK_ORDER = {"low": 0, "medium": 1, "high": 2, "tier-1": 0, "tier-2": 1, "tier-3": 2, "not ready": 3}
+
+# Early-warning thresholds: delta between consecutive semesters.
+WARN_CGPA_DROP = 0.5
+WARN_ATTENDANCE_DROP = 10.0
+WARN_BACKLOG_RISE = 2
+ATTENDANCE_FLOORS = (75.0, 65.0)  # eligibility / condonation limits (attendance_rules)
+
+
+def risk_rank(level: Any) -> float:
+    return float(RISK_ORDER.get(str(level or "").strip().lower(), np.nan))
+
+
+def _field_value(profile: Dict[str, Any], result: Dict[str, Any], field: str) -> float:
+    source, name = (result, field[len("result."):]) if field.startswith("result.") else (profile, field)
+    try:
+        return float(source.get(name))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# ---------------------------------------------------------------------------
+# Per-student trends
+# ---------------------------------------------------------------------------
+def semester_series(history: pd.DataFrame, task: str = "dropout") -> pd.DataFrame:
+    """
+    One row per semester (latest record wins) with the tracked fields, risk rank and deltas.
+    history: rows from HistoryStore.student_history / query for one student.
+    """
+    fields = TREND_FIELDS[task]
+    rows = history[(history["task"] == task) & (history["semester"] > 0)]
+    if rows.empty:
+        return pd.DataFrame(columns=["semester", "risk_level", "risk_rank", *fields])
+    latest = rows.sort_values("ts", kind="stable").groupby("semester", sort=True).tail(1).sort_values("semester")
+    records = []
+    for sem, level, profile_json, result_json in zip(
+        latest["semester"], latest["risk_level"], latest["profile"], latest["result"]
+    ):
+        profile, result = json.loads(profile_json or "{}"), json.loads(result_json or "{}")
+        row = {"semester": int(sem), "risk_level": level, "risk_rank": risk_rank(level)}
+        row.update({f: _field_value(profile, result, f) for f in fields})
+        records.append(row)
+    series = pd.DataFrame.from_records(records)
+    for f in [*fields, "risk_rank"]:
+        series[f"delta_{f}"] = series[f].diff()
+    return series.reset_index(drop=True)
+
+
+def early_warnings(series: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Threshold crossings in a semester_series: [{semester, signal, detail}], oldest first.
+    """
+    warnings: List[Dict[str, Any]] = []
+
+    def add(sem: Any, signal: str, detail: str):
+        warnings.append({"semester": int(sem), "signal": signal, "detail": detail})
+
+    for i in range(1, len(series)):
+        row, prev = series.iloc[i], series.iloc[i - 1]
+        sem = row["semester"]
+        if row.get("delta_cgpa", 0) <= -WARN_CGPA_DROP:
+            add(sem, "cgpa_drop", f"CGPA fell {prev['cgpa']:.2f} → {row['cgpa']:.2f}")
+        if row.get("delta_attendance_percent", 0) <= -WARN_ATTENDANCE_DROP:
+            add(sem, "attendance_drop", f"Attendance fell {prev['attendance_percent']:.0f}% → {row['attendance_percent']:.0f}%")
+        for floor in ATTENDANCE_FLOORS:
+            if prev.get("attendance_percent", np.nan) >= floor > row.get("attendance_percent", np.nan):
+                add(sem, "attendance_below_floor", f"Attendance crossed below {floor:.0f}%")
+        if row.get("delta_active_backlogs", 0) >= WARN_BACKLOG_RISE:
+            add(sem, "backlogs_rising", f"Backlogs rose {prev['active_backlogs']:.0f} → {row['active_backlogs']:.0f}")
+        if row.get("delta_risk_rank", 0) > 0:
+            add(sem, "risk_escalated", f"Risk moved {prev['risk_level']} → {row['risk_level']}")
+        if i >= 2 and row.get("delta_cgpa", 0) < 0 and series.iloc[i - 1].get("delta_cgpa", 0) < 0:
+            add(sem, "cgpa_declining", "CGPA declined two semesters in a row")
+    return warnings
+
+
+def trajectory(series: pd.DataFrame) -> str:
+    """
+    'improving' / 'worsening' / 'stable' / 'insufficient data' from the risk-rank slope.
+    """
+    ranks = series["risk_rank"].to_numpy(dtype=float) if len(series) else np.array([])
+    mask = ~np.isnan(ranks)
+    if mask.sum() < 2:
+        return "insufficient data"
+    slope = np.polyfit(series["semester"].to_numpy(dtype=float)[mask], ranks[mask], 1)[0]
+    if slope > 0.15:
+        return "worsening"
+    if slope < -0.15:
+        return "improving"
+    return "stable"
+
+
+# ---------------------------------------------------------------------------
+# Incremental cohort aggregates
+# ---------------------------------------------------------------------------
+class CohortAggregates:
+    def __init__(self, path: str = DEFAULT_AGGREGATES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cohort_agg (
+                task TEXT NOT NULL, semester INTEGER NOT NULL, metric TEXT NOT NULL,
+                n REAL NOT NULL, total REAL NOT NULL, total_sq REAL NOT NULL,
+                PRIMARY KEY (task, semester, metric)
+            );
+            CREATE TABLE IF NOT EXISTS cohort_contrib (
+                task TEXT NOT NULL, semester INTEGER NOT NULL, roll_no TEXT NOT NULL,
+                contrib TEXT NOT NULL,
+                PRIMARY KEY (task, semester, roll_no)
+            );
+            """
+        )
+
+    @staticmethod
+    def _contribution(task: str, profile: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, float]:
+        contrib = {}
+        for f in TREND_FIELDS.get(task, []):
+            value = _field_value(profile, result, f)
+            if not np.isnan(value):
+                contrib[f] = value
+        level = result.get("risk_level")
+        if level:
+            contrib[f"risk:{level}"] = 1.0
+        return contrib
+
+    def ingest(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Fold history_record() rows in. A (task, semester, roll) seen before has its
+        old contribution subtracted first, so the aggregates always reflect each
+        student's latest result per semester. Within one batch the last record
+        for a key wins (e.g. the Granite row after the local-rules row).
+        """
+        latest: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
+        for rec in records:
+            key = (rec["task"], int(rec["semester"]), rec["roll_no"])
+            if key[1] > 0:
+                latest.pop(key, None)  # keep batch order of the surviving record
+                latest[key] = rec
+        if not latest:
+            return 0
+
+        deltas: Dict[Tuple[str, int, str], List[float]] = {}
+        contribs: List[Tuple[str, int, str, str]] = []
+
+        def bump(key: Tuple[str, int, str], value: float, sign: float):
+            d = deltas.setdefault(key, [0.0, 0.0, 0.0])
+            d[0] += sign
+            d[1] += sign * value
+            d[2] += sign * value * value
+
+        with self._lock:
+            for (task, sem, roll), rec in latest.items():
+                new = self._contribution(task, json.loads(rec["profile"]), json.loads(rec["result"]))
+                row = self._conn.execute(
+                    "SELECT contrib FROM cohort_contrib WHERE task = ? AND semester = ? AND roll_no = ?", (task, sem, roll)
+                ).fetchone()
+                for metric, value in (json.loads(row[0]) if row else {}).items():
+                    bump((task, sem, metric), value, -1.0)
+                for metric, value in new.items():
+                    bump((task, sem, metric), value, 1.0)
+                contribs.append((task, sem, roll, json.dumps(new)))
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO cohort_agg (task, semester, metric, n, total, total_sq) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (task, semester, metric) DO UPDATE SET "
+                "n = n + excluded.n, total = total + excluded.total, total_sq = total_sq + excluded.total_sq",
+                [(t, s, m, d[0], d[1], d[2]) for (t, s, m), d in deltas.items()],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cohort_contrib (task, semester, roll_no, contrib) VALUES (?, ?, ?, ?)", contribs
+            )
+            self._conn.execute("COMMIT")
+        return len(contribs)
+
+    def semester_table(self, task: str) -> pd.DataFrame:
+        """
+        One row per semester: students, mean / std per tracked metric, and share per risk level.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT semester, metric, n, total, total_sq FROM cohort_agg WHERE task = ? ORDER BY semester", (task,)
+            ).fetchall()
+        table: Dict[int, Dict[str, float]] = {}
+        for sem, metric, n, total, total_sq in rows:
+            out = table.setdefault(sem, {"semester": sem})
+            if metric.startswith("risk:"):
+                out[metric] = n
+            elif n > 0:
+                mean = total / n
+                out[f"{metric}_mean"] = round(mean, 3)
+                out[f"{metric}_std"] = round(float(np.sqrt(max(total_sq / n - mean * mean, 0.0))), 3)
+                out["students"] = max(out.get("students", 0), n)
+        frame = pd.DataFrame(list(table.values()))
+        if frame.empty:
+            return frame
+        risk_cols = [c for c in frame.columns if c.startswith("risk:")]
+        if risk_cols:
+            totals = frame[risk_cols].fillna(0).sum(axis=1).replace(0, np.nan)
+            for c in risk_cols:
+                frame[c] = (frame[c].fillna(0) / totals).round(3)
+        return frame.sort_values("semester").reset_index(drop=True)
+
+    def rolling(self, task: str, metric: str, window: int = 3) -> pd.DataFrame:
+        """
+        Rolling mean of one metric over the last `window` semesters, weighted by students per semester.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT semester, n, total FROM cohort_agg WHERE task = ? AND metric = ? ORDER BY semester",
+                (task, metric),
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=["semester", "n", "total"])
+        if frame.empty:
+            return frame
+        n_roll = frame["n"].rolling(window, min_periods=1).sum()
+        frame[f"{metric}_rolling_mean"] = (frame["total"].rolling(window, min_periods=1).sum() / n_roll).round(3)
+        frame[f"{metric}_mean"] = (frame["total"] / frame["n"]).round(3)
+        return frame[["semester", "n", f"{metric}_mean", f"{metric}_rolling_mean"]]
+
+
+def student_trend_report(history: pd.DataFrame, task: str = "dropout") -> Optional[Dict[str, Any]]:
+    """
+    {"series": DataFrame, "trajectory": str, "warnings": [...]} or None without multi-semester data.
+    """
+    series = semester_series(history, task)
+    if len(series) < 2:
+        return None
+    return {"series": series, "trajectory": trajectory(series), "warnings": early_warnings(series)}